@@ -0,0 +1,173 @@
+-- Persistent Aseprite Conversion Worker
+-- One long-running Aseprite script process that converts a queue of SVG jobs,
+-- so Aseprite startup and metadata parsing happen once per batch instead of
+-- once per view directory.
+--
+-- Usage:
+--   WORKER_QUEUE=/tmp/queue.fifo aseprite -b --script aseprite-worker.lua
+--
+-- The queue is read line by line (a named pipe, or a plain file for one-shot
+-- batches). Fields are tab separated:
+--   JOB<TAB>id<TAB>input_svg<TAB>output_path<TAB>view_index<TAB>target_size
+--   SVG<TAB>id<TAB>svg_name<TAB>output_path<TAB>view_index<TAB>target_size<TAB>byte_length
+--   QUIT
+-- An SVG command is followed by exactly byte_length bytes of SVG text and a
+-- newline, so prepared documents can be streamed without temp files;
+-- svg_name only carries the wearable ID prefix (e.g. 8_MarineJacket_Front.svg).
+-- One result line per job is written to stdout:
+--   @@RESULT<TAB>id<TAB>OK<TAB>pixels_placed<TAB>seconds
+--   @@RESULT<TAB>id<TAB>SKIP<TAB>message   (nothing written, e.g. no pixels)
+--   @@RESULT<TAB>id<TAB>ERR<TAB>message
+-- The worker exits on QUIT or when the queue reaches end of file.
+
+local SVGFileConverter = dofile("svg-file-converter.lua")
+local config = dofile("batch-config.lua")
+
+local RESULT_PREFIX = "@@RESULT"
+
+local logFile = nil
+local lastError = nil
+
+-- Logging functions
+local function logMessage(level, message)
+    local timestamp = os.date("%Y-%m-%d %H:%M:%S")
+    local logEntry = string.format("[%s] [%s] %s", timestamp, level, message)
+
+    print(logEntry)
+
+    if logFile then
+        logFile:write(logEntry .. "\n")
+        logFile:flush()
+    end
+end
+
+local function logInfo(message)
+    logMessage("INFO", message)
+end
+
+local function logError(message)
+    lastError = message
+    logMessage("ERROR", message)
+end
+
+local log = {info = logInfo, error = logError}
+
+-- Write a result line and flush it so the client sees it immediately
+local function writeResult(id, status, ...)
+    local fields = {RESULT_PREFIX, id, status}
+    for _, value in ipairs({...}) do
+        -- Keep the line protocol intact
+        table.insert(fields, (tostring(value):gsub("[\t\r\n]", " ")))
+    end
+    io.stdout:write(table.concat(fields, "\t") .. "\n")
+    io.stdout:flush()
+end
+
+local function splitTabs(line)
+    local fields = {}
+    for field in (line .. "\t"):gmatch("([^\t]*)\t") do
+        table.insert(fields, field)
+    end
+    return fields
+end
+
+local function ensureParentDir(path)
+    local dir = app.fs.filePath(path)
+    if dir ~= "" and not app.fs.isDirectory(dir) then
+        app.fs.makeAllDirectories(dir)
+    end
+end
+
+-- Run one JOB (content == nil, source is a file path) or SVG command
+local function handleJob(id, source, outputPath, viewField, sizeField, content)
+    local viewIndex = tonumber(viewField) or config.default_view_index
+    local targetSize = tonumber(sizeField) or config.default_target_size
+
+    if not source or source == "" or not outputPath or outputPath == "" then
+        writeResult(id, "ERR", "Malformed job line")
+        return
+    end
+    if viewIndex < 0 or viewIndex > 3 then
+        writeResult(id, "ERR", "Invalid view index: " .. viewIndex)
+        return
+    end
+    if targetSize <= 0 or targetSize > 1024 then
+        writeResult(id, "ERR", "Invalid target size: " .. targetSize)
+        return
+    end
+
+    lastError = nil
+    ensureParentDir(outputPath)
+    local ok, success, pixelsPlaced, fileTime
+    if content then
+        ok, success, pixelsPlaced, fileTime = pcall(SVGFileConverter.convertContent, content, source, outputPath, viewIndex, targetSize, log)
+    else
+        ok, success, pixelsPlaced, fileTime = pcall(SVGFileConverter.convert, source, outputPath, viewIndex, targetSize, log)
+    end
+
+    if not ok then
+        logError("[FAIL] " .. app.fs.fileName(source) .. " - " .. tostring(success))
+        writeResult(id, "ERR", success)
+    elseif not success then
+        -- The converter reported the problem and wrote nothing; the batch
+        -- importer does not count these as failures either
+        writeResult(id, "SKIP", lastError or "Nothing converted")
+    else
+        logInfo("[OK] " .. app.fs.fileName(source) .. " → " .. outputPath)
+        writeResult(id, "OK", pixelsPlaced, string.format("%.3f", fileTime))
+    end
+end
+
+local function runWorker()
+    local queuePath = os.getenv("WORKER_QUEUE")
+    if not queuePath or queuePath == "" then
+        print("Usage: WORKER_QUEUE=<fifo or file> aseprite -b --script aseprite-worker.lua")
+        return
+    end
+
+    local logPath = os.getenv("BATCH_LOG_FILE") or config.log_file
+    logFile = io.open(logPath, "w")
+
+    -- Opening a named pipe blocks until the client opens it for writing
+    local queue = io.open(queuePath, "r")
+    if not queue then
+        logError("Could not open job queue: " .. queuePath)
+        return
+    end
+
+    logInfo("Aseprite worker ready (queue: " .. queuePath .. ")")
+    local jobCount = 0
+
+    while true do
+        local line = queue:read("*l")
+        if not line then
+            break
+        end
+        local fields = splitTabs(line)
+        if fields[1] == "QUIT" then
+            break
+        elseif fields[1] == "JOB" then
+            jobCount = jobCount + 1
+            handleJob(fields[2] or "?", fields[3], fields[4], fields[5], fields[6])
+        elseif fields[1] == "SVG" then
+            local length = tonumber(fields[7]) or 0
+            local content = length > 0 and queue:read(length) or ""
+            -- Newline terminating the document
+            queue:read("*l")
+            jobCount = jobCount + 1
+            handleJob(fields[2] or "?", fields[3], fields[4], fields[5], fields[6], content)
+        elseif line ~= "" then
+            logError("Unknown command: " .. line)
+        end
+    end
+
+    queue:close()
+    logInfo("Aseprite worker finished (" .. jobCount .. " jobs)")
+
+    if logFile then
+        logFile:close()
+        logFile = nil
+    end
+end
+
+runWorker()
@@ -0,0 +1,293 @@
+"""
+Native reader/writer for the .aseprite binary format (RGBA sprites only).
+
+Writes the same file Aseprite saves for a sprite made by
+svg-file-converter.lua (Sprite(size, size, ColorMode.RGB), one layer named
+"Layer 1", one full-canvas cel per frame), byte for byte:
+
+    header (128 bytes)
+    frame: color profile (sRGB), palette, layer, cel (zlib level 6), [tags]
+    frame: cel
+    ...
+
+With no palette the 256-entry all-black palette of a new sprite is written
+as an old-style (0x0004) chunk, as Aseprite does; a custom palette is written
+as a new-style (0x2019) chunk. Pixels are RGBA bytes, row major, from
+svg_renderer.place_pixels, svg_renderer_numpy.place_array (any object with
+tobytes()) or read_aseprite.
+
+    write_aseprite('8_MarineJacket_Front.aseprite', rgba, 64, 64)
+    sprite = read_aseprite('8_MarineJacket_Front.aseprite')
+    sprite.frames[0]    # RGBA bytes of the first frame
+
+Spec: https://github.com/aseprite/aseprite/blob/main/docs/ase-file-specs.md
+"""
+import os
+import struct
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+HEADER_MAGIC = 0xA5E0
+FRAME_MAGIC = 0xF1FA
+HEADER_SIZE = 128
+FRAME_HEADER_SIZE = 16
+CHUNK_HEADER_SIZE = 6
+
+CHUNK_OLD_PALETTE = 0x0004
+CHUNK_LAYER = 0x2004
+CHUNK_CEL = 0x2005
+CHUNK_COLOR_PROFILE = 0x2007
+CHUNK_TAGS = 0x2018
+CHUNK_PALETTE = 0x2019
+
+CEL_COMPRESSED_IMAGE = 2
+COLOR_DEPTH_RGBA = 32
+LAYER_VISIBLE_EDITABLE = 3
+HEADER_FLAG_LAYER_OPACITY = 1
+COLOR_PROFILE_SRGB = 1
+DEFAULT_FRAME_DURATION = 100
+DEFAULT_LAYER_NAME = 'Layer 1'
+# zlib level Aseprite saves with (Z_DEFAULT_COMPRESSION)
+ZLIB_LEVEL = 6
+
+TAG_FORWARD, TAG_REVERSE, TAG_PING_PONG, TAG_PING_PONG_REVERSE = range(4)
+
+RGBA = Tuple[int, int, int, int]
+
+
+class AsepriteFormatError(ValueError):
+    pass
+
+
+@dataclass
+class Tag:
+    """Animation tag over frames first..last (inclusive)"""
+    name: str
+    first: int
+    last: int
+    direction: int = TAG_FORWARD
+    repeat: int = 0
+    color: Tuple[int, int, int] = (0, 0, 0)
+
+
+@dataclass
+class AsepriteSprite:
+    width: int
+    height: int
+    # RGBA bytes per frame, row major, width * height * 4 each
+    frames: List[bytes] = field(default_factory=list)
+    durations: List[int] = field(default_factory=list)
+    palette: Optional[List[RGBA]] = None
+    tags: List[Tag] = field(default_factory=list)
+    layer_name: str = DEFAULT_LAYER_NAME
+
+
+def _string(text: str) -> bytes:
+    data = text.encode('utf-8')
+    return struct.pack('<H', len(data)) + data
+
+
+def _chunk(chunk_type: int, body: bytes) -> bytes:
+    return struct.pack('<IH', CHUNK_HEADER_SIZE + len(body), chunk_type) + body
+
+
+def _pixels(rgba, width: int, height: int) -> bytes:
+    data = rgba.tobytes() if hasattr(rgba, 'tobytes') else bytes(rgba)
+    if len(data) != width * height * 4:
+        raise AsepriteFormatError(f"Expected {width * height * 4} RGBA bytes, got {len(data)}")
+    return data
+
+
+def _color_profile_chunk() -> bytes:
+    # Type, flags, fixed-point gamma, reserved
+    return _chunk(CHUNK_COLOR_PROFILE, struct.pack('<HHI8x', COLOR_PROFILE_SRGB, 0, 0))
+
+
+def _palette_chunk(palette: Optional[Sequence[RGBA]]) -> bytes:
+    if palette is None:
+        # Default palette of a new RGB sprite: one packet of 256 black entries
+        return _chunk(CHUNK_OLD_PALETTE, struct.pack('<HBB', 1, 0, 0) + bytes(256 * 3))
+    body = struct.pack('<III8x', len(palette), 0, max(0, len(palette) - 1))
+    body += b''.join(struct.pack('<HBBBB', 0, *color) for color in palette)
+    return _chunk(CHUNK_PALETTE, body)
+
+
+def _layer_chunk(name: str) -> bytes:
+    # Flags, type (image), child level, default width/height, blend mode,
+    # opacity, reserved, name
+    body = struct.pack('<HHHHHHB3x', LAYER_VISIBLE_EDITABLE, 0, 0, 0, 0, 0, 255) + _string(name)
+    return _chunk(CHUNK_LAYER, body)
+
+
+def _cel_chunk(pixels: bytes, width: int, height: int) -> bytes:
+    # Layer index, x, y, opacity, cel type, z-index, reserved, size, data
+    body = struct.pack('<HhhBHh5xHH', 0, 0, 0, 255, CEL_COMPRESSED_IMAGE, 0, width, height)
+    return _chunk(CHUNK_CEL, body + zlib.compress(pixels, ZLIB_LEVEL))
+
+
+def _tags_chunk(tags: Sequence[Tag]) -> bytes:
+    body = struct.pack('<H8x', len(tags))
+    for tag in tags:
+        body += struct.pack('<HHBH6xBBBx', tag.first, tag.last, tag.direction, tag.repeat, *tag.color)
+        body += _string(tag.name)
+    return _chunk(CHUNK_TAGS, body)
+
+
+def _frame(chunks: List[bytes], duration: int) -> bytes:
+    size = FRAME_HEADER_SIZE + sum(len(c) for c in chunks)
+    count = len(chunks)
+    # Old 16-bit chunk count (0xFFFF when it overflows), duration, new count
+    header = struct.pack('<IHHH2xI', size, FRAME_MAGIC, min(count, 0xFFFF), duration, count)
+    return header + b''.join(chunks)
+
+
+def encode_sprite(sprite: AsepriteSprite) -> bytes:
+    if not sprite.frames:
+        raise AsepriteFormatError("A sprite needs at least one frame")
+    for tag in sprite.tags:
+        if not 0 <= tag.first <= tag.last < len(sprite.frames):
+            raise AsepriteFormatError(f"Tag {tag.name!r} is outside frames 0-{len(sprite.frames) - 1}")
+
+    frames = []
+    for index, rgba in enumerate(sprite.frames):
+        pixels = _pixels(rgba, sprite.width, sprite.height)
+        chunks = []
+        if index == 0:
+            chunks += [_color_profile_chunk(), _palette_chunk(sprite.palette), _layer_chunk(sprite.layer_name)]
+        chunks.append(_cel_chunk(pixels, sprite.width, sprite.height))
+        if index == 0 and sprite.tags:
+            chunks.append(_tags_chunk(sprite.tags))
+        duration = sprite.durations[index] if index < len(sprite.durations) else DEFAULT_FRAME_DURATION
+        frames.append(_frame(chunks, duration))
+
+    body = b''.join(frames)
+    color_count = 256 if sprite.palette is None else len(sprite.palette)
+    # File size, magic, frames, size, depth, flags, speed (deprecated),
+    # 2 zero DWORDs, transparent index, 3 ignored bytes, color count,
+    # pixel ratio, grid x/y/width/height, reserved
+    header = struct.pack(
+        '<IHHHHHIHIIB3xHBBhhHH84x',
+        HEADER_SIZE + len(body), HEADER_MAGIC, len(sprite.frames), sprite.width, sprite.height,
+        COLOR_DEPTH_RGBA, HEADER_FLAG_LAYER_OPACITY, DEFAULT_FRAME_DURATION, 0, 0, 0,
+        color_count, 1, 1, 0, 0, 16, 16,
+    )
+    return header + body
+
+
+def encode_aseprite(rgba, width: int, height: int, palette: Optional[Sequence[RGBA]] = None,
+                    tags: Sequence[Tag] = ()) -> bytes:
+    """
+    Encode RGBA pixels as a one-layer .aseprite file. rgba is one frame, or a
+    list of frames for an animation (tags then name frame ranges).
+    """
+    frames = list(rgba) if isinstance(rgba, (list, tuple)) else [rgba]
+    sprite = AsepriteSprite(width, height, frames,
+                            palette=list(palette) if palette is not None else None, tags=list(tags))
+    return encode_sprite(sprite)
+
+
+def write_aseprite(path, rgba, width: int, height: int, palette: Optional[Sequence[RGBA]] = None,
+                   tags: Sequence[Tag] = ()) -> None:
+    # Replace rather than overwrite: path may be a hardlink into the asset store
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(encode_aseprite(rgba, width, height, palette, tags))
+    os.replace(tmp_path, path)
+
+
+def _read_string(data: bytes, offset: int) -> Tuple[str, int]:
+    (length,) = struct.unpack_from('<H', data, offset)
+    start = offset + 2
+    return data[start:start + length].decode('utf-8'), start + length
+
+
+def decode_sprite(data: bytes) -> AsepriteSprite:
+    """
+    Decode an RGBA .aseprite file into the frames of its first layer
+    (layer index 0; other layers are ignored). Raw and compressed cels are supported, placed at their cel
+    position on a transparent canvas; linked cels reuse the linked frame.
+    """
+    if len(data) < HEADER_SIZE:
+        raise AsepriteFormatError("File is too short for an .aseprite header")
+    _, magic, frame_count, width, height, depth = struct.unpack_from('<IHHHHH', data, 0)
+    if magic != HEADER_MAGIC:
+        raise AsepriteFormatError("Not an .aseprite file (bad header magic)")
+    if depth != COLOR_DEPTH_RGBA:
+        raise AsepriteFormatError(f"Only RGBA sprites are supported (color depth {depth})")
+
+    sprite = AsepriteSprite(width, height)
+    offset = HEADER_SIZE
+    layer_name = None
+    for _ in range(frame_count):
+        frame_size, frame_magic, old_count, duration, new_count = struct.unpack_from('<IHHH2xI', data, offset)
+        if frame_magic != FRAME_MAGIC:
+            raise AsepriteFormatError(f"Bad frame magic at byte {offset}")
+        canvas = bytearray(width * height * 4)
+        chunk_offset = offset + FRAME_HEADER_SIZE
+        for _ in range(new_count or old_count):
+            chunk_size, chunk_type = struct.unpack_from('<IH', data, chunk_offset)
+            body = data[chunk_offset + CHUNK_HEADER_SIZE:chunk_offset + chunk_size]
+            if chunk_type == CHUNK_LAYER and layer_name is None:
+                layer_name, _ = _read_string(body, 16)
+            elif chunk_type == CHUNK_CEL:
+                layer, x, y, _, cel_type = struct.unpack_from('<HhhBH', body, 0)
+                if layer == 0:
+                    _place_cel(canvas, sprite, body, x, y, cel_type)
+            elif chunk_type == CHUNK_PALETTE:
+                size, first, last = struct.unpack_from('<III', body, 0)
+                palette = list(sprite.palette or [(0, 0, 0, 255)] * size)
+                palette.extend([(0, 0, 0, 255)] * (size - len(palette)))
+                entry = 20
+                for i in range(first, last + 1):
+                    flags, r, g, b, a = struct.unpack_from('<HBBBB', body, entry)
+                    palette[i] = (r, g, b, a)
+                    entry += 6
+                    if flags & 1:
+                        _, entry = _read_string(body, entry)
+                sprite.palette = palette
+            elif chunk_type == CHUNK_TAGS:
+                (tag_count,) = struct.unpack_from('<H', body, 0)
+                entry = 10
+                for _ in range(tag_count):
+                    first, last, direction, repeat, r, g, b = struct.unpack_from('<HHBH6xBBBx', body, entry)
+                    name, entry = _read_string(body, entry + 17)
+                    sprite.tags.append(Tag(name, first, last, direction, repeat, (r, g, b)))
+            chunk_offset += chunk_size
+        sprite.frames.append(bytes(canvas))
+        sprite.durations.append(duration)
+        offset += frame_size
+    sprite.layer_name = layer_name or DEFAULT_LAYER_NAME
+    return sprite
+
+
+def _place_cel(canvas: bytearray, sprite: AsepriteSprite, body: bytes, x: int, y: int, cel_type: int) -> None:
+    if cel_type == 1:
+        # Linked cel: same pixels as an earlier frame
+        (linked,) = struct.unpack_from('<H', body, 16)
+        canvas[:] = sprite.frames[linked]
+        return
+    cel_width, cel_height = struct.unpack_from('<HH', body, 16)
+    if cel_type == 0:
+        pixels = body[20:20 + cel_width * cel_height * 4]
+    elif cel_type == CEL_COMPRESSED_IMAGE:
+        pixels = zlib.decompress(body[20:])
+    else:
+        # Tilemap cels are not produced by any of our converters
+        raise AsepriteFormatError(f"Unsupported cel type {cel_type}")
+    width, height = sprite.width, sprite.height
+    for row in range(cel_height):
+        ty = y + row
+        if not 0 <= ty < height:
+            continue
+        left, right = max(0, x), min(width, x + cel_width)
+        if left >= right:
+            continue
+        src = (row * cel_width + (left - x)) * 4
+        dst = (ty * width + left) * 4
+        canvas[dst:dst + (right - left) * 4] = pixels[src:src + (right - left) * 4]
+
+
+def read_aseprite(path) -> AsepriteSprite:
+    return decode_sprite(Path(path).read_bytes())
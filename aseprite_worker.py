@@ -0,0 +1,298 @@
+"""
+Client for aseprite-worker.lua, a persistent Aseprite conversion process.
+
+Each AsepriteWorker starts `aseprite -b --script aseprite-worker.lua` once and
+feeds it jobs through a named pipe (see the protocol in aseprite-worker.lua);
+results come back on the process' stdout. WorkerPool keeps one worker per
+concurrent job slot and is used as the JobScheduler runner, so a batch of
+items pays for Aseprite startup and metadata parsing once per worker instead
+of twice per view directory. Jobs that carry their SVG documents in memory
+are streamed to the worker over the same pipe (SVG command), so no temp
+files are written or read.
+"""
+import errno
+import itertools
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from queue import Queue
+from typing import List, Optional
+
+from conversion_jobs import ConversionJob, JobResult
+
+WORKER_SCRIPT = 'aseprite-worker.lua'
+RESULT_PREFIX = '@@RESULT'
+MAC_ASEPRITE = '/Applications/Aseprite.app/Contents/MacOS/aseprite'
+
+
+class WorkerError(RuntimeError):
+    pass
+
+
+def find_aseprite() -> Optional[str]:
+    """Same lookup as batch-process.sh, with ASEPRITE_BIN taking precedence"""
+    candidates = [os.environ.get('ASEPRITE_BIN'), shutil.which('aseprite'), MAC_ASEPRITE]
+    for candidate in candidates:
+        if candidate and Path(candidate).exists():
+            return candidate
+    return None
+
+
+class AsepriteWorker:
+    """One persistent Aseprite process converting SVG files one at a time"""
+
+    def __init__(self, aseprite: Optional[str] = None, script: str = WORKER_SCRIPT,
+                 log_file: Optional[Path] = None, start_timeout: float = 60.0):
+        self.aseprite = aseprite or find_aseprite()
+        self.script = script
+        self.log_file = log_file
+        self.start_timeout = start_timeout
+        self.proc = None
+        self.queue = None
+        self._tmp_dir = None
+        self._ids = itertools.count(1)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._reader = None
+        # Last lines of worker output, for error messages
+        self.tail = deque(maxlen=20)
+
+    @property
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
+
+    def start(self) -> None:
+        if self.aseprite is None:
+            raise WorkerError("Aseprite CLI not found. Please ensure Aseprite is installed or set ASEPRITE_BIN.")
+
+        self.tail.clear()
+        self._tmp_dir = Path(tempfile.mkdtemp(prefix='aseprite-worker-'))
+        queue_path = self._tmp_dir / 'queue.fifo'
+        os.mkfifo(queue_path)
+
+        env = os.environ.copy()
+        env['WORKER_QUEUE'] = str(queue_path)
+        if self.log_file is not None:
+            env['BATCH_LOG_FILE'] = str(self.log_file)
+
+        self.proc = subprocess.Popen(
+            [self.aseprite, '-b', '--script', self.script],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+            env=env,
+        )
+        self._reader = threading.Thread(target=self._read_results, daemon=True)
+        self._reader.start()
+        self.queue = self._open_queue(queue_path)
+
+    def _open_queue(self, queue_path: Path):
+        # A non-blocking open fails with ENXIO until the worker opens its end,
+        # which lets us notice a worker that died during startup.
+        deadline = time.monotonic() + self.start_timeout
+        while True:
+            try:
+                fd = os.open(queue_path, os.O_WRONLY | os.O_NONBLOCK)
+                break
+            except OSError as e:
+                if e.errno != errno.ENXIO:
+                    raise
+            if not self.alive:
+                raise WorkerError(f"Aseprite worker exited during startup: {self._tail_text()}")
+            if time.monotonic() > deadline:
+                self.proc.kill()
+                raise WorkerError("Timed out waiting for the Aseprite worker to start")
+            time.sleep(0.05)
+        os.set_blocking(fd, True)
+        return os.fdopen(fd, 'w', buffering=1, encoding='utf-8')
+
+    def _read_results(self) -> None:
+        for line in self.proc.stdout:
+            line = line.rstrip('\n')
+            if not line.startswith(RESULT_PREFIX + '\t'):
+                self.tail.append(line)
+                continue
+            fields = line.split('\t')
+            job_id = fields[1] if len(fields) > 1 else ''
+            with self._lock:
+                waiter = self._pending.pop(job_id, None)
+            if waiter is not None:
+                waiter['fields'] = fields[2:]
+                waiter['event'].set()
+
+        # Worker exited: fail everything still waiting
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        for waiter in pending.values():
+            waiter['event'].set()
+
+    def _tail_text(self) -> str:
+        return '\n'.join(self.tail)
+
+    def convert(self, input_svg: Path, output_path: Path, view_idx: int, target_size: int = 64,
+                content: Optional[str] = None):
+        """
+        Convert one SVG; returns (ok, message), message set when skipped or
+        failed. With content, input_svg is only the document's file name and
+        the SVG text is sent through the queue instead of read from disk.
+        """
+        if not self.alive:
+            self.close()
+            self.start()
+
+        job_id = str(next(self._ids))
+        waiter = {'event': threading.Event(), 'fields': None}
+        with self._lock:
+            self._pending[job_id] = waiter
+
+        if content is None:
+            fields = ['JOB', job_id, str(input_svg), str(output_path), str(view_idx), str(target_size)]
+            message = '\t'.join(fields) + '\n'
+        else:
+            # The length is in bytes: the worker reads the document with read(n)
+            fields = ['SVG', job_id, str(input_svg), str(output_path), str(view_idx), str(target_size),
+                      str(len(content.encode('utf-8')))]
+            message = '\t'.join(fields) + '\n' + content + '\n'
+        try:
+            with self._write_lock:
+                self.queue.write(message)
+        except OSError as e:
+            with self._lock:
+                self._pending.pop(job_id, None)
+            return False, f"Could not submit job to Aseprite worker: {e}"
+
+        # The reader thread releases every waiter when the worker exits
+        while not waiter['event'].wait(1.0):
+            if self._reader is None or not self._reader.is_alive():
+                break
+        fields = waiter['fields']
+        if fields is None:
+            return False, f"Aseprite worker exited (code {self.proc.poll()}):\n{self._tail_text()}"
+        if fields[0] == 'OK':
+            return True, ''
+        if fields[0] == 'SKIP':
+            return True, fields[1] if len(fields) > 1 else 'skipped'
+        return False, fields[1] if len(fields) > 1 else 'Conversion failed'
+
+    def close(self) -> None:
+        if self.queue is not None:
+            try:
+                self.queue.write('QUIT\n')
+                self.queue.close()
+            except OSError:
+                pass
+            self.queue = None
+        if self.proc is not None:
+            try:
+                self.proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
+        if self._reader is not None:
+            self._reader.join(timeout=5)
+            self._reader = None
+        if self._tmp_dir is not None:
+            shutil.rmtree(self._tmp_dir, ignore_errors=True)
+            self._tmp_dir = None
+
+
+class WorkerPool:
+    """
+    Pool of persistent workers, started lazily (at most one per job slot).
+
+    run_job() has the JobScheduler runner signature: it converts every SVG of
+    a view (directory or in-memory documents) on one idle worker, writing <svg stem>.aseprite into the
+    job's output directory (no view-suffix rename needed). Each file is saved
+    under a temporary name and replaces the output, never written in place.
+    """
+
+    def __init__(self, size: int = 1, aseprite: Optional[str] = None,
+                 target_size: int = 64, log_dir: Path = Path('.')):
+        self.size = max(1, size)
+        self.aseprite = aseprite
+        self.target_size = target_size
+        self.log_dir = Path(log_dir)
+        self._idle = Queue()
+        self._workers: List[AsepriteWorker] = []
+        self._lock = threading.Lock()
+
+    def _acquire(self) -> AsepriteWorker:
+        with self._lock:
+            if self._idle.empty() and len(self._workers) < self.size:
+                if self.size == 1:
+                    log_file = self.log_dir / 'batch_import_log.txt'
+                else:
+                    log_file = self.log_dir / f'batch_import_log_worker{len(self._workers) + 1}.txt'
+                worker = AsepriteWorker(self.aseprite, log_file=log_file)
+                self._workers.append(worker)
+                return worker
+        return self._idle.get()
+
+    def run_job(self, job: ConversionJob) -> JobResult:
+        worker = self._acquire()
+        start = time.perf_counter()
+        timings = {}
+        invocations = []
+        try:
+            if not worker.alive:
+                worker.start()
+                timings['worker_start'] = time.perf_counter() - start
+            job.output_dir.mkdir(parents=True, exist_ok=True)
+            errors = []
+            converted = []
+            convert_start = time.perf_counter()
+            documents = dict(job.documents or ())
+            for name in job.svg_names():
+                output_path = job.output_dir / f"{Path(name).stem}.aseprite"
+                # Saved next to the output and moved into place: the output may be
+                # a hardlink into the asset store, which an in-place save would change
+                tmp_path = output_path.with_name(
+                    f".{output_path.stem}.{os.getpid()}.{threading.get_ident()}.aseprite")
+                request_start = time.perf_counter()
+                try:
+                    if job.documents is not None:
+                        ok, message = worker.convert(name, tmp_path, job.view_idx, self.target_size,
+                                                     content=documents[name])
+                    else:
+                        ok, message = worker.convert(job.input_dir / name, tmp_path, job.view_idx,
+                                                     self.target_size)
+                    if ok and not message and tmp_path.exists():
+                        os.replace(tmp_path, output_path)
+                finally:
+                    if tmp_path.exists():
+                        tmp_path.unlink()
+                status = 'ERR' if not ok else ('SKIP' if message else 'OK')
+                invocations.append({'command': 'aseprite-worker', 'input': name, 'status': status,
+                                    'seconds': round(time.perf_counter() - request_start, 6)})
+                if ok and message:
+                    converted.append(f"Skipped {name}: {message}")
+                elif ok:
+                    converted.append(f"Converted {output_path.name}")
+                else:
+                    errors.append(f"{name}: {message}")
+            timings['convert'] = time.perf_counter() - convert_start
+        except (OSError, WorkerError) as e:
+            return JobResult(job, False, -1, time.perf_counter() - start, stderr=str(e),
+                             timings=timings, invocations=invocations)
+        finally:
+            self._idle.put(worker)
+
+        elapsed = time.perf_counter() - start
+        stdout = '\n'.join(converted)
+        if errors:
+            return JobResult(job, False, 1, elapsed, stdout, '\n'.join(errors),
+                             timings=timings, invocations=invocations)
+        return JobResult(job, True, 0, elapsed, stdout, timings=timings, invocations=invocations)
+
+    def close(self) -> None:
+        for worker in self._workers:
+            worker.close()
+        self._workers = []
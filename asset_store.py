@@ -0,0 +1,169 @@
+"""
+Content-addressed store for generated assets.
+
+Batch runs write many byte-identical files: an eye shape rendered for two
+collaterals with the same primary color, a rarity variant whose eye color
+equals the collateral's, the same body part under every collateral folder.
+AssetStore.put() hashes each artifact as it is written, keeps one blob per
+distinct content under <output>/.store/blobs/ and hardlinks the logical
+path to it, so a duplicate never takes disk space and needs no cleanup pass
+(the job of the cleanup-*-duplicates.js scripts). Every put is appended to
+<output>/.store/index.jsonl (logical path -> blob); appends are single
+writes, so worker processes can share one store.
+
+Where hardlinks are not available (another filesystem, no permission) the
+file is copied instead and only the index records the duplicate.
+
+Hardlinked files share their bytes: detach() a file before editing it in
+place, or the edit shows up in every file with the same content.
+
+    store = AssetStore(Path('output/.store'))
+    store.put(Path('output/amDAI/body_00_amDAI.aseprite'), data)
+"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, Tuple
+
+DEFAULT_STORE = Path('output/.store')
+
+
+def hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _tmp_path(path: Path) -> Path:
+    # Unique per process and thread, next to path (same filesystem)
+    return path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+class AssetStore:
+    def __init__(self, root: Path = DEFAULT_STORE):
+        self.root = Path(root)
+        self.blobs = self.root / 'blobs'
+        self.index_path = self.root / 'index.jsonl'
+
+    def blob_path(self, digest: str, suffix: str = '') -> Path:
+        return self.blobs / digest[:2] / f"{digest}{suffix}"
+
+    def put(self, path: Path, data: bytes) -> str:
+        """Write data to path through the store; returns the content hash"""
+        path = Path(path)
+        digest = hash_bytes(data)
+        blob = self.blob_path(digest, path.suffix)
+        if not blob.exists():
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            tmp_blob = _tmp_path(blob)
+            tmp_blob.write_bytes(data)
+            os.replace(tmp_blob, blob)
+        self.link(blob, path)
+        self._append_index(path, digest)
+        return digest
+
+    def put_file(self, path: Path) -> Tuple[str, bool]:
+        """
+        Move an existing file into the store (it becomes a link to its blob).
+        Returns (content hash, True when the content was already stored).
+        """
+        path = Path(path)
+        data = path.read_bytes()
+        digest = hash_bytes(data)
+        blob = self.blob_path(digest, path.suffix)
+        existed = blob.exists()
+        if existed and os.path.samefile(blob, path):
+            return digest, True
+        if not existed:
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(path, blob)
+            except FileExistsError:
+                # Stored concurrently by another writer
+                existed = True
+            except OSError:
+                tmp_blob = _tmp_path(blob)
+                shutil.copyfile(path, tmp_blob)
+                os.replace(tmp_blob, blob)
+        if existed:
+            self.link(blob, path)
+        self._append_index(path, digest)
+        return digest, existed
+
+    @staticmethod
+    def link(blob: Path, path: Path) -> None:
+        """Point path at blob (hardlink, or a copy where links fail), atomically"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists() and os.path.samefile(blob, path):
+            return
+        tmp_path = _tmp_path(path)
+        try:
+            os.link(blob, tmp_path)
+        except OSError:
+            shutil.copyfile(blob, tmp_path)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def detach(path: Path) -> None:
+        """Replace a linked file with a private copy of its content"""
+        path = Path(path)
+        if path.stat().st_nlink <= 1:
+            return
+        tmp_path = _tmp_path(path)
+        shutil.copyfile(path, tmp_path)
+        os.replace(tmp_path, path)
+
+    def _append_index(self, path: Path, digest: str) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        line = json.dumps({'path': Path(path).as_posix(), 'blob': digest}) + '\n'
+        # O_APPEND: one write per line, safe across processes
+        fd = os.open(self.index_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line.encode())
+        finally:
+            os.close(fd)
+
+    def index(self) -> Dict[str, str]:
+        """Logical path -> blob hash, last put wins"""
+        entries = {}
+        if self.index_path.exists():
+            with open(self.index_path, 'r') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    entries[entry['path']] = entry['blob']
+        return entries
+
+    def iter_blobs(self) -> Iterator[Path]:
+        if self.blobs.exists():
+            yield from (p for p in self.blobs.glob('*/*') if not p.name.startswith('.'))
+
+    def gc(self) -> int:
+        """Delete blobs no logical file links to any more; returns the count"""
+        removed = 0
+        referenced = {digest for path, digest in self.index().items() if Path(path).exists()}
+        for blob in self.iter_blobs():
+            digest = blob.name.split('.', 1)[0]
+            if blob.stat().st_nlink <= 1 and digest not in referenced:
+                blob.unlink()
+                removed += 1
+        return removed
+
+    def writer(self, encode: Callable[..., bytes]) -> Callable:
+        """A write_png/write_aseprite style function (path, *args) that goes through the store"""
+        def write(path, *args, **kwargs) -> None:
+            self.put(Path(path), encode(*args, **kwargs))
+        return write
+
+
+def iter_files(root: Path, suffixes: Iterable[str]) -> Iterator[Path]:
+    """Files under root with one of the suffixes, skipping the store itself"""
+    suffixes = tuple(suffixes)
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d != '.store')
+        for name in sorted(filenames):
+            if name.endswith(suffixes):
+                yield Path(dirpath) / name
@@ -1,10 +1,12 @@
 -- Batch All Collaterals Converter V2
 -- Modified: Body = body only, Mouth = mouth + cheek
+-- Each part is rasterized once and recolored per collateral
 
 -- Load modules
 local SVGParser = dofile("svg-parser.lua")
 local SVGRenderer = dofile("svg-renderer-professional.lua")
 local CollateralColorsLoader = dofile("collateral-colors-loader.lua")
+local PaletteSwap = dofile("collateral-palette-swap.lua")
 
 -- Helper function to extract SVG strings from JSON array
 local function extractSVGStrings(arrayContent)
@@ -128,52 +130,100 @@ local function addCheekToMouth(mouthSVG)
     return mouthWithCheek
 end
 
--- Apply collateral color replacement
-local function applyCollateralColors(svgString, collateral)
-    local processedSVG = svgString
-    
-    -- Apply color replacement with proper regex escaping
-    processedSVG = processedSVG:gsub('class="gotchi%-primary"', 'fill="' .. collateral.primaryColor .. '"')
-    processedSVG = processedSVG:gsub('class="gotchi%-secondary"', 'fill="' .. collateral.secondaryColor .. '"')
-    processedSVG = processedSVG:gsub('class="gotchi%-cheek"', 'fill="' .. collateral.cheekColor .. '"')
-    processedSVG = processedSVG:gsub('class="gotchi%-primary%-mouth"', 'fill="' .. collateral.primaryColor .. '"')
-    processedSVG = processedSVG:gsub('class="gotchi%-eyeColor"', 'fill="' .. collateral.primaryColor .. '"')
-    
-    return processedSVG
+local function wrapSVG(svgString)
+    return string.format([[<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 64 64">%s</svg>]], svgString)
 end
 
--- Process a single SVG part
-local function processSVGPart(partType, partIndex, svgString, collateral, outputDir)
-    local baseName = string.format("%s_%02d_%s", partType, partIndex, collateral.name)
-    
-    print("  Processing: " .. baseName)
-    
-    -- Apply collateral colors
-    local coloredSVG = applyCollateralColors(svgString, collateral)
-    
-    -- Wrap in proper SVG structure
-    local wrappedSVG = string.format([[<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 64 64">%s</svg>]], coloredSVG)
-    
-    -- Parse SVG
-    local svgData = SVGParser.parse(wrappedSVG)
+-- Parts of every collateral: output name prefix, SVG fragment and wrapper
+local function collectParts(templates)
+    local parts = {}
+
+    -- Body part (BODY ONLY - no cheek, no mouth)
+    if templates.body and #templates.body > 0 then
+        table.insert(parts, {prefix = "body_00", svg = extractBodyOnly(templates.body[1]), wrap = wrapSVG})
+    end
+
+    -- Hands poses using proven pattern matching
+    if templates.hands and #templates.hands > 0 then
+        local handsSVG = templates.hands[1]
+        local poses = {
+            {name = "down_open", class = "handsDownOpen", pattern = '<g class="gotchi%-handsDownOpen">(.-)</g><g class="gotchi%-handsUp">'},
+            {name = "down_closed", class = "handsDownClosed", pattern = '<g class="gotchi%-handsDownClosed">(.-)</g><g class="gotchi%-handsDownOpen">'},
+            {name = "up", class = "handsUp", pattern = '<g class="gotchi%-handsUp">(.-)</g>$'}
+        }
+        for _, pose in ipairs(poses) do
+            -- Extract the complete pose group
+            local poseGroup = handsSVG:match(pose.pattern)
+            if not poseGroup or poseGroup == "" then
+                print("ERROR: Could not extract pose group for: " .. pose.name)
+            else
+                table.insert(parts, {
+                    prefix = "hands_" .. pose.name,
+                    svg = poseGroup,
+                    wrap = function(coloredPose)
+                        return string.format([[<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 64 64"><g class="gotchi-%s">%s</g></svg>]],
+                            pose.class, coloredPose)
+                    end
+                })
+            end
+        end
+    end
+
+    -- Mouth parts (MOUTH + CHEEK)
+    for _, mouth in ipairs({"mouth_neutral", "mouth_happy"}) do
+        if templates[mouth] and #templates[mouth] > 0 then
+            table.insert(parts, {prefix = mouth .. "_00", svg = addCheekToMouth(templates[mouth][1]), wrap = wrapSVG})
+        end
+    end
+
+    -- Shadow parts
+    if templates.shadow then
+        for i, shadowSVG in ipairs(templates.shadow) do
+            table.insert(parts, {prefix = string.format("shadow_%02d", i - 1), svg = shadowSVG, wrap = wrapSVG})
+        end
+    end
+
+    return parts
+end
+
+-- Rasterize every part once into a color-slot mask (see collateral-palette-swap.lua)
+local function rasterizeParts(parts)
+    for _, part in ipairs(parts) do
+        local mask, err = PaletteSwap.rasterize(part.svg, part.wrap, 64, 64)
+        part.mask = mask
+        if mask then
+            print("  Rasterized " .. part.prefix .. " (" .. #mask.pixels .. " pixels)")
+        else
+            print("  " .. part.prefix .. ": " .. err .. ", rendering it per collateral")
+        end
+    end
+end
+
+-- Pixels of a part in collateral colors: recolored mask, or a full render
+-- when the part could not be masked
+local function partPixels(part, collateral)
+    if part.mask then
+        return PaletteSwap.recolor(part.mask, collateral)
+    end
+    local coloredSVG = PaletteSwap.applyColors(part.svg, PaletteSwap.collateralColors(collateral))
+    local svgData = SVGParser.parse(part.wrap(coloredSVG))
     if not svgData or not svgData.viewBox then
-        print("    ERROR: Could not parse SVG: " .. baseName)
-        return false
+        return nil, "Could not parse SVG"
     end
-    
-    -- Render SVG to pixels
     local renderResult = SVGRenderer.render(svgData, 64, 64)
     if not renderResult or not renderResult.pixels or #renderResult.pixels == 0 then
-        print("    ERROR: No pixels rendered from SVG: " .. baseName)
-        return false
+        return nil, "No pixels rendered from SVG"
     end
-    
-    -- Create 64x64 sprite
+    return renderResult.pixels
+end
+
+-- Draw pixels on a transparent 64x64 sprite and save it
+local function saveSprite(pixels, outputPath)
     local sprite = Sprite(64, 64, ColorMode.RGB)
     local layer = sprite.layers[1]
     local cel = sprite:newCel(layer, 1)
     local image = cel.image
-    
+
     -- Clear canvas to transparent
     app.transaction(function()
         for y = 0, 63 do
@@ -182,11 +232,11 @@ local function processSVGPart(partType, partIndex, svgString, collateral, output
             end
         end
     end)
-    
+
     -- Draw SVG pixels
     local pixelsPlaced = 0
     app.transaction(function()
-        for _, pixel in ipairs(renderResult.pixels) do
+        for _, pixel in ipairs(pixels) do
             if pixel.x >= 0 and pixel.x < 64 and pixel.y >= 0 and pixel.y < 64 then
                 local color = Color{r = pixel.color.r, g = pixel.color.g, b = pixel.color.b}
                 image:drawPixel(pixel.x, pixel.y, color)
@@ -194,213 +244,47 @@ local function processSVGPart(partType, partIndex, svgString, collateral, output
             end
         end
     end)
-    
+
     -- Save as Aseprite file
-    local outputPath = outputDir .. "/" .. baseName .. ".aseprite"
     app.command.SaveFileAs{
         ui = false,
         filename = outputPath
     }
-    
-    sprite:close()
-    
-    print("    Saved: " .. outputPath .. " (" .. pixelsPlaced .. " pixels)")
-    
-    return true, pixelsPlaced
-end
 
--- Process hands poses using proven extraction method
-local function processHandsPoses(handsSVG, collateral, outputDir)
-    local successCount = 0
-    local totalPixels = 0
-    
-    -- Process each pose using proven pattern matching
-    local poses = {
-        {name = "down_open", pattern = '<g class="gotchi%-handsDownOpen">(.-)</g><g class="gotchi%-handsUp">'},
-        {name = "down_closed", pattern = '<g class="gotchi%-handsDownClosed">(.-)</g><g class="gotchi%-handsDownOpen">'},
-        {name = "up", pattern = '<g class="gotchi%-handsUp">(.-)</g>$'}
-    }
-    
-    for _, pose in ipairs(poses) do
-        print("  Processing hands_" .. pose.name .. "_" .. collateral.name)
-        
-        -- Extract the complete pose group
-        local poseGroup = handsSVG:match(pose.pattern)
-        
-        if not poseGroup or poseGroup == "" then
-            print("    ERROR: Could not extract pose group for: " .. pose.name)
-        else
-            -- Apply collateral colors to the extracted pose group
-            local coloredPose = applyCollateralColors(poseGroup, collateral)
-            
-            -- Wrap in proper SVG structure
-            local wrappedSVG = string.format([[<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 64 64"><g class="gotchi-%s">%s</g></svg>]], 
-                pose.name == "down_open" and "handsDownOpen" or 
-                pose.name == "down_closed" and "handsDownClosed" or "handsUp", 
-                coloredPose)
-            
-            -- Parse and render
-            local svgData = SVGParser.parse(wrappedSVG)
-            if svgData and svgData.viewBox then
-                local renderResult = SVGRenderer.render(svgData, 64, 64)
-                if renderResult and renderResult.pixels and #renderResult.pixels > 0 then
-                    -- Create sprite
-                    local sprite = Sprite(64, 64, ColorMode.RGB)
-                    local layer = sprite.layers[1]
-                    local cel = sprite:newCel(layer, 1)
-                    local image = cel.image
-                    
-                    -- Clear canvas
-                    app.transaction(function()
-                        for y = 0, 63 do
-                            for x = 0, 63 do
-                                image:drawPixel(x, y, Color{r = 0, g = 0, b = 0, a = 0})
-                            end
-                        end
-                    end)
-                    
-                    -- Draw pixels
-                    local pixelsPlaced = 0
-                    app.transaction(function()
-                        for _, pixel in ipairs(renderResult.pixels) do
-                            if pixel.x >= 0 and pixel.x < 64 and pixel.y >= 0 and pixel.y < 64 then
-                                local color = Color{r = pixel.color.r, g = pixel.color.g, b = pixel.color.b}
-                                image:drawPixel(pixel.x, pixel.y, color)
-                                pixelsPlaced = pixelsPlaced + 1
-                            end
-                        end
-                    end)
-                    
-                    -- Save file
-                    local outputPath = outputDir .. "/hands_" .. pose.name .. "_" .. collateral.name .. ".aseprite"
-                    app.command.SaveFileAs{
-                        ui = false,
-                        filename = outputPath
-                    }
-                    
-                    sprite:close()
-                    
-                    print("    Saved: " .. outputPath .. " (" .. pixelsPlaced .. " pixels)")
-                    successCount = successCount + 1
-                    totalPixels = totalPixels + pixelsPlaced
-                else
-                    print("    ERROR: No pixels rendered for " .. pose.name)
-                end
-            else
-                print("    ERROR: Could not parse SVG for " .. pose.name)
-            end
-        end
-    end
-    
-    return successCount, totalPixels
+    sprite:close()
+    return pixelsPlaced
 end
 
 -- Process a single collateral
-local function processCollateral(collateral, templates)
+local function processCollateral(collateral, parts)
     print("Processing collateral: " .. collateral.name)
     print("  Colors: " .. collateral.primaryColor .. " / " .. collateral.secondaryColor .. " / " .. collateral.cheekColor)
-    
+
     -- Create output directory
     local outputDir = "output/" .. collateral.name
     os.execute("mkdir -p " .. outputDir)
-    
+
     local successCount = 0
     local totalPixels = 0
-    
-    -- Process body part (BODY ONLY - no cheek, no mouth)
-    print("  === Body Part (Body Only) ===")
-    if templates.body and #templates.body > 0 then
-        local bodyOnly = extractBodyOnly(templates.body[1])
-        local coloredBody = applyCollateralColors(bodyOnly, collateral)
-        local wrappedSVG = string.format([[<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 64 64">%s</svg>]], coloredBody)
-        
-        -- Parse and render
-        local svgData = SVGParser.parse(wrappedSVG)
-        if svgData and svgData.viewBox then
-            local renderResult = SVGRenderer.render(svgData, 64, 64)
-            if renderResult and renderResult.pixels and #renderResult.pixels > 0 then
-                local sprite = Sprite(64, 64, ColorMode.RGB)
-                local layer = sprite.layers[1]
-                local cel = sprite:newCel(layer, 1)
-                local image = cel.image
-                
-                app.transaction(function()
-                    for y = 0, 63 do
-                        for x = 0, 63 do
-                            image:drawPixel(x, y, Color{r = 0, g = 0, b = 0, a = 0})
-                        end
-                    end
-                end)
-                
-                local pixelsPlaced = 0
-                app.transaction(function()
-                    for _, pixel in ipairs(renderResult.pixels) do
-                        if pixel.x >= 0 and pixel.x < 64 and pixel.y >= 0 and pixel.y < 64 then
-                            local color = Color{r = pixel.color.r, g = pixel.color.g, b = pixel.color.b}
-                            image:drawPixel(pixel.x, pixel.y, color)
-                            pixelsPlaced = pixelsPlaced + 1
-                        end
-                    end
-                end)
-                
-                local outputPath = outputDir .. "/body_00_" .. collateral.name .. ".aseprite"
-                app.command.SaveFileAs{
-                    ui = false,
-                    filename = outputPath
-                }
-                
-                sprite:close()
-                
-                print("    Saved: " .. outputPath .. " (" .. pixelsPlaced .. " pixels)")
-                successCount = successCount + 1
-                totalPixels = totalPixels + pixelsPlaced
-            end
-        end
-    end
-    
-    -- Process hands parts using pose extraction
-    print("  === Hands Parts ===")
-    if templates.hands and #templates.hands > 0 then
-        local handsSuccess, handsPixels = processHandsPoses(templates.hands[1], collateral, outputDir)
-        successCount = successCount + handsSuccess
-        totalPixels = totalPixels + handsPixels
-    end
-    
-    -- Process mouth parts (MOUTH + CHEEK)
-    print("  === Mouth Parts (Mouth + Cheek) ===")
-    if templates.mouth_neutral and #templates.mouth_neutral > 0 then
-        local mouthWithCheek = addCheekToMouth(templates.mouth_neutral[1])
-        local success, pixelsPlaced = processSVGPart("mouth_neutral", 0, mouthWithCheek, collateral, outputDir)
-        if success then
-            successCount = successCount + 1
-            totalPixels = totalPixels + pixelsPlaced
-        end
-    end
-    
-    if templates.mouth_happy and #templates.mouth_happy > 0 then
-        local mouthWithCheek = addCheekToMouth(templates.mouth_happy[1])
-        local success, pixelsPlaced = processSVGPart("mouth_happy", 0, mouthWithCheek, collateral, outputDir)
-        if success then
+
+    for _, part in ipairs(parts) do
+        local baseName = part.prefix .. "_" .. collateral.name
+        print("  Processing: " .. baseName)
+        local pixels, err = partPixels(part, collateral)
+        if not pixels then
+            print("    ERROR: " .. err .. ": " .. baseName)
+        else
+            local outputPath = outputDir .. "/" .. baseName .. ".aseprite"
+            local pixelsPlaced = saveSprite(pixels, outputPath)
+            print("    Saved: " .. outputPath .. " (" .. pixelsPlaced .. " pixels)")
             successCount = successCount + 1
             totalPixels = totalPixels + pixelsPlaced
         end
     end
-    
-    -- Process shadow parts
-    print("  === Shadow Parts ===")
-    if templates.shadow and #templates.shadow > 0 then
-        for i, shadowSVG in ipairs(templates.shadow) do
-            local success, pixelsPlaced = processSVGPart("shadow", i - 1, shadowSVG, collateral, outputDir)
-            if success then
-                successCount = successCount + 1
-                totalPixels = totalPixels + pixelsPlaced
-            end
-        end
-    end
-    
+
     print("  Collateral " .. collateral.name .. " completed: " .. successCount .. " files, " .. totalPixels .. " pixels")
     print("")
-    
+
     return successCount, totalPixels
 end
 
@@ -427,6 +311,10 @@ local function convertAllCollaterals()
     end
     
     print("Loaded SVG templates")
+
+    -- The geometry is the same for every collateral: rasterize each part once
+    local parts = collectParts(templates)
+    rasterizeParts(parts)
     print("")
     
     local totalSuccessCount = 0
@@ -435,7 +323,7 @@ local function convertAllCollaterals()
     
     -- Process each collateral
     for _, collateral in ipairs(allCollaterals) do
-        local successCount, pixelsPlaced = processCollateral(collateral, templates)
+        local successCount, pixelsPlaced = processCollateral(collateral, parts)
         totalSuccessCount = totalSuccessCount + successCount
         totalPixels = totalPixels + pixelsPlaced
         processedCollaterals = processedCollaterals + 1
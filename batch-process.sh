@@ -32,6 +32,9 @@ OUTPUT_DIR=${2:-$DEFAULT_OUTPUT}
 VIEW_INDEX=${3:-$DEFAULT_VIEW}
 TARGET_SIZE=${4:-$DEFAULT_SIZE}
 
+# Log file (override with BATCH_LOG_FILE when running several batches in parallel)
+LOG_FILE=${BATCH_LOG_FILE:-batch_import_log.txt}
+
 # View names for display
 VIEW_NAMES=("front" "left" "right" "back")
 
@@ -64,6 +67,9 @@ show_usage() {
     echo "  view_index   - View index: 0=front, 1=left, 2=right, 3=back (default: 0)"
     echo "  target_size  - Final canvas size (default: 64)"
     echo ""
+    echo "Environment:"
+    echo "  BATCH_LOG_FILE - Log file path (default: batch_import_log.txt)"
+    echo ""
     echo "Examples:"
     echo "  $0 examples output 0        # Process all SVGs in examples/, front view"
     echo "  $0 examples output 1        # Process all SVGs in examples/, left view"
@@ -153,6 +159,7 @@ echo "  Input: $INPUT_PATH"
 echo "  Output: $OUTPUT_DIR"
 echo "  View: $VIEW_INDEX (${VIEW_NAMES[$VIEW_INDEX]})"
 echo "  Target Size: ${TARGET_SIZE}x${TARGET_SIZE}"
+echo "  Log: $LOG_FILE"
 echo ""
 
 # Run the batch processing
@@ -164,6 +171,7 @@ export BATCH_INPUT_PATH="$INPUT_PATH"
 export BATCH_OUTPUT_DIR="$OUTPUT_DIR"
 export BATCH_VIEW_INDEX="$VIEW_INDEX"
 export BATCH_TARGET_SIZE="$TARGET_SIZE"
+export BATCH_LOG_FILE="$LOG_FILE"
 
 # Execute Aseprite with the batch script
 if $ASEPRITE_CMD -b --script batch-svg-importer.lua; then
@@ -171,11 +179,11 @@ if $ASEPRITE_CMD -b --script batch-svg-importer.lua; then
     print_success "Batch processing completed successfully!"
     
     # Show summary if log file exists
-    if [ -f "batch_import_log.txt" ]; then
+    if [ -f "$LOG_FILE" ]; then
         echo ""
         print_info "Processing Summary:"
         echo "-------------------"
-        tail -n 5 batch_import_log.txt | grep -E "(Summary|successful)"
+        tail -n 5 "$LOG_FILE" | grep -E "(Summary|successful)"
     fi
     
     # Show output files
@@ -191,11 +199,11 @@ else
     print_error "Batch processing failed!"
     
     # Show error details if log file exists
-    if [ -f "batch_import_log.txt" ]; then
+    if [ -f "$LOG_FILE" ]; then
         echo ""
         print_error "Error details:"
         echo "--------------"
-        tail -n 10 batch_import_log.txt | grep -E "\[ERROR\]"
+        tail -n 10 "$LOG_FILE" | grep -E "\[ERROR\]"
     fi
     
     exit 1
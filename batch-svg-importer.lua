@@ -2,9 +2,7 @@
 -- Processes multiple SVGs with metadata-driven positioning and saves as .aseprite files
 
 -- Load modules
-local SVGParser = dofile("svg-parser.lua")
-local SVGRenderer = dofile("svg-renderer-professional.lua")
-local JsonMetadataLoader = dofile("json-metadata-loader.lua")
+local SVGFileConverter = dofile("svg-file-converter.lua")
 local config = dofile("batch-config.lua")
 
 -- Global variables for batch processing
@@ -39,12 +37,6 @@ local function logError(message)
     logMessage("ERROR", message)
 end
 
--- Extract wearable ID from filename
-local function extractWearableId(filename)
-    local id = filename:match("^(%d+)_")
-    return id and tonumber(id) or nil
-end
-
 -- Get output filename with view suffix
 local function getOutputFilename(inputFilename, viewIndex)
     local baseName = inputFilename:match("^(.+)%.svg$")
@@ -62,112 +54,9 @@ end
 
 -- Process a single SVG file
 local function processSVGFile(svgPath, outputDir, viewIndex, targetSize)
-    local fileStartTime = os.clock()
-    local filename = app.fs.fileName(svgPath)
-    
-    logInfo("Processing: " .. filename)
-    
-    -- Extract wearable ID
-    local wearableId = extractWearableId(filename)
-    if not wearableId then
-        logError("Could not extract wearable ID from filename: " .. filename)
-        return false
-    end
-    
-    -- Get offset for this wearable and view
-    local offset = JsonMetadataLoader.getOffsetForWearable(wearableId, viewIndex)
-    local wearableName = JsonMetadataLoader.getWearableName(wearableId)
-    
-    logInfo("Wearable ID: " .. wearableId .. " (" .. wearableName .. "), View: " .. (viewIndex + 1) .. ", Offset: (" .. offset.x .. "," .. offset.y .. ")")
-    
-    -- Read SVG file
-    local file = io.open(svgPath, "r")
-    if not file then
-        logError("Could not open file: " .. svgPath)
-        return false
-    end
-    
-    local svgContent = file:read("*all")
-    file:close()
-    
-    if not svgContent or svgContent == "" then
-        logError("File is empty: " .. svgPath)
-        return false
-    end
-    
-    -- Parse SVG to get native dimensions
-    local svgData = SVGParser.parse(svgContent)
-    if not svgData or not svgData.viewBox then
-        logError("Could not parse SVG: " .. svgPath)
-        return false
-    end
-    
-    -- Use SVG's native dimensions for initial import
-    local nativeWidth = math.floor(svgData.viewBox.width)
-    local nativeHeight = math.floor(svgData.viewBox.height)
-    
-    logInfo("Native SVG size: " .. nativeWidth .. "x" .. nativeHeight)
-    
-    -- Render SVG to pixels at native size
-    local renderResult = SVGRenderer.render(svgData, nativeWidth, nativeHeight)
-    
-    if not renderResult or not renderResult.pixels or #renderResult.pixels == 0 then
-        logError("No pixels rendered from SVG: " .. svgPath)
-        return false
-    end
-    
-    logInfo("Rendered " .. #renderResult.pixels .. " pixels")
-    
-    -- Create target size sprite with transparent background
-    local sprite = Sprite(targetSize, targetSize, ColorMode.RGB)
-    local layer = sprite.layers[1]
-    local cel = sprite:newCel(layer, 1)
-    local image = cel.image
-    
-    -- Clear canvas to transparent
-    app.transaction(function()
-        for y = 0, targetSize - 1 do
-            for x = 0, targetSize - 1 do
-                image:drawPixel(x, y, Color{r = 0, g = 0, b = 0, a = 0})
-            end
-        end
-    end)
-    
-    -- Position and draw SVG pixels with offset
-    local pixelsPlaced = 0
-    app.transaction(function()
-        for _, pixel in ipairs(renderResult.pixels) do
-            -- Calculate target position with offset
-            local targetX = pixel.x + offset.x
-            local targetY = pixel.y + offset.y
-            
-            -- Only draw pixels that fit within the target canvas
-            if targetX >= 0 and targetX < targetSize and targetY >= 0 and targetY < targetSize then
-                local color = Color{r = pixel.color.r, g = pixel.color.g, b = pixel.color.b}
-                image:drawPixel(targetX, targetY, color)
-                pixelsPlaced = pixelsPlaced + 1
-            end
-        end
-    end)
-    
-    logInfo("Placed " .. pixelsPlaced .. " pixels on " .. targetSize .. "x" .. targetSize .. " canvas")
-    
-    -- Generate output filename
-    local outputFilename = getOutputFilename(filename, viewIndex)
+    local outputFilename = getOutputFilename(app.fs.fileName(svgPath), viewIndex)
     local outputPath = app.fs.joinPath(outputDir, outputFilename)
-    
-    -- Save as .aseprite file
-    app.command.SaveFileAs{
-        ui = false,
-        filename = outputPath
-    }
-    
-    sprite:close()
-    
-    local fileTime = os.clock() - fileStartTime
-    logInfo("Saved: " .. outputPath .. " (Time: " .. string.format("%.2f", fileTime) .. "s)")
-    
-    return true, pixelsPlaced, fileTime
+    return SVGFileConverter.convert(svgPath, outputPath, viewIndex, targetSize, {info = logInfo, error = logError})
 end
 
 -- Parse command line arguments
@@ -285,10 +174,11 @@ local function batchProcess()
         return
     end
     
-    -- Open log file
-    logFile = io.open(config.log_file, "w")
+    -- Open log file (BATCH_LOG_FILE lets parallel batches keep separate logs)
+    local logPath = os.getenv("BATCH_LOG_FILE") or config.log_file
+    logFile = io.open(logPath, "w")
     if not logFile then
-        logWarn("Could not open log file: " .. config.log_file)
+        logWarn("Could not open log file: " .. logPath)
     end
     
     logInfo("Batch SVG Import Started")
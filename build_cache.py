@@ -0,0 +1,226 @@
+"""
+Content-addressed build cache for the item generator.
+
+The manifest (.build-cache/manifest.json) records, for every converted view,
+a hash of its inputs and the .aseprite files it produced:
+
+    {"tools": "<hash>", "entries": {"8/Front": {"hash": "...", "outputs": [...]}}}
+
+The input hash covers the extracted SVG fragments of the view, the view
+index, the item's DB record (preview offsets) and the converter scripts
+(TOOL_FILES). In-memory SVG documents hash exactly like the files they
+replace, so a view does not go stale when switching modes. A view whose
+inputs hash the same as its last successful conversion, and whose outputs
+still exist, does not need to be reconverted. Recorded views are written
+out every SAVE_EVERY records and by flush() at the end of a run, not per view.
+
+CompletionLedger is the append-only counterpart used by the eye shape matrix
+(eye-shapes-matrix.py), where cells finish in the thousands and rewriting a
+JSON manifest per cell would cost more than the cell itself.
+"""
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+DEFAULT_MANIFEST = Path('.build-cache/manifest.json')
+
+# Scripts that take part in converting an SVG to .aseprite
+TOOL_FILES = [
+    'batch-process.sh',
+    'batch-svg-importer.lua',
+    'aseprite-worker.lua',
+    'svg-file-converter.lua',
+    'batch-config.lua',
+    'svg-parser.lua',
+    'svg-renderer-professional.lua',
+    'json-metadata-loader.lua',
+]
+
+# Scripts behind the Aseprite-free --converter python backend
+PYTHON_TOOL_FILES = [
+    'svg_renderer.py',
+    'geometry_cache.py',
+]
+
+# ... and behind --converter native (.aseprite written by aseprite_file.py)
+NATIVE_TOOL_FILES = PYTHON_TOOL_FILES + [
+    'aseprite_file.py',
+]
+
+
+def hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def tool_fingerprint(root: Path = Path('.'), files: Iterable[str] = TOOL_FILES) -> str:
+    """Hash of the converter/config scripts (missing files hash as absent)"""
+    digest = hashlib.sha256()
+    for name in files:
+        path = Path(root) / name
+        file_hash = hash_file(path) if path.exists() else 'missing'
+        digest.update(f"{name}\0{file_hash}\n".encode())
+    return digest.hexdigest()
+
+
+def expected_outputs(job) -> List[Path]:
+    """Final output paths of a job (one per input SVG, same stem)"""
+    return [job.output_dir / f"{Path(name).stem}{job.output_ext}" for name in job.svg_names()]
+
+
+class BuildCache:
+    """Manifest of view input hashes; safe to update from worker threads"""
+
+    # Records between manifest rewrites (a full --force run records ~1600 views)
+    SAVE_EVERY = 100
+
+    def __init__(self, path: Path = DEFAULT_MANIFEST, tools: Optional[str] = None):
+        self.path = Path(path)
+        self.tools = tools if tools is not None else tool_fingerprint()
+        self.entries = {}
+        self.unsaved = 0
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self) -> None:
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Warning: Ignoring unreadable build cache {self.path}: {e}")
+            return
+        self.entries = data.get('entries', {})
+
+    def save(self) -> None:
+        with self.lock:
+            data = {'tools': self.tools, 'entries': self.entries}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.json.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+            self.unsaved = 0
+
+    def flush(self) -> None:
+        """Save if anything was recorded since the last save"""
+        if self.unsaved:
+            self.save()
+
+    @staticmethod
+    def key(job) -> str:
+        # PNG previews are tracked separately from the .aseprite outputs
+        if job.output_ext != '.aseprite':
+            return f"{job.item_id}/{job.view_name}{job.output_ext}"
+        return f"{job.item_id}/{job.view_name}"
+
+    def input_hash(self, job, extra: str = '') -> str:
+        """Hash of everything that determines the output of a job"""
+        digest = hashlib.sha256()
+        digest.update(f"tools\0{self.tools}\n".encode())
+        digest.update(f"view\0{job.view_idx}\0{job.layout}\0{job.output_ext}\n".encode())
+        digest.update(f"extra\0{extra}\n".encode())
+        if job.documents is not None:
+            for name, text in job.documents:
+                text_hash = hashlib.sha256(text.encode()).hexdigest()
+                digest.update(f"svg\0{name}\0{text_hash}\n".encode())
+        else:
+            for svg in sorted(job.input_dir.glob('*.svg')):
+                digest.update(f"svg\0{svg.name}\0{hash_file(svg)}\n".encode())
+        return digest.hexdigest()
+
+    def is_fresh(self, job, input_hash: str) -> bool:
+        with self.lock:
+            entry = self.entries.get(self.key(job))
+        if entry is None or entry.get('hash') != input_hash:
+            return False
+        return all((self.root / p).exists() for p in entry.get('outputs', []))
+
+    def record(self, job, input_hash: str) -> None:
+        outputs = [str(p) for p in expected_outputs(job) if p.exists()]
+        with self.lock:
+            self.entries[self.key(job)] = {'hash': input_hash, 'outputs': outputs}
+            self.unsaved += 1
+            due = self.unsaved >= self.SAVE_EVERY
+        if due:
+            self.save()
+
+
+DEFAULT_LEDGER = Path('.build-cache/eye-shapes-ledger.jsonl')
+
+
+class CompletionLedger:
+    """
+    Append-only record of finished cells (one JSON object per line):
+
+        {"key": "...", "hash": "...", "status": "ok", "outputs": [...]}
+
+    Every finished cell is appended and flushed right away, so a run that
+    crashes or is killed loses at most the cells in flight; the last line of
+    a key wins and a truncated final line is ignored on load. Relative
+    outputs are resolved against root (default: the working directory).
+    """
+
+    def __init__(self, path: Path = DEFAULT_LEDGER, root: Optional[Path] = None):
+        self.path = Path(path)
+        self.root = Path(root) if root is not None else Path()
+        self.entries = {}
+        self.lines = 0
+        self.lock = threading.Lock()
+        self.file = None
+        self.load()
+
+    def load(self) -> None:
+        if not self.path.exists():
+            return
+        with open(self.path, 'r') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(entry, dict) and 'key' in entry:
+                    self.entries[entry['key']] = entry
+                    self.lines += 1
+
+    def compact(self) -> None:
+        """Rewrite the ledger with only the latest entry per key"""
+        with self.lock:
+            self.close()
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.jsonl.tmp')
+            with open(tmp_path, 'w') as f:
+                for entry in self.entries.values():
+                    f.write(json.dumps(entry, sort_keys=True) + '\n')
+            os.replace(tmp_path, self.path)
+            self.lines = len(self.entries)
+
+    def is_fresh(self, key: str, input_hash: str) -> bool:
+        with self.lock:
+            entry = self.entries.get(key)
+        if entry is None or entry.get('hash') != input_hash:
+            return False
+        return all((self.root / p).exists() for p in entry.get('outputs', []))
+
+    def record(self, key: str, input_hash: str, status: str = 'ok', outputs: Iterable = ()) -> None:
+        entry = {'key': key, 'hash': input_hash, 'status': status, 'outputs': [str(p) for p in outputs]}
+        with self.lock:
+            if self.file is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self.file = open(self.path, 'a')
+            self.file.write(json.dumps(entry, sort_keys=True) + '\n')
+            self.file.flush()
+            self.entries[key] = entry
+            self.lines += 1
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
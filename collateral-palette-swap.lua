@@ -0,0 +1,121 @@
+-- Collateral Palette Swap
+-- Rasterizes a gotchi part once and recolors it for every collateral.
+--
+-- Collateral variants of a part only differ in the colors substituted for
+-- the gotchi-primary / gotchi-secondary / gotchi-cheek (and primary-mouth,
+-- eyeColor) classes; the geometry is the same. rasterize() renders the part
+-- once with a placeholder fill per color slot and keeps the rendered pixels
+-- as a mask of slot names (or literal colors). recolor() then produces any
+-- collateral's pixels by table lookup, identical to rendering the part with
+-- applyColors(svg, collateral) substituted (see collateral_palette.py for
+-- the Python counterpart).
+
+local SVGParser = dofile("svg-parser.lua")
+local SVGRenderer = dofile("svg-renderer-professional.lua")
+
+local PaletteSwap = {}
+
+-- Color slots with their placeholder fills. A part that uses one of these
+-- colors itself cannot be masked (rasterize returns nil).
+PaletteSwap.SLOTS = {
+    primary = {placeholder = "#fe0001", r = 254, g = 0, b = 1},
+    secondary = {placeholder = "#fe0002", r = 254, g = 0, b = 2},
+    cheek = {placeholder = "#fe0003", r = 254, g = 0, b = 3},
+}
+
+-- Class attribute replacements, in the order applyCollateralColors did them
+local CLASS_FILLS = {
+    {pattern = 'class="gotchi%-primary"', slot = "primary"},
+    {pattern = 'class="gotchi%-secondary"', slot = "secondary"},
+    {pattern = 'class="gotchi%-cheek"', slot = "cheek"},
+    {pattern = 'class="gotchi%-primary%-mouth"', slot = "primary"},
+    {pattern = 'class="gotchi%-eyeColor"', slot = "primary"},
+}
+
+-- Same conversion as svg-parser.lua, so recolored pixels match a render
+local function hexToRgb(hex)
+    if not hex or hex == "" then return {r = 0, g = 0, b = 0} end
+    hex = hex:gsub("#", ""):gsub("[^%w]", "")
+    if #hex == 3 then
+        hex = hex:gsub("(.)(.)(.)", "%1%1%2%2%3%3")
+    end
+    if #hex >= 6 then
+        return {
+            r = tonumber(hex:sub(1, 2), 16) or 0,
+            g = tonumber(hex:sub(3, 4), 16) or 0,
+            b = tonumber(hex:sub(5, 6), 16) or 0,
+        }
+    end
+    return {r = 0, g = 0, b = 0}
+end
+
+-- Replace the color classes with fills; colors maps slot name -> "#rrggbb"
+function PaletteSwap.applyColors(svgString, colors)
+    local processedSVG = svgString
+    for _, entry in ipairs(CLASS_FILLS) do
+        processedSVG = processedSVG:gsub(entry.pattern, 'fill="' .. colors[entry.slot] .. '"')
+    end
+    return processedSVG
+end
+
+-- Slot colors of a collateral from collateral-colors-loader.lua
+function PaletteSwap.collateralColors(collateral)
+    return {
+        primary = collateral.primaryColor,
+        secondary = collateral.secondaryColor,
+        cheek = collateral.cheekColor,
+    }
+end
+
+-- Render wrap(svgString with placeholder fills) once.
+-- Returns a mask {pixels = {{x, y, slot, color}, ...}} in render order
+-- (slot is nil for literal colors), or nil and an error message.
+function PaletteSwap.rasterize(svgString, wrap, width, height)
+    local lower = svgString:lower()
+    local placeholders = {}
+    for name, slot in pairs(PaletteSwap.SLOTS) do
+        if lower:find(slot.placeholder, 1, true) then
+            return nil, "Placeholder color " .. slot.placeholder .. " is used by the SVG"
+        end
+        placeholders[name] = slot.placeholder
+    end
+
+    local svgData = SVGParser.parse(wrap(PaletteSwap.applyColors(svgString, placeholders)))
+    if not svgData or not svgData.viewBox then
+        return nil, "Could not parse SVG"
+    end
+    local renderResult = SVGRenderer.render(svgData, width, height)
+    if not renderResult or not renderResult.pixels or #renderResult.pixels == 0 then
+        return nil, "No pixels rendered"
+    end
+
+    local pixels = {}
+    for i, pixel in ipairs(renderResult.pixels) do
+        local color = pixel.color
+        local slotName = nil
+        for name, slot in pairs(PaletteSwap.SLOTS) do
+            if color.r == slot.r and color.g == slot.g and color.b == slot.b then
+                slotName = name
+                break
+            end
+        end
+        pixels[i] = {x = pixel.x, y = pixel.y, slot = slotName, color = color}
+    end
+    return {pixels = pixels}
+end
+
+-- Pixels of a mask in one collateral's colors, as renderResult.pixels
+function PaletteSwap.recolor(mask, collateral)
+    local palette = {}
+    for name, hex in pairs(PaletteSwap.collateralColors(collateral)) do
+        palette[name] = hexToRgb(hex)
+    end
+    local pixels = {}
+    for i, pixel in ipairs(mask.pixels) do
+        local color = pixel.slot and palette[pixel.slot] or pixel.color
+        pixels[i] = {x = pixel.x, y = pixel.y, color = color}
+    end
+    return pixels
+end
+
+return PaletteSwap
@@ -0,0 +1,229 @@
+"""
+Collateral palette swap: rasterize a gotchi part once, recolor per collateral.
+
+Python counterpart of collateral-palette-swap.lua. The collateral variants of
+a body/hands/mouth/eyes/shadow part from aavegotchi_db_main.json only differ
+in the fills substituted for the gotchi-primary / gotchi-secondary /
+gotchi-cheek classes (gotchi-primary-mouth and gotchi-eyeColor take the
+primary color). rasterize_part() renders a part once with placeholder fills
+and records, per pixel, an index into [transparent, primary, secondary,
+cheek, literal colors...]; PartMask.recolor() turns that into any
+collateral's RGBA pixels by table lookup, identical to rendering the part
+with apply_colors(svg, collateral colors).
+
+    collaterals = load_collaterals()
+    mask = rasterize_part(part_svg)
+    rgba = mask.recolor(collaterals[0].colors)     # 64x64 RGBA bytes
+"""
+import json
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+from svg_renderer import Color, RenderResult, hex_to_rgb, parse_svg, place_pixels, render
+
+COLLATERAL_FILES = [
+    'aavegotchi_db_collaterals_haunt1.json',
+    'aavegotchi_db_collaterals_haunt2.json',
+]
+MAIN_DB = 'aavegotchi_db_main.json'
+
+SLOT_NAMES = ['primary', 'secondary', 'cheek']
+# Placeholder fill per slot; a part whose SVG uses one of them cannot be masked
+PLACEHOLDERS = {
+    'primary': '#fe0001',
+    'secondary': '#fe0002',
+    'cheek': '#fe0003',
+}
+
+# Class attribute replacements, in the order applyCollateralColors does them
+CLASS_FILLS = [
+    ('class="gotchi-primary"', 'primary'),
+    ('class="gotchi-secondary"', 'secondary'),
+    ('class="gotchi-cheek"', 'cheek'),
+    ('class="gotchi-primary-mouth"', 'primary'),
+    ('class="gotchi-eyeColor"', 'primary'),
+]
+
+CHEEK_ELEMENT = '<path class="gotchi-cheek" d="M21 32v2h2v-2h-1zm21 0h-1v2h2v-2z"/>'
+
+
+@dataclass
+class Collateral:
+    name: str
+    primary_color: str
+    secondary_color: str
+    cheek_color: str
+    haunt: Optional[int] = None
+    # The collateral's own eye shape (eyeShapeSvgId / eyeShapeSvgs)
+    eye_shape_svg_id: Optional[int] = None
+    eye_shape_svgs: List[str] = field(default_factory=list)
+
+    @property
+    def colors(self) -> Dict[str, str]:
+        return {'primary': self.primary_color, 'secondary': self.secondary_color, 'cheek': self.cheek_color}
+
+
+def _hex_color(value: Optional[str]) -> str:
+    # convertHexColor in collateral-colors-loader.lua
+    if not value:
+        return '#000000'
+    return '#' + re.sub(r'^0x', '', value)
+
+
+def load_collaterals(paths: Sequence = COLLATERAL_FILES) -> List[Collateral]:
+    """Collaterals of the haunt files in file order (missing files are skipped)"""
+    collaterals = []
+    for path in paths:
+        path = Path(path)
+        if not path.exists():
+            continue
+        with open(path, 'r') as f:
+            records = json.load(f).get('collaterals', [])
+        for record in records:
+            if not all(record.get(k) for k in ('name', 'primaryColor', 'secondaryColor', 'cheekColor')):
+                continue
+            eye_shape_svgs = record.get('eyeShapeSvgs') or []
+            if isinstance(eye_shape_svgs, str):
+                eye_shape_svgs = [eye_shape_svgs]
+            collaterals.append(Collateral(
+                record['name'], _hex_color(record['primaryColor']), _hex_color(record['secondaryColor']),
+                _hex_color(record['cheekColor']), record.get('haunt'),
+                record.get('eyeShapeSvgId'), list(eye_shape_svgs),
+            ))
+    return collaterals
+
+
+def apply_colors(svg: str, colors: Dict[str, str]) -> str:
+    """Replace the color classes with fills; colors maps slot name -> '#rrggbb'"""
+    for class_attr, slot in CLASS_FILLS:
+        svg = svg.replace(class_attr, f'fill="{colors[slot]}"')
+    return svg
+
+
+def wrap_svg(fragment: str) -> str:
+    return f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 64 64">{fragment}</svg>'
+
+
+def render_part(svg: str, colors: Dict[str, str], wrap: Callable[[str], str] = wrap_svg,
+                size: int = 64) -> bytearray:
+    """A part rendered directly in the given colors (the per-collateral way)"""
+    result = render(parse_svg(wrap(apply_colors(svg, colors))), size, size)
+    return place_pixels(result, (0, 0), size)
+
+
+@dataclass
+class PartMask:
+    width: int
+    height: int
+    # One index per pixel (row major): 0 transparent, 1.. slots, then literals
+    index: bytes
+    literals: List[Color]
+    slots: List[str] = field(default_factory=lambda: list(SLOT_NAMES))
+
+    @property
+    def pixel_count(self) -> int:
+        return sum(1 for i in self.index if i)
+
+    def recolor(self, colors: Dict[str, str]) -> bytearray:
+        """RGBA pixels of the part in the given slot colors ('#rrggbb' each)"""
+        table = [b'\x00\x00\x00\x00']
+        table += [bytes(hex_to_rgb(colors[slot])) + b'\xff' for slot in self.slots]
+        table += [bytes(color) + b'\xff' for color in self.literals]
+        return bytearray(b''.join(table[i] for i in self.index))
+
+
+def check_placeholders(svg: str, placeholders: Dict[str, str]) -> None:
+    """Raise ValueError when the SVG itself uses one of the placeholder colors"""
+    lower = svg.lower()
+    for placeholder in placeholders.values():
+        if placeholder.lstrip('#').lower() in lower:
+            raise ValueError(f"Placeholder color {placeholder} is used by the SVG")
+
+
+def mask_from_render(result: RenderResult, placeholders: Dict[str, str]) -> PartMask:
+    """Index the pixels of a render made with placeholders (slot name -> color)"""
+    slots = list(placeholders)
+    slot_index = {hex_to_rgb(placeholders[slot]): i + 1 for i, slot in enumerate(slots)}
+    first_literal = 1 + len(slots)
+    literals: List[Color] = []
+    literal_index: Dict[Color, int] = {}
+    index = bytearray(result.width * result.height)
+    for key, color in result.pixels.items():
+        i = slot_index.get(color)
+        if i is None:
+            i = literal_index.get(color)
+            if i is None:
+                if first_literal + len(literals) > 255:
+                    raise ValueError("Too many distinct colors for an indexed mask")
+                i = literal_index[color] = first_literal + len(literals)
+                literals.append(color)
+        index[key] = i
+    return PartMask(result.width, result.height, bytes(index), literals, slots)
+
+
+def rasterize_part(svg: str, wrap: Callable[[str], str] = wrap_svg, size: int = 64) -> PartMask:
+    """
+    Render a part once with placeholder fills and index its pixels by slot.
+    Raises ValueError when the part itself uses a placeholder color.
+    """
+    check_placeholders(svg, PLACEHOLDERS)
+    result = render(parse_svg(wrap(apply_colors(svg, PLACEHOLDERS))), size, size)
+    return mask_from_render(result, PLACEHOLDERS)
+
+
+# ============================================================================
+# PARTS OF batch-all-collaterals-converter-v2.lua
+# ============================================================================
+
+@dataclass
+class Part:
+    # Output name prefix, e.g. body_00 or hands_down_open
+    prefix: str
+    svg: str
+    wrap: Callable[[str], str] = wrap_svg
+
+
+def extract_body_only(body_svg: str) -> str:
+    """Body group without cheek, mouth and shadow (extractBodyOnly)"""
+    for tail in ('<path class="gotchi-cheek"', '<g class="gotchi-primary-mouth"'):
+        match = re.search(r'<g class="gotchi-body">(.*)</g>' + re.escape(tail), body_svg, re.S)
+        if match:
+            return f'<g class="gotchi-body">{match.group(1)}</g>'
+    body_only = re.sub(r'<path class="gotchi-cheek"[^>]*/?>.*?</path>', '', body_svg, flags=re.S)
+    body_only = re.sub(r'<path class="gotchi-cheek"[^>]*/>', '', body_only)
+    body_only = re.sub(r'<g class="gotchi-primary-mouth"[^>]*>.*?</g>', '', body_only, flags=re.S)
+    return re.sub(r'<g class="gotchi-shadow"[^>]*>.*?</g>', '', body_only, flags=re.S)
+
+
+def _pose_wrap(group_class: str) -> Callable[[str], str]:
+    return lambda fragment: wrap_svg(f'<g class="gotchi-{group_class}">{fragment}</g>')
+
+
+HAND_POSES = [
+    ('down_open', 'handsDownOpen', r'<g class="gotchi-handsDownOpen">(.*?)</g><g class="gotchi-handsUp">'),
+    ('down_closed', 'handsDownClosed', r'<g class="gotchi-handsDownClosed">(.*?)</g><g class="gotchi-handsDownOpen">'),
+    ('up', 'handsUp', r'<g class="gotchi-handsUp">(.*?)</g>$'),
+]
+
+
+def collateral_parts(main_db: Path = Path(MAIN_DB)) -> List[Part]:
+    """Body, hand poses, mouths (with cheek) and shadows, in converter order"""
+    with open(main_db, 'r') as f:
+        templates = json.load(f)
+    parts = []
+    if templates.get('body'):
+        parts.append(Part('body_00', extract_body_only(templates['body'][0])))
+    if templates.get('hands'):
+        hands = templates['hands'][0]
+        for name, group_class, pattern in HAND_POSES:
+            match = re.search(pattern, hands, re.S)
+            if match and match.group(1):
+                parts.append(Part(f'hands_{name}', match.group(1), _pose_wrap(group_class)))
+    for mouth in ('mouth_neutral', 'mouth_happy'):
+        if templates.get(mouth):
+            parts.append(Part(f'{mouth}_00', templates[mouth][0] + CHEEK_ELEMENT))
+    for i, shadow in enumerate(templates.get('shadow', [])):
+        parts.append(Part(f'shadow_{i:02d}', shadow))
+    return parts
@@ -0,0 +1,269 @@
+"""
+Conversion job scheduling for the item generator.
+
+Each job is one view directory handed to ./batch-process.sh (one headless
+Aseprite run). A job's SVGs are either files in input_dir or, when the
+generator keeps them in memory, (file name, SVG text) documents carried by
+the job itself. Jobs are fanned out over a bounded thread pool; the threads
+only wait on subprocesses, so the pool size is the number of concurrent
+Aseprite workers.
+"""
+import os
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from aseprite_file import encode_aseprite, write_aseprite
+from asset_store import AssetStore
+from svg_renderer import convert_svg_content, convert_svg_file, encode_png, write_png
+
+# Suffix the batch converter appends for each view index
+VIEW_SUFFIXES = ['front', 'left', 'right', 'back']
+
+# Encoders of the Python render backend, by job output extension
+PIXEL_WRITERS = {
+    '.png': write_png,
+    '.aseprite': write_aseprite,
+}
+PIXEL_ENCODERS = {
+    '.png': encode_png,
+    '.aseprite': encode_aseprite,
+}
+
+# write(path, rgba, width, height)
+PixelSink = Callable[[Path, bytes, int, int], None]
+
+
+@dataclass
+class ConversionJob:
+    item_id: str
+    view_name: str
+    view_idx: int
+    input_dir: Path
+    output_dir: Path
+    # 'body' items get one output directory per view; 'non-body' items share one
+    layout: str = 'body'
+    log_file: Optional[Path] = None
+    # Build cache hash of the job's inputs, set when the cache is enabled
+    input_hash: Optional[str] = None
+    # Extension of the files the converter writes for each input SVG
+    output_ext: str = '.aseprite'
+    # (file name, SVG text) pairs sorted by name; None reads *.svg from input_dir
+    documents: Optional[List[Tuple[str, str]]] = None
+
+    @property
+    def label(self) -> str:
+        return f"{self.item_id} {self.view_name}"
+
+    def svg_names(self) -> List[str]:
+        """File names of the job's input SVGs, in conversion order"""
+        if self.documents is not None:
+            return [name for name, _ in self.documents]
+        return [svg.name for svg in sorted(self.input_dir.glob('*.svg'))]
+
+
+@dataclass
+class JobResult:
+    job: ConversionJob
+    ok: bool
+    returncode: int
+    elapsed: float
+    stdout: str = ''
+    stderr: str = ''
+    renamed: List[str] = field(default_factory=list)
+    # Seconds per sub-stage (e.g. convert, rename) for pipeline metrics
+    timings: Dict[str, float] = field(default_factory=dict)
+    # One entry per external process run / worker request: command, seconds, returncode or status
+    invocations: List[dict] = field(default_factory=list)
+    # Seconds the job waited in the scheduler queue
+    queued: float = 0.0
+
+
+def fail_result(result: JobResult, message: str) -> None:
+    """Mark a finished job as failed, keeping what it printed"""
+    result.ok = False
+    if result.returncode == 0:
+        result.returncode = -1
+    result.stderr = f"{result.stderr}\n{message}" if result.stderr else message
+
+
+def rename_outputs(job: ConversionJob) -> List[str]:
+    """Remove the view suffix the batch converter adds to every output file"""
+    renamed = []
+    view_suffix = VIEW_SUFFIXES[job.view_idx]
+    output_dir = job.output_dir
+
+    if job.layout == 'non-body':
+        view_name = job.view_name
+        for aseprite_file in output_dir.glob(f'*_{view_name}_{view_suffix}.aseprite'):
+            old_name = aseprite_file.name
+            base_without_ext = old_name[:-len('.aseprite')]
+            # Remove the duplicate suffix (e.g., _front_front -> _front)
+            if base_without_ext.endswith(f'_{view_name}_{view_suffix}'):
+                new_name = base_without_ext[:-len(f'_{view_suffix}')] + '.aseprite'
+                aseprite_file.rename(output_dir / new_name)
+                renamed.append(f"{old_name} → {new_name}")
+        return renamed
+
+    for aseprite_file in output_dir.glob('*.aseprite'):
+        old_name = aseprite_file.name
+        base_without_ext = old_name[:-len('.aseprite')]
+        # Check if filename ends with _{view_suffix}_{view_suffix} (duplicate)
+        # Pattern: {item_id}_{item_name}_{View}_{view_suffix}.aseprite
+        # Should become: {item_id}_{item_name}_{View}.aseprite
+        if base_without_ext.endswith(f'_{view_suffix}_{view_suffix}'):
+            # Remove the duplicate suffix
+            new_name = base_without_ext[:-len(f'_{view_suffix}')] + '.aseprite'
+            aseprite_file.rename(output_dir / new_name)
+            renamed.append(f"{old_name} → {new_name}")
+        elif base_without_ext.endswith(f'_{view_suffix}'):
+            # Remove the view suffix that batch converter added
+            # Pattern examples:
+            # - 8_MarineJacket_FrontLeft_front -> 8_MarineJacket_FrontLeft
+            # - 8_MarineJacket_Front_LeftUp_front -> 8_MarineJacket_Front_LeftUp
+            # - 8_MarineJacket_BackLeft_back -> 8_MarineJacket_BackLeft
+            parts = base_without_ext.split('_')
+            if len(parts) >= 2 and parts[-1] == view_suffix:
+                new_name = '_'.join(parts[:-1]) + '.aseprite'
+                aseprite_file.rename(output_dir / new_name)
+                renamed.append(f"{old_name} → {new_name}")
+    return renamed
+
+
+def run_batch_process(job: ConversionJob) -> JobResult:
+    """Convert one view directory with ./batch-process.sh and rename its outputs"""
+    env = os.environ.copy()
+    if job.log_file is not None:
+        env['BATCH_LOG_FILE'] = str(job.log_file)
+
+    start = time.perf_counter()
+    result = subprocess.run(
+        ['./batch-process.sh', str(job.input_dir), str(job.output_dir), str(job.view_idx)],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    elapsed = time.perf_counter() - start
+
+    ok = result.returncode == 0
+    rename_start = time.perf_counter()
+    renamed = rename_outputs(job) if ok else []
+    timings = {'convert': elapsed, 'rename': time.perf_counter() - rename_start}
+    invocations = [{'command': 'batch-process.sh', 'returncode': result.returncode, 'seconds': round(elapsed, 6)}]
+    return JobResult(job, ok, result.returncode, elapsed, result.stdout, result.stderr, renamed,
+                     timings, invocations)
+
+
+def run_python_render(job: ConversionJob, db_records: Dict[int, dict],
+                      target_size: int = 64, store: Optional[AssetStore] = None,
+                      sink: Optional[PixelSink] = None, write_files: bool = True) -> JobResult:
+    """
+    Render every SVG of a view (directory or documents) with svg_renderer to
+    <svg stem>.png, or to <svg stem>.aseprite when job.output_ext says so.
+    With a store, outputs are written through it (deduplicated). sink(path,
+    rgba, width, height) also receives every rendered output; with
+    write_files=False it is the only destination.
+    """
+    start = time.perf_counter()
+    if not write_files:
+        write = None
+    elif store is not None:
+        write = store.writer(PIXEL_ENCODERS[job.output_ext])
+    else:
+        write = PIXEL_WRITERS[job.output_ext]
+    if write is not None:
+        job.output_dir.mkdir(parents=True, exist_ok=True)
+    if sink is not None:
+        write = _tee(sink, write)
+    converted = []
+    errors = []
+    documents = dict(job.documents or ())
+    for name in job.svg_names():
+        output_path = job.output_dir / f"{Path(name).stem}{job.output_ext}"
+        try:
+            if job.documents is not None:
+                result = convert_svg_content(name, documents[name], output_path, job.view_idx,
+                                             db_records, target_size, write)
+            else:
+                result = convert_svg_file(job.input_dir / name, output_path, job.view_idx,
+                                          db_records, target_size, write)
+            if result.pixels:
+                converted.append(f"Rendered {output_path.name}")
+            else:
+                converted.append(f"Skipped {name}: no pixels rendered")
+        except (OSError, ValueError) as e:
+            errors.append(f"{name}: {e}")
+    elapsed = time.perf_counter() - start
+    return JobResult(job, not errors, 1 if errors else 0, elapsed,
+                     '\n'.join(converted), '\n'.join(errors), timings={'render': elapsed})
+
+
+def _tee(sink: PixelSink, write: Optional[PixelSink]) -> PixelSink:
+    def tee(path, rgba, width, height):
+        sink(path, rgba, width, height)
+        if write is not None:
+            write(path, rgba, width, height)
+    return tee
+
+
+class JobScheduler:
+    """
+    Bounded pool of concurrent conversion jobs.
+
+    Jobs can be submitted while earlier ones are still running, so SVG
+    preparation of the next item overlaps with conversion of the previous one.
+    With stop_on_error the first failed job cancels everything still queued.
+    """
+
+    def __init__(self, max_workers: int = 1, stop_on_error: bool = False,
+                 runner: Callable[[ConversionJob], JobResult] = run_batch_process,
+                 on_done: Optional[Callable[[JobResult], None]] = None):
+        self.max_workers = max(1, max_workers)
+        self.stop_on_error = stop_on_error
+        self.runner = runner
+        self.on_done = on_done
+        self.failed = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        self._futures = []
+
+    def submit(self, job: ConversionJob) -> None:
+        if self.stop_on_error and self.failed.is_set():
+            return
+        self._futures.append(self._executor.submit(self._run, job, time.perf_counter()))
+
+    def _run(self, job: ConversionJob, submitted: float) -> Optional[JobResult]:
+        if self.stop_on_error and self.failed.is_set():
+            return None
+        queued = time.perf_counter() - submitted
+        try:
+            result = self.runner(job)
+        except Exception as e:
+            result = JobResult(job, False, -1, 0.0, stderr=str(e))
+        result.queued = queued
+        if self.on_done is not None:
+            try:
+                self.on_done(result)
+            except Exception as e:
+                # Bookkeeping after the job (store, cache, pixel store) failed:
+                # the job counts as failed instead of aborting the whole batch
+                print(f"Error: finishing {job.view_name} view of item {job.item_id} failed: {e}")
+                fail_result(result, f"on_done: {e}")
+        if not result.ok:
+            self.failed.set()
+        return result
+
+    def wait(self) -> List[JobResult]:
+        results = []
+        for future in as_completed(self._futures):
+            if future.cancelled():
+                continue
+            result = future.result()
+            if result is not None:
+                results.append(result)
+        self._executor.shutdown(wait=True)
+        return results
+
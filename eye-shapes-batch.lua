@@ -2,6 +2,10 @@
 -- Usage examples:
 --  - In Aseprite: File → Scripts → Run → select this file (optionally pass --script-param collateral=amDAI via CLI)
 --  - CLI: aseprite -b --script eye-shapes-batch.lua --script-param collateral=amDAI
+--  - Cells file (eye-shapes-matrix.py): aseprite -b --script-param cells=FILE --script eye-shapes-batch.lua
+--    renders exactly the listed cells, one per line:
+--    input<TAB>variant<TAB>eyeHex<TAB>primaryHex<TAB>output
+--    and prints "@@CELL<TAB>line<TAB>ok|empty|error" after each one.
 
 local SVGParser = dofile("svg-parser.lua")
 local SVGRenderer = dofile("svg-renderer-professional.lua")
@@ -247,24 +251,19 @@ local function ensureWrappedSVG(svgContent)
     return '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 64 64">' .. cleaned .. '</svg>'
 end
 
-local function convertVariant(inputPath, variantKey, eyeHex, primaryHex, outputDir)
-    -- Compute output path early to short-circuit if skipping
-    local base = inputPath:gsub("\\", "/"):match("([^/]+)%.svg$") or "eye_shape"
-    local out = outputDir .. "/" .. base .. "_" .. variantKey .. ".aseprite"
-    if skipExisting and fileExists(out) then
-        print("Skip existing: " .. out)
-        return true
-    end
-    local raw = readFile(inputPath); if not raw then print("ERROR: read " .. inputPath); return false end
+-- Render one variant of inputPath to out.
+-- Returns "ok", "empty" (0 pixels, nothing saved) or "error".
+local function renderVariant(inputPath, variantKey, eyeHex, primaryHex, out)
+    local raw = readFile(inputPath); if not raw then print("ERROR: read " .. inputPath); return "error" end
     local wrapped = ensureWrappedSVG(raw)
     -- Normalize rectangles into paths so the parser can handle them
     wrapped = rectsToPaths(wrapped)
     wrapped = applyColors(wrapped, eyeHex, primaryHex)
 
     local svgData = SVGParser.parse(wrapped)
-    if not svgData or not svgData.viewBox then print("ERROR: parse " .. inputPath .. " (" .. variantKey .. ")"); return false end
+    if not svgData or not svgData.viewBox then print("ERROR: parse " .. inputPath .. " (" .. variantKey .. ")"); return "error" end
     local render = SVGRenderer.render(svgData, 64, 64)
-    if not render or not render.pixels or #render.pixels == 0 then print("ERROR: 0 pixels " .. inputPath .. " (" .. variantKey .. ")"); return false end
+    if not render or not render.pixels or #render.pixels == 0 then print("ERROR: 0 pixels " .. inputPath .. " (" .. variantKey .. ")"); return "empty" end
 
     local sprite = Sprite(64, 64, ColorMode.RGB)
     local layer = sprite.layers[1]
@@ -282,15 +281,50 @@ local function convertVariant(inputPath, variantKey, eyeHex, primaryHex, outputD
         end
     end)
 
-    ensureDir(outputDir)
+    ensureDir(out:match("^(.*)/[^/]+$") or ".")
     app.command.SaveFileAs{ ui=false, filename=out }
     sprite:close()
     print("Saved: " .. out)
-    return true
+    return "ok"
+end
+
+local function convertVariant(inputPath, variantKey, eyeHex, primaryHex, outputDir)
+    -- Compute output path early to short-circuit if skipping
+    local base = inputPath:gsub("\\", "/"):match("([^/]+)%.svg$") or "eye_shape"
+    local out = outputDir .. "/" .. base .. "_" .. variantKey .. ".aseprite"
+    if skipExisting and fileExists(out) then
+        print("Skip existing: " .. out)
+        return true
+    end
+    return renderVariant(inputPath, variantKey, eyeHex, primaryHex, out) == "ok"
+end
+
+-- Cells file mode: render the listed cells only (no skipping, the caller planned them)
+local function convertCells(cellsPath)
+    local f = io.open(cellsPath, "r")
+    if not f then print("ERROR: read " .. cellsPath); return end
+    local n = 0
+    for line in f:lines() do
+        n = n + 1
+        local inputPath, variantKey, eyeHex, primaryHex, out = line:match("^([^\t]*)\t([^\t]*)\t([^\t]*)\t([^\t]*)\t([^\t]*)$")
+        local status = "error"
+        if inputPath then
+            local ok, result = pcall(renderVariant, inputPath, variantKey, eyeHex, primaryHex, out)
+            if ok then status = result else print("ERROR: " .. tostring(result)) end
+        else
+            print("ERROR: bad cell line " .. n)
+        end
+        print("@@CELL\t" .. n .. "\t" .. status)
+    end
+    f:close()
 end
 
 -- Main
-do
+local cellsPath = type(params) == "table" and params.cells or nil
+if cellsPath and cellsPath ~= "" then
+    convertCells(cellsPath)
+    print("Done rendering cells from " .. cellsPath .. ".")
+else
     local commonHex = loadCollateralPrimaryHex(collateralName)
     print("Collateral for 'common': " .. collateralName .. " (#" .. commonHex .. ")")
     local setDirs = listSetFolders()
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""
+Eye shape x collateral x rarity matrix generator.
+
+Replaces batch-eye-shapes-all-collaterals.sh (one Aseprite run of
+eye-shapes-batch.lua per collateral, every run redoing all of its work):
+the examples/eye_shapes sets and the eyeShapeSvgs of both haunt collateral
+JSONs are read once, the whole matrix is planned, and only the cells that are
+missing or stale (their SVG, colors or the renderer scripts changed) are
+rendered, in parallel. Every finished cell is appended to a completion
+ledger (.build-cache/eye-shapes-ledger.jsonl), so a crashed or interrupted
+run resumes where it stopped.
+
+Outputs are the files eye-shapes-batch.lua writes:
+    output/<collateral>/eye shape/<set>/<view>_<variant>.aseprite
+plus output/<collateral>/eye shape/collateral_idNN/ for the collateral's own
+eye shape (skip with --no-collateral-eyes). Cells with identical content
+(e.g. collaterals sharing a primary color) are stored once in the content
+store <output>/.store and hardlinked (asset_store.py; --no-dedup disables).
+--pixel-store also collects every cell into a pixel store file
+(pixel_store.py), keyed as pixel_store.eye_shape_key(); cells missing from
+it are rendered even when the ledger has them.
+
+Usage:
+    python3 eye-shapes-matrix.py [--backend native|aseprite] [--jobs N]
+                                 [--collaterals amDAI,maUSDC] [--pixel-store PATH] [--dry-run]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from aseprite_file import read_aseprite
+from aseprite_worker import find_aseprite
+from asset_store import AssetStore
+from build_cache import DEFAULT_LEDGER, CompletionLedger, tool_fingerprint
+from collateral_palette import COLLATERAL_FILES, load_collaterals
+from eye_shapes import (
+    ASEPRITE_TOOL_FILES, EYE_SHAPES_ROOT, NATIVE_TOOL_FILES, Cell, cell_hash, group_by_source, load_sources,
+    plan_matrix, render_source,
+)
+from pixel_store import PixelStoreBuilder, eye_shape_key
+
+LUA_SCRIPT = 'eye-shapes-batch.lua'
+CELL_PREFIX = '@@CELL'
+# Collateral eye shapes are written here for the aseprite backend (it reads files)
+SOURCE_DIR = Path('.build-cache/eye-shapes-src')
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Render the missing or stale cells of the eye shape x collateral x rarity matrix."
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["native", "aseprite"],
+        default="native",
+        help="native: render and write .aseprite files in Python (default); "
+             "aseprite: run eye-shapes-batch.lua on cell lists.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Parallel worker processes (default: CPU count).",
+    )
+    parser.add_argument(
+        "--collaterals",
+        help="Comma-separated collateral names (default: all in the haunt JSONs).",
+    )
+    parser.add_argument(
+        "--output",
+        default="output",
+        help="Output root (default: output).",
+    )
+    parser.add_argument(
+        "--ledger",
+        default=str(DEFAULT_LEDGER),
+        help=f"Completion ledger (default: {DEFAULT_LEDGER}).",
+    )
+    parser.add_argument(
+        "--no-collateral-eyes",
+        action="store_true",
+        help="Skip the collaterals' own eye shapes (eyeShapeSvgs).",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Render every cell, ignoring the ledger.",
+    )
+    parser.add_argument(
+        "--adopt-existing",
+        action="store_true",
+        help="Record pending cells whose output already exists as done instead of "
+             "rendering them (e.g. outputs of earlier eye-shapes-batch.lua runs).",
+    )
+    parser.add_argument(
+        "--no-dedup",
+        action="store_true",
+        help="Write plain files instead of through the <output>/.store content store.",
+    )
+    parser.add_argument(
+        "--pixel-store",
+        metavar="PATH",
+        help="Also collect the cells into one pixel store file at PATH "
+             "(updated in place, see pixel_store.py).",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Print the plan (pending cells per collateral) and exit.",
+    )
+    return parser
+
+
+def run_native(pending: List[Cell], jobs: int, record, store: Optional[AssetStore] = None) -> None:
+    """Render pending cells grouped by source, one source per task"""
+    groups = group_by_source(pending)
+    store_root = str(store.root) if store is not None else None
+    tasks = [
+        (cells[0].source.svg, [(c.key, c.eye_hex, c.primary_hex, str(c.output)) for c in cells], store_root)
+        for cells in groups.values()
+    ]
+    if jobs <= 1:
+        for done, (source_key, task) in enumerate(zip(groups, tasks), 1):
+            record(source_key, render_source(*task), done, len(tasks))
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = {executor.submit(render_source, *task): key for key, task in zip(groups, tasks)}
+        for done, future in enumerate(as_completed(futures), 1):
+            record(futures[future], future.result(), done, len(tasks))
+
+
+def source_file(cell: Cell) -> Path:
+    """SVG file eye-shapes-batch.lua reads for a cell"""
+    source = cell.source
+    if source.path is not None:
+        return source.path
+    path = SOURCE_DIR / cell.collateral / f"{source.base}.svg"
+    if not path.exists() or path.read_text() != source.svg:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(source.svg)
+    return path
+
+
+def write_cells_file(path: Path, cells: List[Cell]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w') as f:
+        for cell in cells:
+            f.write('\t'.join([source_file(cell).as_posix(), cell.variant, cell.eye_hex, cell.primary_hex,
+                               cell.output.as_posix()]) + '\n')
+
+
+def run_aseprite_chunk(aseprite: str, cells_path: Path, cells: List[Cell], record) -> int:
+    """
+    Render one cells file in one Aseprite process; returns its exit code.
+    Cells the process never reported (it crashed or was killed) are recorded
+    as errors; the ledger lets the next run retry them.
+    """
+    tail = deque(maxlen=20)
+    reported = set()
+    process = subprocess.Popen(
+        [aseprite, '-b', '--script-param', f'cells={cells_path}', '--script', LUA_SCRIPT],
+        stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+    )
+    for line in process.stdout:
+        line = line.rstrip('\n')
+        if line.startswith(CELL_PREFIX):
+            _, number, status = line.split('\t')
+            reported.add(int(number) - 1)
+            record(cells[int(number) - 1], status)
+        else:
+            tail.append(line)
+    code = process.wait()
+    unreported = [cell for i, cell in enumerate(cells) if i not in reported]
+    if code != 0 or unreported:
+        print(f"  Aseprite exited with {code} on {cells_path} ({len(unreported)} cell(s) not rendered); "
+              "last output:")
+        for line in tail:
+            print(f"    {line}")
+    for cell in unreported:
+        record(cell, 'error')
+    cells_path.unlink(missing_ok=True)
+    return code
+
+
+def run_aseprite(pending: List[Cell], jobs: int, record) -> None:
+    aseprite = find_aseprite()
+    if aseprite is None:
+        print("Error: Aseprite not found (set ASEPRITE_BIN)")
+        sys.exit(1)
+    # Aseprite saves in place; an output hardlinked into the content store
+    # would change the blob and every cell sharing it
+    for cell in pending:
+        if cell.output.exists():
+            AssetStore.detach(cell.output)
+    # Contiguous slices of the plan, i.e. a few collaterals per process
+    jobs = max(1, min(jobs, len(pending)))
+    size = -(-len(pending) // jobs)
+    chunks = []
+    for i in range(0, len(pending), size):
+        cells_path = SOURCE_DIR.parent / f"eye-shapes-cells-{len(chunks)}.tsv"
+        write_cells_file(cells_path, pending[i:i + size])
+        chunks.append((cells_path, pending[i:i + size]))
+    with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+        futures = [executor.submit(run_aseprite_chunk, aseprite, path, cells, record) for path, cells in chunks]
+        for future in futures:
+            future.result()
+
+
+def cell_sprite_key(cell: Cell):
+    return eye_shape_key(cell.collateral, cell.source.set_name, cell.source.base, cell.variant)
+
+
+def collect_cell(pixels: PixelStoreBuilder, cell: Cell, status: str) -> None:
+    """Add a finished cell to the pixel store, read back from its .aseprite file"""
+    if status == 'empty':
+        pixels.add_empty(cell_sprite_key(cell))
+        return
+    try:
+        sprite = read_aseprite(cell.output)
+    except (OSError, ValueError) as e:
+        print(f"Warning: {cell.output} not added to the pixel store: {e}")
+        return
+    pixels.add(cell_sprite_key(cell), sprite.frames[0], sprite.width, sprite.height)
+
+
+def main() -> None:
+    parser = build_arg_parser()
+    args = parser.parse_args()
+
+    collaterals = load_collaterals(COLLATERAL_FILES)
+    if args.collaterals:
+        wanted = [name.strip() for name in args.collaterals.split(',') if name.strip()]
+        known = {c.name for c in collaterals}
+        unknown = [name for name in wanted if name not in known]
+        if unknown:
+            parser.error(f"unknown collateral(s): {', '.join(unknown)}")
+        collaterals = [c for c in collaterals if c.name in wanted]
+
+    sources = load_sources(EYE_SHAPES_ROOT, [] if args.no_collateral_eyes else collaterals)
+    cells = plan_matrix(sources, collaterals, Path(args.output))
+    tool_files = NATIVE_TOOL_FILES if args.backend == 'native' else ASEPRITE_TOOL_FILES
+    tools = f"{args.backend}\0{tool_fingerprint(Path('.'), tool_files)}"
+    hashes = {cell.key: cell_hash(cell, tools) for cell in cells}
+
+    store = None if args.no_dedup else AssetStore(Path(args.output) / '.store')
+    ledger = CompletionLedger(Path(args.ledger))
+    if ledger.lines > 2 * max(len(ledger.entries), 1000):
+        ledger.compact()
+    pixels = None
+    if args.pixel_store:
+        pixels = PixelStoreBuilder(Path(args.pixel_store))
+        pixels.load_existing()
+    pending = [c for c in cells if args.force or not ledger.is_fresh(c.key, hashes[c.key])
+               or (pixels is not None and cell_sprite_key(c) not in pixels)]
+
+    print(f"Matrix: {len(sources)} eye shape source(s) x {len(collaterals)} collateral(s) -> "
+          f"{len(cells)} cell(s), {len(cells) - len(pending)} up to date, {len(pending)} to render")
+    if args.dry_run:
+        counts: Dict[str, int] = {}
+        for cell in pending:
+            counts[cell.collateral] = counts.get(cell.collateral, 0) + 1
+        for name, count in counts.items():
+            print(f"  {name}: {count} cell(s)")
+        return
+
+    if args.adopt_existing:
+        adopted = [c for c in pending if c.output.exists()]
+        for cell in adopted:
+            ledger.record(cell.key, hashes[cell.key], 'ok', [cell.output])
+            if pixels is not None:
+                collect_cell(pixels, cell, 'ok')
+        pending = [c for c in pending if not c.output.exists()]
+        print(f"Adopted {len(adopted)} existing output(s), {len(pending)} left to render")
+
+    if not pending:
+        ledger.close()
+        if pixels is not None and pixels.added:
+            pixels.save()
+        return
+
+    counts = {'ok': 0, 'empty': 0, 'error': 0}
+    counts_lock = threading.Lock()
+    start = time.perf_counter()
+
+    def record_cell(cell: Cell, status: str) -> None:
+        with counts_lock:
+            counts[status] = counts.get(status, 0) + 1
+        if status == 'error':
+            return
+        outputs = [cell.output] if status == 'ok' else []
+        if status == 'ok' and store is not None and args.backend == 'aseprite':
+            store.put_file(cell.output)
+        if status == 'empty':
+            print(f"  ERROR: 0 pixels: {cell.key}")
+        if pixels is not None:
+            collect_cell(pixels, cell, status)
+        ledger.record(cell.key, hashes[cell.key], status, outputs)
+
+    try:
+        if args.backend == 'native':
+            by_key = {cell.key: cell for cell in pending}
+
+            def record_source(source_key, results, done, total):
+                for key, status, _ in results:
+                    record_cell(by_key[key], status)
+                print(f"[{done}/{total}] {source_key}: {len(results)} cell(s)")
+
+            run_native(pending, args.jobs, record_source, store)
+        else:
+            run_aseprite(pending, args.jobs, record_cell)
+    finally:
+        ledger.close()
+        if pixels is not None:
+            pixels.save()
+
+    elapsed = time.perf_counter() - start
+    print(f"Rendered {counts['ok']} cell(s) in {elapsed:.1f}s "
+          f"({counts['empty']} empty, {counts['error']} failed)")
+    if counts['error']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
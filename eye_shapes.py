@@ -0,0 +1,283 @@
+"""
+Eye shape x collateral x rarity matrix (what eye-shapes-batch.lua renders).
+
+eye-shapes-batch.lua renders, for one collateral, every *_front/_left/_right
+SVG of the examples/eye_shapes/haunt1_* and haunt2_* sets in seven rarity
+variants: the eye color of the rarity (the collateral's primary color for
+'common') with .gotchi-primary in the collateral's primary color. This module
+loads those sources once, plans every cell of the matrix and ports the
+script's preprocessing (ensureWrappedSVG, rectsToPaths, applyColors) so cells
+can be rendered without Aseprite, pixel for pixel like the Lua renderer.
+
+Cells of one source only differ in the two CSS fills, so render_source()
+rasterizes a source once with placeholder fills and recolors it per cell
+(see collateral_palette.py).
+
+    sources = load_sources(collaterals=load_collaterals())
+    cells = plan_matrix(sources, load_collaterals(), Path('output'))
+"""
+import hashlib
+import math
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from aseprite_file import encode_aseprite, write_aseprite
+from asset_store import AssetStore
+from collateral_palette import Collateral, check_placeholders, mask_from_render
+from svg_renderer import lua_tonumber, parse_svg, place_pixels, render
+
+EYE_SHAPES_ROOT = Path('examples/eye_shapes')
+SET_PATTERNS = ('haunt1_*', 'haunt2_*')
+VIEW_SUFFIXES = ('_front.svg', '_left.svg', '_right.svg')
+SIZE = 64
+
+# Rarity eye colors (hex without '#'); 'common' takes the collateral's primary
+RARITY_COLORS = {
+    'mythical_low': 'FF00FF',
+    'rare_low': '0064FF',
+    'uncommon_low': '5D24BF',
+    'uncommon_high': '36818E',
+    'rare_high': 'EA8C27',
+    'mythical_high': '51FFA8',
+}
+VARIANTS = ['mythical_low', 'rare_low', 'uncommon_low', 'common', 'uncommon_high', 'rare_high', 'mythical_high']
+
+# Placeholder fills for render_source(); a source using one is rendered per cell
+PLACEHOLDERS = {
+    'eye': '#fe0001',
+    'primary': '#fe0002',
+}
+
+# Scripts that determine a cell's output, per backend
+NATIVE_TOOL_FILES = ['eye_shapes.py', 'collateral_palette.py', 'svg_renderer.py', 'geometry_cache.py',
+                     'aseprite_file.py']
+ASEPRITE_TOOL_FILES = ['eye-shapes-batch.lua', 'svg-parser.lua', 'svg-renderer-professional.lua']
+
+
+@dataclass
+class EyeShapeSource:
+    # Set directory name and file stem, e.g. haunt1_id00_range0-1 / haunt1_id00_front
+    set_name: str
+    base: str
+    svg: str
+    # SVG file, or None for a collateral's own eyeShapeSvgs entry
+    path: Optional[Path] = None
+    # Only planned for this collateral (its own eye shape)
+    collateral: Optional[str] = None
+
+    @property
+    def key(self) -> str:
+        if self.collateral is not None:
+            return f"{self.collateral}/{self.set_name}/{self.base}"
+        return f"{self.set_name}/{self.base}"
+
+    @property
+    def digest(self) -> str:
+        return hashlib.sha256(self.svg.encode()).hexdigest()
+
+
+@dataclass
+class Cell:
+    collateral: str
+    source: EyeShapeSource
+    variant: str
+    # Hex without '#', as eye-shapes-batch.lua passes them
+    eye_hex: str
+    primary_hex: str
+    output: Path
+
+    @property
+    def key(self) -> str:
+        return self.output.as_posix()
+
+
+def load_sources(root: Path = EYE_SHAPES_ROOT, collaterals: Sequence[Collateral] = ()) -> List[EyeShapeSource]:
+    """
+    Eye shape views of the haunt sets under root (sets and views sorted as
+    the Lua script lists them), followed by the front view of every given
+    collateral's own eye shape (set collateral_idNN).
+    """
+    root = Path(root)
+    sources = []
+    for pattern in SET_PATTERNS:
+        for set_dir in sorted(p for p in root.glob(pattern) if p.is_dir()):
+            for path in sorted(set_dir.glob('*.svg')):
+                if path.name.endswith(VIEW_SUFFIXES):
+                    sources.append(EyeShapeSource(set_dir.name, path.stem, path.read_text(), path))
+    for collateral in collaterals:
+        for i, svg in enumerate(collateral.eye_shape_svgs):
+            set_name = f"collateral_id{collateral.eye_shape_svg_id}"
+            base = f"{set_name}_front" if i == 0 else f"{set_name}_{i:02d}_front"
+            sources.append(EyeShapeSource(set_name, base, svg, collateral=collateral.name))
+    return sources
+
+
+def variant_colors(primary_hex: str) -> List[Tuple[str, str, str]]:
+    """(variant, eye hex, primary hex) in the order the Lua script renders them"""
+    return [(variant, RARITY_COLORS.get(variant, primary_hex), primary_hex) for variant in VARIANTS]
+
+
+def output_path(output_root: Path, collateral: str, source: EyeShapeSource, variant: str) -> Path:
+    # output/<collateral>/eye shape/<set>/<base>_<variant>.aseprite
+    return Path(output_root) / collateral / 'eye shape' / source.set_name / f"{source.base}_{variant}.aseprite"
+
+
+def plan_matrix(sources: Sequence[EyeShapeSource], collaterals: Sequence[Collateral],
+                output_root: Path = Path('output')) -> List[Cell]:
+    """Every cell of the matrix, grouped by collateral"""
+    cells = []
+    for collateral in collaterals:
+        primary_hex = collateral.primary_color.lstrip('#').lower()
+        for source in sources:
+            if source.collateral not in (None, collateral.name):
+                continue
+            for variant, eye_hex, primary in variant_colors(primary_hex):
+                cells.append(Cell(collateral.name, source, variant, eye_hex, primary,
+                                  output_path(output_root, collateral.name, source, variant)))
+    return cells
+
+
+def cell_hash(cell: Cell, tools: str) -> str:
+    """Hash of everything that determines a cell's output"""
+    digest = hashlib.sha256()
+    digest.update(f"tools\0{tools}\n".encode())
+    digest.update(f"svg\0{cell.source.digest}\n".encode())
+    digest.update(f"colors\0{cell.eye_hex}\0{cell.primary_hex}\n".encode())
+    return digest.hexdigest()
+
+
+# ============================================================================
+# PREPROCESSING (eye-shapes-batch.lua)
+# ============================================================================
+
+_RECT = re.compile(r'<rect\s*?[^>]*?/>')
+
+
+def ensure_wrapped_svg(svg: str) -> str:
+    if '<svg' in svg and 'viewBox="' in svg:
+        return svg
+    cleaned = re.sub(r'<\?xml.*?\?>', '', svg, flags=re.S)
+    return f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 64 64">{cleaned}</svg>'
+
+
+def _number(rect: str, pattern: str) -> float:
+    # tonumber(rectStr:match(pattern) or '0') or 0
+    match = re.search(pattern, rect)
+    return lua_tonumber(match.group(1) if match else '0') or 0
+
+
+def _rect_to_path(match: re.Match) -> str:
+    rect = match.group(0)
+    x = _number(rect, r'x="([-\d.]+)"')
+    y = _number(rect, r'y="([-\d.]+)"')
+    w = _number(rect, r'width="([-\d.]+)"')
+    h = _number(rect, r'height="([-\d.]+)"')
+
+    angle = cx = cy = None
+    transform = re.search(r'transform="([^"]*)"', rect)
+    if transform:
+        rotate = re.search(r'rotate\(([-\d.]+)\s+([-\d.]+)\s+([-\d.]+)\)', transform.group(1))
+        if rotate:
+            angle = lua_tonumber(rotate.group(1)) or 0
+            cx = lua_tonumber(rotate.group(2))
+            cx = cx if cx is not None else x + w / 2
+            cy = lua_tonumber(rotate.group(3))
+            cy = cy if cy is not None else y + h / 2
+        else:
+            rotate = re.search(r'rotate\(([-\d.]+)\)', transform.group(1))
+            if rotate:
+                angle = lua_tonumber(rotate.group(1)) or 0
+                cx, cy = x + w / 2, y + h / 2
+
+    def rot(px, py):
+        if angle is None:
+            return px, py
+        rad = angle * math.pi / 180
+        cos_a, sin_a = math.cos(rad), math.sin(rad)
+        dx, dy = px - cx, py - cy
+        return cx + dx * cos_a - dy * sin_a, cy + dx * sin_a + dy * cos_a
+
+    points = [rot(x, y), rot(x + w, y), rot(x + w, y + h), rot(x, y + h)]
+    d = "M %g %g L %g %g L %g %g L %g %g Z" % tuple(v for point in points for v in point)
+    return f'<path d="{d}"/>'
+
+
+def rects_to_paths(svg: str) -> str:
+    """<rect .../> as equivalent <path/>s, rotate() transforms applied (no fill kept)"""
+    return _RECT.sub(_rect_to_path, svg)
+
+
+def apply_eye_colors(svg: str, eye_hex: str, primary_hex: str) -> str:
+    """Replace the SVG's styles with the .gotchi-eyeColor / .gotchi-primary fills"""
+    stripped = re.sub(r'<style>.*?</style>', '', svg, flags=re.S)
+    style = f'<style>.gotchi-eyeColor{{fill:#{eye_hex}}}.gotchi-primary{{fill:#{primary_hex}}}</style>'
+    injected = re.sub(r'(<svg[^>]*>)', lambda m: m.group(1) + style, stripped, count=1)
+    if injected == stripped:
+        injected = style + stripped
+    return injected
+
+
+def prepare_svg(svg: str, eye_hex: str, primary_hex: str) -> str:
+    """The SVG eye-shapes-batch.lua hands to the parser for one cell"""
+    return apply_eye_colors(rects_to_paths(ensure_wrapped_svg(svg)), eye_hex, primary_hex)
+
+
+def render_cell(svg: str, eye_hex: str, primary_hex: str) -> Optional[bytearray]:
+    """RGBA pixels of one cell rendered directly, or None when nothing is drawn"""
+    result = render(parse_svg(prepare_svg(svg, eye_hex, primary_hex)), SIZE, SIZE)
+    if not result.pixels:
+        return None
+    return place_pixels(result, (0, 0), SIZE)
+
+
+# (cell key, eye hex, primary hex, output path)
+CellSpec = Tuple[str, str, str, str]
+
+
+def render_source(svg: str, cells: Iterable[CellSpec],
+                  store_root: Optional[str] = None) -> List[Tuple[str, str, Optional[str]]]:
+    """
+    Render the cells of one source and write their .aseprite files (through
+    the asset store at store_root, if given).
+    Returns (cell key, 'ok' | 'empty', output or None) per cell; an empty
+    cell (0 pixels, an error in the Lua script) writes nothing.
+    """
+    store = AssetStore(Path(store_root)) if store_root is not None else None
+    mask = None
+    try:
+        check_placeholders(svg, PLACEHOLDERS)
+        placeholders = {slot: color.lstrip('#') for slot, color in PLACEHOLDERS.items()}
+        prepared = prepare_svg(svg, placeholders['eye'], placeholders['primary'])
+        mask = mask_from_render(render(parse_svg(prepared), SIZE, SIZE), PLACEHOLDERS)
+    except ValueError:
+        pass
+    empty = mask is not None and mask.pixel_count == 0
+
+    results = []
+    for key, eye_hex, primary_hex, output in cells:
+        if empty:
+            rgba = None
+        elif mask is not None:
+            rgba = mask.recolor({'eye': '#' + eye_hex, 'primary': '#' + primary_hex})
+        else:
+            rgba = render_cell(svg, eye_hex, primary_hex)
+        if rgba is None:
+            results.append((key, 'empty', None))
+            continue
+        if store is not None:
+            store.put(Path(output), encode_aseprite(rgba, SIZE, SIZE))
+        else:
+            Path(output).parent.mkdir(parents=True, exist_ok=True)
+            write_aseprite(output, rgba, SIZE, SIZE)
+        results.append((key, 'ok', output))
+    return results
+
+
+def group_by_source(cells: Iterable[Cell]) -> Dict[str, List[Cell]]:
+    """Cells keyed by source, in plan order"""
+    groups: Dict[str, List[Cell]] = {}
+    for cell in cells:
+        groups.setdefault(cell.source.key, []).append(cell)
+    return groups
@@ -1,436 +1,603 @@
 #!/usr/bin/env python3
 """
-Generate all 4 views (front, left, right, back) for a wearable item
-Usage: python3 generate-item-all-views.py [item_id]
-Example: python3 generate-item-all-views.py 11
+Generate all 4 views (front, left, right, back) for one or more wearable items
+Usage: python3 generate-single-item-all-views.py [item_spec] [--jobs N] [--force] [--converter worker|shell|python|native]
+                                                  [--in-memory] [--clean-tmp] [--metrics PATH] [--profile [PATH]]
+                                                  [--no-dedup] [--pixel-store PATH [--pixel-store-only]]
+                                                  [--watch [--watch-interval SECONDS]]
+Examples:
+  python3 generate-single-item-all-views.py 11
+  python3 generate-single-item-all-views.py 1-20,25,30
+  python3 generate-single-item-all-views.py all
+
+The wearables JSON and the wearables DB are opened once per run through their
+on-disk indexes (wearables_data.py), so a batch of items is streamed through
+the body/non-body branches in a single process, decoding one record at a time.
+View conversions run on a bounded pool of concurrent Aseprite workers (--jobs).
+By default each worker is a persistent aseprite-worker.lua process fed through
+a job queue; --converter shell runs ./batch-process.sh once per view instead,
+--converter python renders PNG previews with svg_renderer.py and --converter
+native writes the .aseprite files themselves (aseprite_file.py), both without
+Aseprite.
+Views whose SVG inputs and converter scripts are unchanged since their last
+successful conversion are skipped (see build_cache.py); --force reconverts.
+--in-memory hands the prepared SVGs to the worker/Python converters directly
+instead of writing them under tmp/; --clean-tmp removes the tmp/ directory of
+every item that converted successfully.
+--metrics writes per-stage and per-view timings as JSON lines, --profile adds
+cProfile stats for the Python side (see pipeline_metrics.py).
+Converted files go through the content-addressed store in output/.store, so
+identical outputs share one blob (see asset_store.py); --no-dedup writes
+plain files.
+--pixel-store also collects every rendered sprite into one memory-mappable
+file addressed by (item id, view, pose, collateral) (see pixel_store.py);
+with --pixel-store-only (python/native converters) no per-view files are
+written at all.
+--watch keeps running after the conversion and reconverts only the views
+whose sources changed (see source_watch.py).
 """
+import argparse
+import functools
 import json
 from pathlib import Path
-import xml.etree.ElementTree as ET
-from copy import deepcopy
+import shutil
 import subprocess
 import sys
+import threading
+import time
+
+from aseprite_file import read_aseprite
+from aseprite_worker import WorkerPool
+from asset_store import AssetStore
+from build_cache import NATIVE_TOOL_FILES, PYTHON_TOOL_FILES, BuildCache, expected_outputs, tool_fingerprint
+from collateral_palette import COLLATERAL_FILES, load_collaterals
+from conversion_jobs import JobScheduler, fail_result, run_batch_process, run_python_render
+from pipeline_metrics import Metrics, Profiler
+from pixel_store import PixelStoreBuilder, sprite_key
+from item_preparation import (
+    DB_JSON_PATHS, EXAMPLES, JSON_PATHS, PreparedSVGs, body_flags_from, find_first_existing, is_body_item_for,
+    load_db_wearables, load_wearables, parse_item_spec, prepare_item, sanitize_filename,
+)
+from source_watch import VIEWS, RecordSnapshot, SourceWatcher, changed_views
+from svg_fragments import example_library
 
-SVG_NS = 'http://www.w3.org/2000/svg'
-ET.register_namespace('', SVG_NS)
 ROOT = Path('.')
 
-# Get item ID from command line or default to 8
-item_id = sys.argv[1] if len(sys.argv) > 1 else '8'
-print(f"Processing item {item_id}...")
-
-# Load JSON data - check multiple possible locations
-json_paths = [
-    'wearables-1-420.json',
-    'wearables-1-20.json',
-    '../AavegotchiQuerey/wearables-1-420.json',
-    '../AavegotchiQuerey/wearables-1-20.json',
-    '/Users/juliuswong/Dev/AavegotchiQuerey/wearables-1-420.json',
-    '/Users/juliuswong/Dev/AavegotchiQuerey/wearables-1-20.json'
+examples = ROOT / EXAMPLES
+
+# View whose conversion reads an examples/svgItems file, by file name suffix
+# (the globs in item_preparation.prepare_body_item)
+EXAMPLE_VIEWS = [
+    ('SideLeftUp.svg', 'Left'),
+    ('SideLeftDown.svg', 'Left'),
+    ('SideRightUp.svg', 'Right'),
+    ('SideRightDown.svg', 'Right'),
+    ('BackLeftUp.svg', 'Back'),
+    ('BackLeft.svg', 'Back'),
+    ('BackRightUp.svg', 'Back'),
+    ('BackRight.svg', 'Back'),
 ]
 
-json_path = None
-for path in json_paths:
-    if Path(path).exists():
-        json_path = path
-        break
-
-if not json_path:
-    print("Error: Could not find wearables-1-20.json")
-    print("Searched in:", json_paths)
-    sys.exit(1)
-
-with open(json_path, 'r') as f:
-    data = json.load(f)
-    if item_id not in data['wearables']:
-        print(f"Error: Item {item_id} not found in wearables JSON")
+# Stage timings of the current run (see pipeline_metrics.py); main() replaces
+# it with one that writes --metrics
+metrics = Metrics()
+
+
+def print_item_done(item_id, item_name_safe, is_body_item):
+    if is_body_item:
+        print(f"\n✅ Item {item_id}: all 4 views generated successfully!")
+        print("Output locations:")
+        print(f"  - Front: output/{item_id}_{item_name_safe}/Front/")
+        print(f"  - Left:  output/{item_id}_{item_name_safe}/Left/")
+        print(f"  - Right: output/{item_id}_{item_name_safe}/Right/")
+        print(f"  - Back:  output/{item_id}_{item_name_safe}/Back/")
+    else:
+        print(f"\n✅ Item {item_id}: non-body item generated successfully!")
+        print(f"Output location: output/{item_id}_{item_name_safe}/")
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(
+        description="Generate all 4 views (front, left, right, back) for wearable items."
+    )
+    parser.add_argument(
+        "items",
+        nargs="?",
+        default="8",
+        help="Item id, range or list (e.g. 11, 1-20, 1,5,9-12) or 'all' (default: 8).",
+    )
+    parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=1,
+        help="Number of concurrent Aseprite conversions (default: 1).",
+    )
+    parser.add_argument(
+        "--stop-on-error",
+        action="store_true",
+        help="Fail fast: stop scheduling conversions after the first failure.",
+    )
+    parser.add_argument(
+        "--converter",
+        choices=["worker", "shell", "python", "native"],
+        default="worker",
+        help="worker: persistent Aseprite worker processes (default); "
+             "shell: one ./batch-process.sh run per view; "
+             "python: render .png previews with svg_renderer.py, no Aseprite needed; "
+             "native: render with svg_renderer.py and write .aseprite files directly.",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Reconvert every view, ignoring the build cache.",
+    )
+    parser.add_argument(
+        "--in-memory",
+        action="store_true",
+        help="Pass the prepared SVGs straight to the converter instead of writing "
+             "them under tmp/ (worker, python and native converters only).",
+    )
+    parser.add_argument(
+        "--clean-tmp",
+        action="store_true",
+        help="Remove the tmp/ directory of each item that converted successfully.",
+    )
+    parser.add_argument(
+        "--metrics",
+        metavar="PATH",
+        help="Append per-stage and per-view timings as JSON lines to PATH.",
+    )
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const=".build-cache/generate.prof",
+        metavar="PATH",
+        help="Profile the Python side with cProfile and write the stats to PATH "
+             "(default: .build-cache/generate.prof).",
+    )
+    parser.add_argument(
+        "--cache",
+        default=".build-cache/manifest.json",
+        help="Build cache manifest path (default: .build-cache/manifest.json).",
+    )
+    parser.add_argument(
+        "--no-dedup",
+        action="store_true",
+        help="Write outputs as plain files instead of through the output/.store content store.",
+    )
+    parser.add_argument(
+        "--pixel-store",
+        metavar="PATH",
+        help="Also collect the rendered sprites into one pixel store file at PATH "
+             "(updated incrementally, see pixel_store.py).",
+    )
+    parser.add_argument(
+        "--pixel-store-only",
+        action="store_true",
+        help="Write only the --pixel-store file, no per-view output files "
+             "(python and native converters only).",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="After converting, keep watching the wearables JSON, the DB, examples/svgItems "
+             "and the collateral JSONs and reconvert only the views whose sources changed.",
+    )
+    parser.add_argument(
+        "--watch-interval",
+        type=float,
+        default=0.5,
+        metavar="SECONDS",
+        help="Polling interval of --watch (default: 0.5).",
+    )
+    return parser
+
+
+def print_summary(results):
+    succeeded = [r for r in results if r['ok']]
+    failed = [r for r in results if not r['ok']]
+
+    print("\n== Summary ==")
+    for r in results:
+        mark = '✓' if r['ok'] else '✗'
+        line = f"  {mark} {r['item_id']:>4} {r['name']} ({r['elapsed']:.1f}s)"
+        if not r['ok']:
+            line += f" - {r['error']}"
+        print(line)
+    print(f"Succeeded: {len(succeeded)}")
+    print(f"Failed:    {len(failed)}")
+
+
+class ItemTracker:
+    """Collects per-item results while view jobs complete on worker threads"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.items = {}
+        self.order = []
+
+    def add(self, item_id, name, is_body_item, jobs=(), error=None, skipped=0):
+        with self.lock:
+            self.order.append(item_id)
+            self.items[item_id] = {
+                'item_id': item_id, 'name': name, 'is_body': is_body_item,
+                'pending': len(jobs), 'ok': error is None, 'error': error,
+                'start': time.perf_counter(), 'elapsed': 0.0, 'skipped': skipped,
+            }
+            if error is not None or not jobs:
+                self.items[item_id]['pending'] = 0
+            if error is None and not jobs and skipped:
+                print(f"✓ Item {item_id}: all {skipped} view(s) up to date, nothing to convert")
+
+    def job_done(self, result):
+        job = result.job
+        lines = []
+        if result.ok:
+            lines.append(f"✓ {job.label} view completed ({result.elapsed:.1f}s)")
+            lines.extend(f"  Renamed: {r}" for r in result.renamed)
+        else:
+            lines.append(f"✗ {job.label} view failed (exit {result.returncode}, {result.elapsed:.1f}s):")
+            lines.append(result.stderr)
+
+        with self.lock:
+            entry = self.items[job.item_id]
+            entry['pending'] -= 1
+            if not result.ok and entry['ok']:
+                entry['ok'] = False
+                entry['error'] = f"{job.view_name} view failed"
+            entry['elapsed'] = time.perf_counter() - entry['start']
+            finished = entry['pending'] == 0
+            print('\n'.join(lines), flush=True)
+            if finished and entry['ok']:
+                print_item_done(job.item_id, entry['name'], entry['is_body'])
+
+    def results(self):
+        results = []
+        for item_id in self.order:
+            entry = self.items[item_id]
+            if entry['ok'] and entry['pending'] > 0:
+                # Jobs never ran (cancelled after an earlier failure)
+                entry['ok'] = False
+                entry['error'] = 'cancelled'
+            results.append(entry)
+        return results
+
+
+def clean_tmp(results):
+    """Remove the tmp/ directories of successfully converted items"""
+    removed = 0
+    for r in results:
+        temp_dir = ROOT / f"tmp/{r['item_id']}_{r['name']}"
+        if r['ok'] and temp_dir.is_dir():
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            removed += 1
+    if removed:
+        print(f"Removed {removed} tmp/ item director{'y' if removed == 1 else 'ies'}")
+
+
+def main():
+    global metrics
+    parser = build_arg_parser()
+    args = parser.parse_args()
+    if args.in_memory and args.converter == "shell":
+        parser.error("--in-memory needs --converter worker, python or native "
+                     "(./batch-process.sh converts a directory of SVG files)")
+    if args.pixel_store_only and (not args.pixel_store or args.converter not in ("python", "native")):
+        parser.error("--pixel-store-only needs --pixel-store and --converter python or native")
+    metrics = Metrics(Path(args.metrics) if args.metrics else None)
+    profiler = Profiler(Path(args.profile)) if args.profile else None
+    try:
+        generate(args, profiler)
+    finally:
+        if args.metrics or profiler is not None:
+            metrics.print_summary()
+        else:
+            metrics.summary()
+        metrics.close()
+        if profiler is not None:
+            profiler.dump()
+
+
+def generate(args, profiler=None):
+    json_path = find_first_existing(JSON_PATHS)
+    if not json_path:
+        print("Error: Could not find wearables-1-20.json")
+        print("Searched in:", JSON_PATHS)
         sys.exit(1)
-    item = data['wearables'][item_id]
-    item_name = item.get('name', f'Item{item_id}')
-    print(f"Item name: {item_name}")
-
-# Check if it's a body item by loading aavegotchi_db_wearables.json
-db_json_paths = [
-    'aavegotchi_db_wearables.json',
-    '../AavegotchiQuerey/aavegotchi_db_wearables.json',
-    '/Users/juliuswong/Dev/AavegotchiQuerey/aavegotchi_db_wearables.json'
-]
 
-db_json_path = None
-for path in db_json_paths:
-    if Path(path).exists():
-        db_json_path = path
-        break
+    with metrics.stage('load_wearables'):
+        wearables = load_wearables(json_path)
 
-is_body_item = False
-if db_json_path:
     try:
-        with open(db_json_path, 'r') as f:
-            db_data = json.load(f)
-            # Find item by ID in the wearables array
-            for wearable in db_data.get('wearables', []):
-                if wearable.get('id') == int(item_id):
-                    slot_positions = wearable.get('slotPositions', [])
-                    is_body_item = slot_positions[0] if len(slot_positions) > 0 else False
-                    break
-    except Exception as e:
-        print(f"Warning: Could not check body item status: {e}")
-        # Default to body item if we can't check
-        is_body_item = True
-
-print(f"Is body item: {is_body_item}")
-
-# Sanitize item name for filename
-def sanitize_filename(name):
-    # Remove or replace characters that cause filesystem issues
-    name = name.replace(' ', '').replace("'", "").replace("-", "").replace(".", "")
-    name = name.replace("/", "").replace("\\", "").replace(":", "").replace("*", "")
-    name = name.replace("?", "").replace("\"", "").replace("<", "").replace(">", "")
-    name = name.replace("|", "")
-    return name
-
-item_name_safe = sanitize_filename(item_name)
-
-examples = ROOT / 'examples/svgItems'
-
-def extract_groups(svg_text, class_names):
-    """Extract groups by class from SVG text"""
-    # Strip backticks if present (some JSON entries have them)
-    svg_text = svg_text.strip().strip('`')
-    root = ET.fromstring(svg_text)
-    groups = {}
-    for elem in root.findall(f'.//{{{SVG_NS}}}g'):
-        cls = elem.get('class', '')
-        for name in class_names:
-            if name in cls and name not in groups:
-                groups[name] = deepcopy(elem)
-                break
-    return groups
-
-def write_svg_file(path, elements):
-    """Write SVG file with given elements"""
-    svg = ET.Element(f'{{{SVG_NS}}}svg', {'xmlns': SVG_NS, 'viewBox': '0 0 64 64'})
-    for elem in elements:
-        if elem is not None:
-            svg.append(elem)
-    path.write_text(ET.tostring(svg, encoding='unicode'))
-
-if not is_body_item:
-    # ===== NON-BODY ITEMS: SIMPLE STRUCTURE =====
-    print("\nProcessing non-body item with simple structure...")
-    
-    # Create single output directory
-    output_base = ROOT / f'output/{item_id}_{item_name_safe}'
-    output_base.mkdir(parents=True, exist_ok=True)
-    
-    # Create temp directory for SVGs
-    temp_dir = ROOT / f'tmp/{item_id}_{item_name_safe}'
-    temp_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Process each view and create single SVG files
-    views_data = [
-        ('front', item['sides']['Front']),
-        ('back', item['sides']['Back']),
-        ('left', item['sides']['Left']),
-        ('right', item['sides']['Right']),
-    ]
-    
-    # Process each view separately to avoid duplicates
-    print("\nSVG files prepared. Now running batch converter...")
-    view_idx_map = {'front': 0, 'back': 3, 'left': 1, 'right': 2}
-    view_suffix_map = {'front': 'front', 'back': 'back', 'left': 'left', 'right': 'right'}
-    
-    for view_name, view_data in views_data:
-        print(f"\nProcessing {view_name.upper()} view...")
-        view_svg = view_data['svg'].strip().strip('`')
-        try:
-            view_root = ET.fromstring(view_svg)
-        except ET.ParseError as e:
-            print(f"✗ Error parsing SVG for {view_name} view: {e}")
-            print(f"  Skipping this view...")
-            continue
-        
-        # Extract all wearable groups
-        svg_elem = ET.Element(f'{{{SVG_NS}}}svg', {'xmlns': SVG_NS, 'viewBox': '0 0 64 64'})
-        for g in view_root.findall(f'.//{{{SVG_NS}}}g'):
-            if 'gotchi-wearable' in g.get('class', ''):
-                svg_elem.append(deepcopy(g))
-        
-        # Create separate temp directory for this view
-        view_temp_dir = temp_dir / view_name
-        view_temp_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Write SVG file
-        svg_file = view_temp_dir / f'{item_id}_{item_name_safe}_{view_name}.svg'
-        svg_file.write_text(ET.tostring(svg_elem, encoding='unicode'))
-        
-        # Convert this view
-        view_idx = view_idx_map[view_name]
-        print(f"Converting {view_name} view (index {view_idx})...")
-        result = subprocess.run(
-            ['./batch-process.sh', str(view_temp_dir), str(output_base), str(view_idx)],
-            capture_output=True,
-            text=True
-        )
-        if result.returncode == 0:
-            print(f"✓ {view_name} view completed")
-            
-            # Rename files to remove duplicate view suffix
-            view_suffix = view_suffix_map[view_name]
-            for aseprite_file in output_base.glob(f'*_{view_name}_{view_suffix}.aseprite'):
-                old_name = aseprite_file.name
-                base_without_ext = old_name[:-len('.aseprite')]
-                # Remove the duplicate suffix (e.g., _front_front -> _front)
-                if base_without_ext.endswith(f'_{view_name}_{view_suffix}'):
-                    new_name = base_without_ext[:-len(f'_{view_suffix}')] + '.aseprite'
-                    new_path = output_base / new_name
-                    aseprite_file.rename(new_path)
-                    print(f"  Renamed: {old_name} → {new_name}")
-        else:
-            print(f"✗ {view_name} view failed:")
-            print(result.stderr)
-            sys.exit(1)
-    
-    print(f"\n✅ Non-body item generated successfully!")
-    print(f"Output location: output/{item_id}_{item_name_safe}/")
-    
-else:
-    # ===== BODY ITEMS: COMPLEX STRUCTURE WITH SLEEVES =====
-    print("\nProcessing body item with complex structure...")
-
-    # ===== FRONT VIEW =====
-    print("Processing FRONT view...")
-    front_svg = item['sides']['Front']['svg']
-    front_groups = extract_groups(front_svg, ['gotchi-wearable wearable-body'])
-
-    # Extract sleeves from sleeves array
-    sleeves = item.get('sleeves', [])
-    def extract_sleeve_group(svg_text, class_pattern):
-        # Handle None or empty strings
-        if not svg_text or svg_text is None:
-            return None
-        # Strip backticks if present
-        svg_text = svg_text.strip().strip('`')
-        if not svg_text:
-            return None
+        item_ids = parse_item_spec(args.items, wearables.keys())
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+    # Check if it's a body item by loading aavegotchi_db_wearables.json
+    db_json_path = find_first_existing(DB_JSON_PATHS)
+    with metrics.stage('load_db'):
+        db_records = load_db_wearables(db_json_path) if db_json_path else {}
+        body_flags = body_flags_from(db_records)
+
+    # Per-view SVGs go to tmp/, or straight to the converters with --in-memory
+    prepared = PreparedSVGs(args.in_memory, metrics)
+
+    cache_path = Path(args.cache)
+    if args.pixel_store_only:
+        # Views converted without output files must not look fresh to a normal run
+        cache_path = cache_path.with_name(f"{cache_path.stem}-pixel-store{cache_path.suffix}")
+    if args.converter == "python":
+        cache = BuildCache(cache_path, tool_fingerprint(files=PYTHON_TOOL_FILES))
+    elif args.converter == "native":
+        cache = BuildCache(cache_path, tool_fingerprint(files=NATIVE_TOOL_FILES))
+    else:
+        cache = BuildCache(cache_path)
+    # Replaced by every convert() call
+    tracker = ItemTracker()
+    store = None if args.no_dedup else AssetStore(ROOT / 'output/.store')
+    # Aseprite writes its own files; they are moved into the store afterwards
+    store_outputs = store is not None and args.converter not in ("python", "native")
+
+    pixels = None
+    if args.pixel_store:
+        pixels = PixelStoreBuilder(Path(args.pixel_store))
+        with metrics.stage('load_pixel_store'):
+            loaded = pixels.load_existing()
+        if loaded:
+            print(f"Pixel store: {loaded} sprite(s) loaded from {args.pixel_store}")
+
+    def collect_pixels(job):
+        """Add a converted view to the pixel store; outputs nothing was rendered for are stored empty"""
+        for path in expected_outputs(job):
+            key = sprite_key(path)
+            if key in pixels.added:
+                continue
+            if job.output_ext == '.aseprite' and path.exists():
+                try:
+                    sprite = read_aseprite(path)
+                except (OSError, ValueError) as e:
+                    print(f"Warning: {path} not added to the pixel store: {e}")
+                    continue
+                pixels.add(key, sprite.frames[0], sprite.width, sprite.height)
+            else:
+                pixels.add_empty(key)
+
+    def on_done(result):
         try:
-            root = ET.fromstring(svg_text)
-            for g in root.findall(f'.//{{{SVG_NS}}}g'):
-                cls = g.get('class', '')
-                if class_pattern in cls:
-                    return deepcopy(g)
-        except ET.ParseError:
-            return None
-        return None
+            if result.ok and store_outputs:
+                for path in expected_outputs(result.job):
+                    if path.exists():
+                        store.put_file(path)
+            if result.ok and pixels is not None:
+                collect_pixels(result.job)
+            if result.ok and result.job.input_hash is not None:
+                cache.record(result.job, result.job.input_hash)
+        except (OSError, ValueError) as e:
+            # Not recorded in the build cache: the view is converted again next run
+            fail_result(result, str(e))
+        metrics.view(result)
+        tracker.job_done(result)
+
+    # Persistent workers stay up between --watch updates
+    pool = WorkerPool(max(1, args.jobs)) if args.converter == "worker" else None
+
+    def make_runner():
+        runner = run_batch_process
+        if pool is not None:
+            runner = pool.run_job
+        elif args.converter in ("python", "native"):
+            sink = None
+            if pixels is not None:
+                def sink(path, rgba, width, height):
+                    pixels.add(sprite_key(path), rgba, width, height)
+            runner = functools.partial(run_python_render, db_records=db_records or {}, store=store,
+                                       sink=sink, write_files=not args.pixel_store_only)
+        if profiler is not None:
+            runner = profiler.wrap(runner)
+        return runner
+
+    def convert(item_ids, views=None):
+        """
+        Prepare and convert items; with views ({item id: {'Front', ...}}) only
+        those views of each item are queued. Returns the per-item results.
+        """
+        nonlocal tracker
+        tracker = ItemTracker()
+        if pixels is not None:
+            pixels.added.clear()
+        scheduler = JobScheduler(args.jobs, args.stop_on_error, runner=make_runner(), on_done=on_done)
+        log_per_job = scheduler.max_workers > 1
+        skipped_views = 0
+        if len(item_ids) > 1 or log_per_job:
+            print(f"Converting {len(item_ids)} item(s) with {scheduler.max_workers} concurrent job(s)")
+
+        for item_id in item_ids:
+            if args.stop_on_error and scheduler.failed.is_set():
+                break
+            print(f"Processing item {item_id}...")
+            if item_id not in wearables:
+                print(f"Error: Item {item_id} not found in wearables JSON")
+                tracker.add(item_id, '?', False, error='not found in wearables JSON')
+                if args.stop_on_error:
+                    break
+                continue
+
+            item = wearables[item_id]
+            is_body_item = is_body_item_for(item_id, body_flags, db_json_path is not None)
+            name = sanitize_filename(item.get('name', f'Item{item_id}'))
+            try:
+                with metrics.stage('prepare', item_id=item_id):
+                    jobs = prepare_item(item_id, item, is_body_item, prepared, ROOT, examples, log_per_job)
+            except Exception as e:
+                print(f"✗ Item {item_id} failed: {e}")
+                tracker.add(item_id, name, is_body_item, error=str(e))
+                if args.stop_on_error:
+                    break
+                continue
+            if views is not None:
+                # Non-body items name their views in lower case
+                jobs = [job for job in jobs if job.view_name.capitalize() in views.get(item_id, ())]
+
+            # Preview offsets in the DB record change the rendered output too
+            db_record = db_records.get(int(item_id)) if db_records else None
+            extra = json.dumps(db_record, sort_keys=True)
+            pending = []
+            with metrics.stage('hash', item_id=item_id) as fields:
+                for job in jobs:
+                    if args.converter == "python":
+                        job.output_ext = '.png'
+                    job.input_hash = cache.input_hash(job, extra)
+                    if not args.force and cache.is_fresh(job, job.input_hash) and (
+                            pixels is None or all(sprite_key(p) in pixels for p in expected_outputs(job))):
+                        print(f"↷ {job.view_name} view unchanged, skipping conversion")
+                        skipped_views += 1
+                        continue
+                    pending.append(job)
+                fields['fresh_views'] = len(jobs) - len(pending)
+
+            tracker.add(item_id, name, is_body_item, pending, skipped=len(jobs) - len(pending))
+            for job in pending:
+                print(f"Queued {job.view_name} view (index {job.view_idx})...")
+                scheduler.submit(job)
+
+        with metrics.stage('wait'):
+            try:
+                scheduler.wait()
+            finally:
+                try:
+                    cache.flush()
+                except OSError as e:
+                    print(f"Warning: Build cache not saved: {e}")
+        if pixels is not None:
+            with metrics.stage('save_pixel_store'):
+                pixels.save()
+            print(f"Pixel store: {len(pixels)} sprite(s) in {args.pixel_store}")
+        results = tracker.results()
+        if args.clean_tmp:
+            clean_tmp(results)
+
+        if len(item_ids) > 1:
+            print_summary(results)
+        if skipped_views:
+            print(f"Skipped {skipped_views} unchanged view(s) (use --force to reconvert)")
+        return results
+
+    def reload():
+        """Reopen the wearables JSON and DB after they changed on disk"""
+        nonlocal wearables, db_records, body_flags
+        wearables = load_wearables(json_path)
+        if db_json_path:
+            db_records = load_db_wearables(db_json_path) or {}
+            body_flags = body_flags_from(db_records)
+        return wearables
 
-    # Left/right sleeves up/down
-    # sleeves[0] has all 4, sleeves[1] has left only, sleeves[2] has right only, sleeves[3] has both up
-    left_up = extract_sleeve_group(sleeves[0] if len(sleeves) > 0 and sleeves[0] else None, 'gotchi-sleeves-left gotchi-sleeves-up')
-    left_down = extract_sleeve_group(sleeves[0] if len(sleeves) > 0 and sleeves[0] else None, 'gotchi-sleeves-left gotchi-sleeves-down')
-    right_up = extract_sleeve_group(sleeves[0] if len(sleeves) > 0 and sleeves[0] else None, 'gotchi-sleeves-right gotchi-sleeves-up')
-    right_down = extract_sleeve_group(sleeves[0] if len(sleeves) > 0 and sleeves[0] else None, 'gotchi-sleeves-right gotchi-sleeves-down')
-
-    front_dir = ROOT / f'tmp/{item_id}_{item_name_safe}/Front'
-    front_dir.mkdir(parents=True, exist_ok=True)
-    write_svg_file(front_dir / f'{item_id}_{item_name_safe}_Front.svg', [front_groups['gotchi-wearable wearable-body']])
-
-    # Separate left and right sleeves
-    if left_up is not None:
-        left_up_svg = ET.Element(f'{{{SVG_NS}}}svg', {'xmlns': SVG_NS, 'viewBox': '0 0 64 64'})
-        left_up_svg.append(left_up)
-        (front_dir / f'{item_id}_{item_name_safe}_Front_LeftUp.svg').write_text(ET.tostring(left_up_svg, encoding='unicode'))
-
-    if left_down is not None:
-        left_down_svg = ET.Element(f'{{{SVG_NS}}}svg', {'xmlns': SVG_NS, 'viewBox': '0 0 64 64'})
-        left_down_svg.append(left_down)
-        (front_dir / f'{item_id}_{item_name_safe}_FrontLeft.svg').write_text(ET.tostring(left_down_svg, encoding='unicode'))
-
-    if right_up is not None:
-        right_up_svg = ET.Element(f'{{{SVG_NS}}}svg', {'xmlns': SVG_NS, 'viewBox': '0 0 64 64'})
-        right_up_svg.append(right_up)
-        (front_dir / f'{item_id}_{item_name_safe}_Front_RightUp.svg').write_text(ET.tostring(right_up_svg, encoding='unicode'))
-
-    if right_down is not None:
-        right_down_svg = ET.Element(f'{{{SVG_NS}}}svg', {'xmlns': SVG_NS, 'viewBox': '0 0 64 64'})
-        right_down_svg.append(right_down)
-        (front_dir / f'{item_id}_{item_name_safe}_FrontRight.svg').write_text(ET.tostring(right_down_svg, encoding='unicode'))
-
-    # ===== LEFT VIEW =====
-    print("Processing LEFT view...")
-    left_svg = item['sides']['Left']['svg']
-    left_groups = extract_groups(left_svg, ['gotchi-wearable wearable-body', 'gotchi-wearable gotchi-secondary'])
-
-    left_dir = ROOT / f'tmp/{item_id}_{item_name_safe}/Left'
-    left_dir.mkdir(parents=True, exist_ok=True)
-    body_elements = [left_groups.get('gotchi-wearable wearable-body')]
-    if 'gotchi-wearable gotchi-secondary' in left_groups:
-        body_elements.append(left_groups['gotchi-wearable gotchi-secondary'])
-    write_svg_file(left_dir / f'{item_id}_{item_name_safe}_SideLeft.svg', body_elements)
-
-    # Left sleeves from examples
-    def make_side_sleeve(name, pose):
-        src = ET.fromstring((examples / name).read_text())
-        top = ET.Element(f'{{{SVG_NS}}}svg', {'xmlns': SVG_NS, 'viewBox': '0 0 64 64'})
-        inner = ET.SubElement(top, f'{{{SVG_NS}}}svg', {'x': '20', 'y': '28'})
-        group = ET.SubElement(inner, f'{{{SVG_NS}}}g', {'class': f'gotchi-sleeves gotchi-sleeves-left gotchi-sleeves-{pose}'})
-        for child in list(src):
-            group.append(deepcopy(child))
-        return top
-
-    # Find left sleeve files
-    left_up_files = list(examples.glob(f'{item_id}_*SideLeftUp.svg'))
-    left_down_files = list(examples.glob(f'{item_id}_*SideLeftDown.svg'))
-    if left_up_files:
-        (left_dir / f'{item_id}_{item_name_safe}_SideLeftUp.svg').write_text(ET.tostring(make_side_sleeve(left_up_files[0].name, 'up'), encoding='unicode'))
-    if left_down_files:
-        (left_dir / f'{item_id}_{item_name_safe}_SideLeftDown.svg').write_text(ET.tostring(make_side_sleeve(left_down_files[0].name, 'down'), encoding='unicode'))
-
-    # ===== RIGHT VIEW =====
-    print("Processing RIGHT view...")
-    right_svg = item['sides']['Right']['svg']
-    right_groups = extract_groups(right_svg, ['gotchi-wearable wearable-body', 'gotchi-wearable gotchi-secondary'])
-
-    right_dir = ROOT / f'tmp/{item_id}_{item_name_safe}/Right'
-    right_dir.mkdir(parents=True, exist_ok=True)
-    body_elements = [right_groups.get('gotchi-wearable wearable-body')]
-    if 'gotchi-wearable gotchi-secondary' in right_groups:
-        body_elements.append(right_groups['gotchi-wearable gotchi-secondary'])
-    write_svg_file(right_dir / f'{item_id}_{item_name_safe}_SideRight.svg', body_elements)
-
-    def make_right_sleeve(name, pose):
-        src = ET.fromstring((examples / name).read_text())
-        top = ET.Element(f'{{{SVG_NS}}}svg', {'xmlns': SVG_NS, 'viewBox': '0 0 64 64'})
-        inner = ET.SubElement(top, f'{{{SVG_NS}}}svg', {'x': '20', 'y': '28'})
-        group = ET.SubElement(inner, f'{{{SVG_NS}}}g', {'class': f'gotchi-sleeves gotchi-sleeves-right gotchi-sleeves-{pose}'})
-        for child in list(src):
-            group.append(deepcopy(child))
-        return top
-
-    # Find right sleeve files
-    right_up_files = list(examples.glob(f'{item_id}_*SideRightUp.svg'))
-    right_down_files = list(examples.glob(f'{item_id}_*SideRightDown.svg'))
-    if right_up_files:
-        (right_dir / f'{item_id}_{item_name_safe}_SideRightUp.svg').write_text(ET.tostring(make_right_sleeve(right_up_files[0].name, 'up'), encoding='unicode'))
-    if right_down_files:
-        (right_dir / f'{item_id}_{item_name_safe}_SideRightDown.svg').write_text(ET.tostring(make_right_sleeve(right_down_files[0].name, 'down'), encoding='unicode'))
-
-    # ===== BACK VIEW =====
-    print("Processing BACK view...")
-    back_svg = item['sides']['Back']['svg']
-    # Strip backticks if present
-    back_svg = back_svg.strip().strip('`')
-    back_root = ET.fromstring(back_svg)
-    back_body = None
-    for elem in back_root.findall(f'.//{{{SVG_NS}}}g'):
-        if elem.get('class') == 'gotchi-wearable wearable-body':
-            back_body = deepcopy(elem)
-            # Remove embedded sleeves
-            for child in list(elem):
-                if 'gotchi-sleeves' in child.get('class', ''):
-                    elem.remove(child)
-            break
-
-    back_dir = ROOT / f'tmp/{item_id}_{item_name_safe}/Back'
-    back_dir.mkdir(parents=True, exist_ok=True)
-    write_svg_file(back_dir / f'{item_id}_{item_name_safe}_Back.svg', [back_body])
-
-    def make_back_sleeve(name, side, pose):
-        src = ET.fromstring((examples / name).read_text())
-        top = ET.Element(f'{{{SVG_NS}}}svg', {'xmlns': SVG_NS, 'viewBox': '0 0 64 64'})
-        wrap = ET.SubElement(top, f'{{{SVG_NS}}}svg', {'x': '12', 'y': '32'})
-        group = ET.SubElement(wrap, f'{{{SVG_NS}}}g', {'class': f'gotchi-sleeves gotchi-sleeves-{side} {pose}'})
-        for child in list(src):
-            group.append(deepcopy(child))
-        return top
-
-    # Find back sleeve files
-    back_left_up_files = list(examples.glob(f'{item_id}_*BackLeftUp.svg'))
-    back_left_down_files = list(examples.glob(f'{item_id}_*BackLeft.svg'))
-    back_right_up_files = list(examples.glob(f'{item_id}_*BackRightUp.svg'))
-    back_right_down_files = list(examples.glob(f'{item_id}_*BackRight.svg'))
-
-    # Filter out "Up" files from down list
-    back_left_down_files = [f for f in back_left_down_files if 'Up' not in f.name]
-    back_right_down_files = [f for f in back_right_down_files if 'Up' not in f.name]
-
-    if back_left_up_files:
-        (back_dir / f'{item_id}_{item_name_safe}_Back_LeftUp.svg').write_text(ET.tostring(make_back_sleeve(back_left_up_files[0].name, 'left', 'gotchi-sleeves-up'), encoding='unicode'))
-    if back_left_down_files:
-        (back_dir / f'{item_id}_{item_name_safe}_BackLeft.svg').write_text(ET.tostring(make_back_sleeve(back_left_down_files[0].name, 'left', 'gotchi-sleeves-down'), encoding='unicode'))
-    if back_right_up_files:
-        (back_dir / f'{item_id}_{item_name_safe}_Back_RightUp.svg').write_text(ET.tostring(make_back_sleeve(back_right_up_files[0].name, 'right', 'gotchi-sleeves-up'), encoding='unicode'))
-    if back_right_down_files:
-        (back_dir / f'{item_id}_{item_name_safe}_BackRight.svg').write_text(ET.tostring(make_back_sleeve(back_right_down_files[0].name, 'right', 'gotchi-sleeves-down'), encoding='unicode'))
-
-    print("\nSVG files prepared. Now running batch converter...")
-
-    # Run batch converter for each view
-    views = [
-        ('Front', 0, front_dir),
-        ('Left', 1, left_dir),
-        ('Right', 2, right_dir),
-        ('Back', 3, back_dir),
-    ]
-
-    output_base = ROOT / f'output/{item_id}_{item_name_safe}'
-    
-    # Map view names to their suffix that batch converter adds
-    view_suffix_map = {
-        'Front': 'front',
-        'Left': 'left',
-        'Right': 'right',
-        'Back': 'back'
-    }
-    
-    for view_name, view_idx, input_dir in views:
-        output_dir = output_base / view_name
-        print(f"\nConverting {view_name} view (index {view_idx})...")
-        result = subprocess.run(
-            ['./batch-process.sh', str(input_dir), str(output_dir), str(view_idx)],
-            capture_output=True,
-            text=True
-        )
-        if result.returncode == 0:
-            print(f"✓ {view_name} view completed")
-            
-            # Rename files to remove duplicate view suffix
-            view_suffix = view_suffix_map[view_name]
-            for aseprite_file in output_dir.glob('*.aseprite'):
-                old_name = aseprite_file.name
-                base_without_ext = old_name[:-len('.aseprite')]
-                # Check if filename ends with _{view_suffix}_{view_suffix} (duplicate)
-                # Pattern: {item_id}_{item_name}_{View}_{view_suffix}.aseprite
-                # Should become: {item_id}_{item_name}_{View}.aseprite
-                if base_without_ext.endswith(f'_{view_suffix}_{view_suffix}'):
-                    # Remove the duplicate suffix
-                    new_name = base_without_ext[:-len(f'_{view_suffix}')] + '.aseprite'
-                    new_path = output_dir / new_name
-                    aseprite_file.rename(new_path)
-                    print(f"  Renamed: {old_name} → {new_name}")
-                elif base_without_ext.endswith(f'_{view_suffix}'):
-                    # Remove the view suffix that batch converter added
-                    # Pattern examples:
-                    # - 8_MarineJacket_FrontLeft_front -> 8_MarineJacket_FrontLeft
-                    # - 8_MarineJacket_Front_LeftUp_front -> 8_MarineJacket_Front_LeftUp
-                    # - 8_MarineJacket_BackLeft_back -> 8_MarineJacket_BackLeft
-                    parts = base_without_ext.split('_')
-                    if len(parts) >= 2:
-                        # Check if the last part is the view suffix we want to remove
-                        if parts[-1] == view_suffix:
-                            # Remove the last part (the view suffix)
-                            new_name = '_'.join(parts[:-1]) + '.aseprite'
-                            new_path = output_dir / new_name
-                            aseprite_file.rename(new_path)
-                            print(f"  Renamed: {old_name} → {new_name}")
-        else:
-            print(f"✗ {view_name} view failed:")
-            print(result.stderr)
-            sys.exit(1)
+    try:
+        results = convert(item_ids)
+        if args.watch:
+            watch(args, Path(json_path), Path(db_json_path) if db_json_path else None, convert, reload)
+    finally:
+        if pool is not None:
+            pool.close()
+
+    if not args.watch and any(not r['ok'] for r in results):
+        sys.exit(1)
 
-    print("\n✅ All 4 views generated successfully!")
-    print("\nOutput locations:")
-    print(f"  - Front: output/{item_id}_{item_name_safe}/Front/")
-    print(f"  - Left:  output/{item_id}_{item_name_safe}/Left/")
-    print(f"  - Right: output/{item_id}_{item_name_safe}/Right/")
-    print(f"  - Back:  output/{item_id}_{item_name_safe}/Back/")
 
+def example_view(name):
+    """(item id, view) an examples/svgItems file feeds, or None"""
+    item_id, sep, _ = name.partition('_')
+    if not sep or not item_id.isdigit():
+        return None
+    view = next((view for suffix, view in EXAMPLE_VIEWS if name.endswith(suffix)), None)
+    return (item_id, view) if view else None
+
+
+def watch(args, json_path, db_json_path, convert, reload):
+    """
+    Reconvert the views whose sources change until interrupted. convert() and
+    reload() are generate()'s, so converter workers and caches stay warm.
+    """
+    collateral_paths = [Path(p) for p in COLLATERAL_FILES]
+    sources = [json_path, examples, *collateral_paths] + ([db_json_path] if db_json_path else [])
+    watcher = SourceWatcher(sources, args.watch_interval)
+    records = RecordSnapshot(json_path)
+    db_records = RecordSnapshot(db_json_path) if db_json_path else None
+    collaterals = {c.name: c for c in load_collaterals(collateral_paths)}
+    print(f"\nWatching {json_path}, {examples} and the collateral JSONs for changes (Ctrl-C to stop)")
+
+    try:
+        while True:
+            changed = watcher.wait()
+            started = time.perf_counter()
+            affected = {}
+            # A valid new snapshot: the open wearables/DB must be reloaded even when
+            # no record changed, since record offsets move with any edit of the file
+            reparsed = False
+
+            def mark(item_id, views):
+                if views:
+                    affected.setdefault(item_id, set()).update(views)
+
+            if json_path in changed:
+                try:
+                    newer = RecordSnapshot(json_path)
+                except ValueError as e:
+                    print(f"{json_path} is not valid JSON yet ({e}); waiting for the next change")
+                    newer = None
+                if newer is not None:
+                    for item_id in records.changed(newer):
+                        mark(item_id, changed_views(records.record(item_id), newer.record(item_id)))
+                    records = newer
+                    reparsed = True
+            if db_json_path is not None and db_json_path in changed:
+                try:
+                    newer = RecordSnapshot(db_json_path)
+                except ValueError as e:
+                    print(f"{db_json_path} is not valid JSON yet ({e}); waiting for the next change")
+                    newer = None
+                if newer is not None:
+                    for item_id in db_records.changed(newer):
+                        mark(item_id, VIEWS)
+                    db_records = newer
+                    reparsed = True
+            example_changes = [p for p in changed if p.parent == examples]
+            if example_changes:
+                example_library(examples).invalidate()
+                for path in example_changes:
+                    target = example_view(path.name)
+                    if target:
+                        mark(target[0], {target[1]})
+            if any(p in changed for p in collateral_paths):
+                newer = {c.name: c for c in load_collaterals(collateral_paths)}
+                names = sorted(n for n in set(collaterals) | set(newer) if collaterals.get(n) != newer.get(n))
+                collaterals = newer
+                if names:
+                    print(f"Collaterals changed: {', '.join(names)}; reconverting the collateral library")
+                    command = [sys.executable, str(Path(__file__).resolve().parent / 'scripts/convert-collaterals.py')]
+                    if args.no_dedup:
+                        command.append('--no-dedup')
+                    subprocess.run(command)
+
+            if reparsed:
+                try:
+                    reload()
+                except ValueError as e:
+                    print(f"Could not reload the wearables ({e}); waiting for the next change")
+                    continue
+            if not affected:
+                continue
+            watched = set(parse_item_spec(args.items, records.entries.keys()))
+            item_ids = sorted((i for i in affected if i in watched), key=int)
+            if not item_ids:
+                continue
+            print(f"\n{len(item_ids)} item(s) changed: "
+                  + ", ".join(f"{i} ({'/'.join(v for v in VIEWS if v in affected[i])})" for i in item_ids))
+            convert(item_ids, views=affected)
+            print(f"Updated in {time.perf_counter() - started:.1f}s; watching for changes")
+    except KeyboardInterrupt:
+        print("\nStopped watching")
+
+
+if __name__ == "__main__":
+    main()
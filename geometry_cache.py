@@ -0,0 +1,294 @@
+"""
+Compiled geometry cache for svg_renderer.
+
+The same path data is tokenized and scanline-filled over and over: every
+wearable view rerun, every collateral and every eye shape pass parses the
+same d= strings and fills the same edge tables. GeometryCache keeps both
+results, keyed by a hash of the path string:
+
+    commands   the parsed command list of a d= string (parse_path_data)
+    spans      the filled spans (y, x start, x end) of a path at one
+               placement: nested <svg> offset, viewBox origin, scale and
+               canvas size (sub-paths -> edge table -> scanline fill)
+
+A compiled cache is one binary file (little endian):
+
+    header   64 bytes: b'GGEO', version u16, reserved u16, command list
+             count u32, span list count u32, renderer fingerprint (32 bytes
+             sha256 of RENDERER_FILES), zero padding
+    index    24 bytes per command list, then per span list, each sorted by
+             key: key (16 bytes blake2b), data offset u32, size u32
+             (bytes for command lists, spans for span lists)
+    data     command lists: command count u32, then per command u8 type
+             (index in 'MLHVZ', +0x80 when relative), then per command u8
+             parameter count, then all parameters as f64;
+             span lists: u16 triples
+
+A file written by other renderer scripts is ignored. svg_renderer opens
+DEFAULT_PATH (or $SVG_GEOMETRY_CACHE; 'off' disables it) on first use, so
+every rasterization consumer picks the cache up; anything not in the file is
+computed as before and kept in memory for the rest of the process.
+
+    python3 scripts/compile-geometry.py            # .build-cache/geometry.bin
+"""
+import hashlib
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from collections.abc import Sequence
+from itertools import accumulate
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from build_cache import tool_fingerprint
+from svg_renderer import (
+    PathCommand, PathElement, ViewBox, fill_polygons, parse_path_data, path_to_sub_path_points,
+)
+
+MAGIC = b'GGEO'
+VERSION = 1
+HEADER = struct.Struct('<4sHHII32s')
+HEADER_SIZE = 64
+INDEX = struct.Struct('<16sII')
+COUNT = struct.Struct('<I')
+COMMAND_TYPES = 'MLHVZ'
+RELATIVE = 0x80
+_DECODED_TYPES = {code | flag: t for code, t in enumerate(COMMAND_TYPES) for flag in (0, RELATIVE)}
+
+REPO = Path(__file__).resolve().parent
+DEFAULT_PATH = REPO / '.build-cache' / 'geometry.bin'
+ENVIRONMENT = 'SVG_GEOMETRY_CACHE'
+# Scripts whose behaviour the cached results depend on
+RENDERER_FILES = ['svg_renderer.py', 'geometry_cache.py']
+
+Span = Tuple[int, int, int]
+
+
+def renderer_fingerprint() -> bytes:
+    return bytes.fromhex(tool_fingerprint(REPO, RENDERER_FILES))
+
+
+def path_key(path_data: str) -> bytes:
+    return hashlib.blake2b(path_data.encode(), digest_size=16).digest()
+
+
+def _element_source(element: PathElement) -> str:
+    # Rects converted by rect_to_path carry no d= string; their commands are small
+    if element.path_data is not None:
+        return element.path_data
+    return repr(element.commands)
+
+
+def _placement(element: PathElement, view_box: ViewBox, scale: float, width: int, height: int) -> tuple:
+    return (float(element.svg_offset[0]), float(element.svg_offset[1]), float(view_box.x), float(view_box.y),
+            float(scale), width, height)
+
+
+def spans_key(source: str, placement: tuple) -> bytes:
+    return hashlib.blake2b(path_key(source) + struct.pack('<5dII', *placement), digest_size=16).digest()
+
+
+def encode_commands(commands: List[PathCommand]) -> bytes:
+    codes = bytes(COMMAND_TYPES.index(t) | (RELATIVE if is_relative else 0) for t, is_relative, _ in commands)
+    counts = bytes(len(params) for _, _, params in commands)
+    params = array('d', [value for _, _, values in commands for value in values])
+    if sys.byteorder != 'little':
+        params.byteswap()
+    return COUNT.pack(len(commands)) + codes + counts + params.tobytes()
+
+
+def decode_commands(data, offset: int, size: int) -> List[PathCommand]:
+    (n,) = COUNT.unpack_from(data, offset)
+    start = offset + COUNT.size
+    codes = data[start:start + n]
+    counts = data[start + n:start + 2 * n]
+    params = array('d')
+    params.frombytes(data[start + 2 * n:offset + size])
+    if sys.byteorder != 'little':
+        params.byteswap()
+    params = params.tolist()
+    ends = list(accumulate(counts))
+    return [(_DECODED_TYPES[code], code >= RELATIVE, params[end - count:end])
+            for code, count, end in zip(codes, counts, ends)]
+
+
+class CompiledCommands(Sequence):
+    """A compiled command list, decoded on first access (its length is known up front)"""
+    __slots__ = ('_data', '_offset', '_size', '_count', '_commands')
+
+    def __init__(self, data, offset: int, size: int):
+        self._data, self._offset, self._size = data, offset, size
+        (self._count,) = COUNT.unpack_from(data, offset)
+        self._commands = None
+
+    def _decoded(self) -> List[PathCommand]:
+        if self._commands is None:
+            self._commands = decode_commands(self._data, self._offset, self._size)
+        return self._commands
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):
+        return self._decoded()[index]
+
+    def __iter__(self):
+        return iter(self._decoded())
+
+    def __repr__(self) -> str:
+        return repr(self._decoded())
+
+
+class GeometryCache:
+    """
+    Parsed commands and filled spans, from a compiled file and computed on
+    demand. Lookups may come from several threads; a result computed twice
+    is the same, so the memo dicts are not locked.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path is not None else None
+        # In-memory results by d= string / (source, placement)
+        self._commands: Dict[str, Sequence] = {}
+        self._spans: Dict[tuple, List[Span]] = {}
+        # Compiled entries: key -> (offset, size)
+        self._command_index: Dict[bytes, Tuple[int, int]] = {}
+        self._span_index: Dict[bytes, Tuple[int, int]] = {}
+        self._map = None
+        self.hits = 0
+        self.misses = 0
+        if self.path is not None and self.path.exists():
+            self._open()
+
+    def _open(self) -> None:
+        with open(self.path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < HEADER_SIZE:
+                raise ValueError(f"{self.path}: file too small for a geometry cache")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, command_count, span_count, fingerprint = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path}: not a version {VERSION} geometry cache")
+        if fingerprint != renderer_fingerprint():
+            raise ValueError(f"{self.path}: compiled by other renderer scripts")
+        position = HEADER_SIZE
+        for index, count in ((self._command_index, command_count), (self._span_index, span_count)):
+            for _ in range(count):
+                key, offset, size = INDEX.unpack_from(self._map, position)
+                index[key] = (offset, size)
+                position += INDEX.size
+
+    def commands(self, path_data: str) -> Sequence:
+        """parse_path_data(path_data) as a shared, read-only sequence"""
+        commands = self._commands.get(path_data)
+        if commands is None:
+            entry = self._command_index.get(path_key(path_data))
+            if entry is not None:
+                commands = CompiledCommands(self._map, *entry)
+            else:
+                commands = parse_path_data(path_data)
+            self._commands[path_data] = commands
+        return commands
+
+    def spans(self, element: PathElement, view_box: ViewBox, scale: float,
+              width: int, height: int) -> Tuple[List[Span], bool]:
+        """
+        (spans, complete) of a path element as fill_polygons emits them. When
+        the fill fails part way (the Lua pcall case) the spans emitted before
+        the failure come back with complete False and nothing is kept.
+        """
+        key = (_element_source(element), _placement(element, view_box, scale, width, height))
+        spans = self._spans.get(key)
+        if spans is not None:
+            self.hits += 1
+            return spans, True
+        entry = self._span_index.get(spans_key(*key))
+        if entry is not None:
+            self.hits += 1
+            offset, count = entry
+            values = array('H')
+            values.frombytes(self._map[offset:offset + 6 * count])
+            if sys.byteorder != 'little':
+                values.byteswap()
+            it = iter(values)
+            spans = list(zip(it, it, it))
+        else:
+            self.misses += 1
+            spans = []
+            try:
+                fill_polygons(path_to_sub_path_points(element, view_box, scale), scale, width, height,
+                              lambda y, x_start, x_end: spans.append((y, x_start, x_end)))
+            except (ValueError, ArithmeticError):
+                return spans, False
+        self._spans[key] = spans
+        return spans, True
+
+    def encode(self) -> bytes:
+        """Compiled file contents: the opened file's entries plus everything computed since"""
+        commands: Dict[bytes, bytes] = {}
+        for key, (offset, size) in self._command_index.items():
+            commands[key] = bytes(self._map[offset:offset + size])
+        for path_data, parsed in list(self._commands.items()):
+            if not isinstance(parsed, CompiledCommands):
+                commands[path_key(path_data)] = encode_commands(parsed)
+        spans: Dict[bytes, Tuple[bytes, int]] = {}
+        for key, (offset, count) in self._span_index.items():
+            spans[key] = (bytes(self._map[offset:offset + 6 * count]), count)
+        for key, values in list(self._spans.items()):
+            packed = array('H', [v for span in values for v in span])
+            if sys.byteorder != 'little':
+                packed.byteswap()
+            spans[spans_key(*key)] = (packed.tobytes(), len(values))
+
+        index_size = INDEX.size * (len(commands) + len(spans))
+        position = HEADER_SIZE + index_size
+        index, data = [], []
+        for key in sorted(commands):
+            index.append(INDEX.pack(key, position, len(commands[key])))
+            data.append(commands[key])
+            position += len(commands[key])
+        for key in sorted(spans):
+            packed, count = spans[key]
+            index.append(INDEX.pack(key, position, count))
+            data.append(packed)
+            position += len(packed)
+        header = HEADER.pack(MAGIC, VERSION, 0, len(commands), len(spans), renderer_fingerprint())
+        return b''.join([header.ljust(HEADER_SIZE, b'\0'), *index, *data])
+
+    def save(self, path: Optional[Path] = None) -> int:
+        """Write the compiled file atomically; returns its size in bytes"""
+        path = Path(path) if path is not None else self.path
+        data = self.encode()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+        return len(data)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'compiled_commands': len(self._command_index), 'compiled_spans': len(self._span_index),
+            'memo_commands': len(self._commands), 'memo_spans': len(self._spans),
+            'hits': self.hits, 'misses': self.misses,
+        }
+
+
+_default_lock = threading.Lock()
+
+
+def open_default() -> Optional[GeometryCache]:
+    """The compiled cache at $SVG_GEOMETRY_CACHE or DEFAULT_PATH, or None when off, missing or stale"""
+    setting = os.environ.get(ENVIRONMENT, '')
+    if setting.lower() in ('off', '0', 'no', 'false'):
+        return None
+    path = Path(setting) if setting else DEFAULT_PATH
+    with _default_lock:
+        if not path.exists():
+            return None
+        try:
+            return GeometryCache(path)
+        except (OSError, ValueError) as e:
+            print(f"Warning: Ignoring geometry cache: {e}")
+            return None
@@ -0,0 +1,267 @@
+"""
+Golden-image regression checks for rendered outputs (requires NumPy).
+
+An asset set is a list of names and one uint8[N, H, W, 4] RGBA stack:
+
+    wearables     every side of wearables-1-420.json (420 items x 4 views),
+                  rendered with svg_renderer at the native 64x64 size
+    collaterals   body parts x collaterals (batch-all-collaterals-converter-v2)
+    eye-shapes    the eye shape x collateral x rarity matrix (eye_shapes.py)
+    <directory>   every .aseprite under a directory, decoded (aseprite_file.py)
+    <file>.pxs    every sprite of a pixel store (pixel_store.py), read from the mmap
+
+save_golden() stores a set as <golden>/<set>.npz; compare() diffs a fresh
+render against it in one vectorized pass and returns the changed pixel count
+per asset. heatmap() draws golden | current | changed pixels for review.
+
+Rendering is split over a process pool (render_set), which brings the full
+library (1680 wearable views, 128 collateral parts, 11536 eye shape cells)
+down to seconds.
+"""
+import json
+import math
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from aseprite_file import read_aseprite
+from collateral_palette import (
+    COLLATERAL_FILES, MAIN_DB, check_placeholders, collateral_parts, load_collaterals, mask_from_render, render_part,
+)
+from eye_shapes import (
+    EYE_SHAPES_ROOT, PLACEHOLDERS, group_by_source, load_sources, plan_matrix, prepare_svg, render_cell,
+)
+from pixel_store import PixelStore
+from svg_renderer import parse_svg, place_pixels, render, write_png
+
+VIEWS = ['Front', 'Left', 'Right', 'Back']
+BUILTIN_SETS = ['wearables', 'collaterals', 'eye-shapes']
+SIZE = 64
+
+Stack = Tuple[List[str], np.ndarray]
+
+
+def _tile(rgba) -> np.ndarray:
+    return np.frombuffer(bytes(rgba), dtype=np.uint8).reshape(SIZE, SIZE, 4)
+
+
+def _stack(names: List[str], tiles: List[np.ndarray]) -> Stack:
+    if not tiles:
+        return names, np.zeros((0, SIZE, SIZE, 4), dtype=np.uint8)
+    return names, np.stack(tiles)
+
+
+# ============================================================================
+# ASSET SETS (each task runs in a worker process)
+# ============================================================================
+
+def _render_svgs(named_svgs: List[Tuple[str, str]]) -> Stack:
+    names, tiles = [], []
+    for name, svg in named_svgs:
+        svg_data = parse_svg(svg)
+        width, height = math.floor(svg_data.view_box.width), math.floor(svg_data.view_box.height)
+        names.append(name)
+        tiles.append(_tile(place_pixels(render(svg_data, width, height), (0, 0), SIZE)))
+    return _stack(names, tiles)
+
+
+def _render_collaterals(_: None) -> Stack:
+    repo = Path(__file__).resolve().parent
+    collaterals = load_collaterals([repo / p for p in COLLATERAL_FILES])
+    names, tiles = [], []
+    for part in collateral_parts(repo / MAIN_DB):
+        for collateral in collaterals:
+            names.append(f"{collateral.name}/{part.prefix}_{collateral.name}")
+            tiles.append(_tile(render_part(part.svg, collateral.colors, part.wrap)))
+    return _stack(names, tiles)
+
+
+def _render_eye_source(source: Tuple[str, List[Tuple[str, str, str]]]) -> Stack:
+    """
+    One eye shape source, rasterized once and recolored per cell, or rendered
+    per cell when its colors clash with the placeholders (as
+    eye_shapes.render_source)
+    """
+    svg, cells = source
+    try:
+        check_placeholders(svg, PLACEHOLDERS)
+        prepared = prepare_svg(svg, PLACEHOLDERS['eye'].lstrip('#'), PLACEHOLDERS['primary'].lstrip('#'))
+        mask = mask_from_render(render(parse_svg(prepared), SIZE, SIZE), PLACEHOLDERS)
+    except ValueError:
+        mask = None
+    names, tiles = [], []
+    for name, eye_hex, primary_hex in cells:
+        if mask is not None:
+            rgba = mask.recolor({'eye': '#' + eye_hex, 'primary': '#' + primary_hex})
+        else:
+            rgba = render_cell(svg, eye_hex, primary_hex) or bytes(SIZE * SIZE * 4)
+        names.append(name)
+        tiles.append(_tile(rgba))
+    return _stack(names, tiles)
+
+
+def _decode_files(root_and_paths: Tuple[str, List[str]]) -> Stack:
+    root, paths = root_and_paths
+    names, tiles = [], []
+    for path in paths:
+        sprite = read_aseprite(Path(root) / path)
+        if (sprite.width, sprite.height) != (SIZE, SIZE) or not sprite.frames:
+            continue
+        names.append(path)
+        tiles.append(np.frombuffer(sprite.frames[0], dtype=np.uint8).reshape(SIZE, SIZE, 4))
+    return _stack(names, tiles)
+
+
+def _read_pixel_store(path: str) -> Stack:
+    store = PixelStore(Path(path))
+    names, tiles = [], []
+    for key in sorted(store.keys()):
+        canvas_w, canvas_h = store.entry(key)[4:6]
+        if (canvas_w, canvas_h) != (SIZE, SIZE):
+            continue
+        names.append(str(key))
+        tiles.append(store.canvas(key))
+    return _stack(names, tiles)
+
+
+def _chunks(items: list, count: int) -> List[list]:
+    size = max(1, -(-len(items) // max(1, count)))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def set_tasks(name: str, jobs: int, wearables_json: Path = Path('wearables-1-420.json')) -> list:
+    """(function, argument) tasks whose stacks make up the asset set"""
+    if name == 'wearables':
+        with open(wearables_json, 'r') as f:
+            wearables = json.load(f)['wearables']
+        named_svgs = []
+        for item_id in sorted(wearables, key=int):
+            sides = wearables[item_id].get('sides') or {}
+            for view in VIEWS:
+                svg = (sides.get(view) or {}).get('svg')
+                if svg:
+                    named_svgs.append((f"{item_id}/{view}", svg.strip().strip('`')))
+        return [(_render_svgs, chunk) for chunk in _chunks(named_svgs, jobs * 4)]
+    if name == 'collaterals':
+        return [(_render_collaterals, None)]
+    if name == 'eye-shapes':
+        collaterals = load_collaterals(COLLATERAL_FILES)
+        cells = plan_matrix(load_sources(EYE_SHAPES_ROOT, collaterals), collaterals, Path('.'))
+        return [
+            (_render_eye_source, (group[0].source.svg, [(c.key, c.eye_hex, c.primary_hex) for c in group]))
+            for group in group_by_source(cells).values()
+        ]
+    root = Path(name)
+    if root.suffix == '.pxs' and root.is_file():
+        return [(_read_pixel_store, str(root))]
+    if root.is_dir():
+        paths = sorted(p.relative_to(root).as_posix() for p in root.rglob('*.aseprite') if '.store' not in p.parts)
+        return [(_decode_files, (str(root), chunk)) for chunk in _chunks(paths, jobs * 4)]
+    raise ValueError(f"Unknown asset set: {name}")
+
+
+def _run_task(task) -> Stack:
+    function, argument = task
+    return function(argument)
+
+
+def render_set(name: str, jobs: int = 1) -> Stack:
+    """Names and RGBA stack of an asset set, rendered over `jobs` processes"""
+    tasks = set_tasks(name, jobs)
+    if jobs <= 1:
+        stacks = [_run_task(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            stacks = list(executor.map(_run_task, tasks))
+    names = [n for stack_names, _ in stacks for n in stack_names]
+    arrays = [array for _, array in stacks if len(array)]
+    pixels = np.concatenate(arrays) if arrays else np.zeros((0, SIZE, SIZE, 4), dtype=np.uint8)
+    return names, pixels
+
+
+def set_file_name(name: str) -> str:
+    """File name of a set's golden stack (directories by their path)"""
+    if name in BUILTIN_SETS:
+        return f"{name}.npz"
+    return Path(name).as_posix().strip('/').replace('/', '__') + '.npz'
+
+
+# ============================================================================
+# GOLDEN STORE AND COMPARISON
+# ============================================================================
+
+def save_golden(path: Path, names: Sequence[str], pixels: np.ndarray) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(path, names=np.array(names, dtype=str), pixels=pixels)
+
+
+def load_golden(path: Path) -> Stack:
+    with np.load(path) as data:
+        return [str(n) for n in data['names']], data['pixels']
+
+
+@dataclass
+class Comparison:
+    # Changed pixels per asset present in both sets (name -> count, 0 = identical)
+    diffs: Dict[str, int] = field(default_factory=dict)
+    missing: List[str] = field(default_factory=list)
+    added: List[str] = field(default_factory=list)
+
+    @property
+    def changed(self) -> Dict[str, int]:
+        return {name: count for name, count in self.diffs.items() if count}
+
+    @property
+    def ok(self) -> bool:
+        return not self.changed and not self.missing and not self.added
+
+
+def compare(golden: Stack, current: Stack) -> Tuple[Comparison, np.ndarray, np.ndarray, List[str]]:
+    """
+    Diff two stacks by asset name. Returns the comparison and the aligned
+    golden/current stacks of the common assets (for heatmaps), with names.
+    """
+    golden_names, golden_pixels = golden
+    current_names, current_pixels = current
+    golden_index = {name: i for i, name in enumerate(golden_names)}
+    current_index = {name: i for i, name in enumerate(current_names)}
+    common = [name for name in golden_names if name in current_index]
+
+    if golden_names == current_names:
+        a, b = golden_pixels, current_pixels
+    else:
+        a = golden_pixels[[golden_index[n] for n in common]]
+        b = current_pixels[[current_index[n] for n in common]]
+    counts = (a != b).any(axis=3).sum(axis=(1, 2)) if common else np.zeros(0, dtype=np.int64)
+
+    comparison = Comparison(
+        diffs=dict(zip(common, counts.tolist())),
+        missing=[name for name in golden_names if name not in current_index],
+        added=[name for name in current_names if name not in golden_index],
+    )
+    return comparison, a, b, common
+
+
+def heatmap(golden: np.ndarray, current: np.ndarray, scale: int = 4) -> np.ndarray:
+    """golden | current | diff (changed pixels red over a dimmed golden), scaled up"""
+    changed = (golden != current).any(axis=2)
+    diff = golden.copy()
+    diff[..., :3] //= 3
+    diff[..., 3] = np.maximum(diff[..., 3], 64)
+    diff[changed] = (255, 0, 0, 255)
+    gap = np.zeros((golden.shape[0], 1, 4), dtype=np.uint8)
+    image = np.concatenate([golden, gap, current, gap, diff], axis=1)
+    return image.repeat(scale, axis=0).repeat(scale, axis=1)
+
+
+def write_heatmap(path: Path, golden: np.ndarray, current: np.ndarray, scale: int = 4) -> None:
+    image = np.ascontiguousarray(heatmap(golden, current, scale))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_png(path, image.tobytes(), image.shape[1], image.shape[0])
+
+
+def heatmap_name(name: str) -> str:
+    return name.replace('/', '__').replace(' ', '_') + '.png'
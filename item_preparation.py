@@ -0,0 +1,425 @@
+"""
+Item loading and per-view SVG preparation of the item generator.
+
+generate-single-item-all-views.py, the library manifest, the preview server
+and the benchmarks share this code, so they all see an item the way the
+generator converts it:
+
+    wearables = load_wearables(find_first_existing(JSON_PATHS))
+    db_records = load_db_wearables(find_first_existing(DB_JSON_PATHS))
+    is_body_item = is_body_item_for('8', body_flags_from(db_records), True)
+    prepared = PreparedSVGs(in_memory=True)
+    jobs = prepare_item('8', wearables['8'], is_body_item, prepared, root)
+
+prepare_item() extracts the wearable groups of each side (svg_fragments.py),
+adds the example sleeves of body items and returns one ConversionJob per
+view. The per-view SVGs go to root/tmp/<id>_<name>/ or, with an in-memory
+PreparedSVGs, into the jobs' documents; outputs are planned under
+root/output/<id>_<name>/.
+"""
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+from conversion_jobs import ConversionJob
+from svg_fragments import SVG_NS, FragmentIndex, example_library
+from wearables_data import open_wearables
+
+ET.register_namespace('', SVG_NS)
+
+# JSON data - check multiple possible locations
+JSON_PATHS = [
+    'wearables-1-420.json',
+    'wearables-1-20.json',
+    '../AavegotchiQuerey/wearables-1-420.json',
+    '../AavegotchiQuerey/wearables-1-20.json',
+    '/Users/juliuswong/Dev/AavegotchiQuerey/wearables-1-420.json',
+    '/Users/juliuswong/Dev/AavegotchiQuerey/wearables-1-20.json'
+]
+
+DB_JSON_PATHS = [
+    'aavegotchi_db_wearables.json',
+    '../AavegotchiQuerey/aavegotchi_db_wearables.json',
+    '/Users/juliuswong/Dev/AavegotchiQuerey/aavegotchi_db_wearables.json'
+]
+
+
+EXAMPLES = Path('examples/svgItems')
+
+
+class PreparedSVGs:
+    """
+    Destination of the prepared per-view SVGs: files under tmp/ (default), or
+    in memory with in_memory=True, where each view's (file name, SVG text)
+    documents are collected by directory and handed to its conversion job.
+    Writes are timed into metrics (pipeline_metrics.Metrics), if given.
+    """
+
+    def __init__(self, in_memory=False, metrics=None):
+        self.in_memory = in_memory
+        self.metrics = metrics
+        self.documents = {}
+
+    def make_dir(self, path):
+        if not self.in_memory:
+            path.mkdir(parents=True, exist_ok=True)
+
+    def write(self, path, text):
+        if self.in_memory:
+            self.documents.setdefault(path.parent, []).append((path.name, text))
+        else:
+            path.write_text(text)
+
+    def take(self, directory):
+        """Documents prepared for directory (None when they were written to disk)"""
+        if not self.in_memory:
+            return None
+        return sorted(self.documents.pop(directory, []))
+
+
+def find_first_existing(paths):
+    for path in paths:
+        if Path(path).exists():
+            return path
+    return None
+
+
+def load_wearables(json_path):
+    """
+    Open the wearables JSON as a lazy id -> record mapping (see
+    wearables_data.py): only the items that are processed get decoded.
+    """
+    return open_wearables(json_path)
+
+
+def load_db_wearables(db_json_path):
+    """
+    Open aavegotchi_db_wearables.json as a lazy id -> record mapping.
+    Returns None if the DB could not be read (callers default to body items).
+    """
+    try:
+        return open_wearables(db_json_path)
+    except Exception as e:
+        print(f"Warning: Could not check body item status: {e}")
+        return None
+
+
+def body_flags_from(db_records):
+    """Build an id -> is_body_item index from the DB index (no records decoded)"""
+    if db_records is None:
+        return None
+    return {int(wearable_id): db_records.entry(wearable_id).is_body for wearable_id in db_records}
+
+
+def is_body_item_for(item_id, body_flags, db_available):
+    if not db_available:
+        return False
+    if body_flags is None:
+        # Default to body item if we can't check
+        return True
+    return body_flags.get(int(item_id), False)
+
+
+def parse_item_spec(spec, available_ids):
+    """
+    Expand an item spec into a list of item ids (as strings).
+    Accepts 'all', single ids, ranges (1-20) and comma separated lists of both.
+    """
+    if spec.strip().lower() == 'all':
+        return sorted(available_ids, key=int)
+
+    ids = []
+    seen = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = part.split('-', 1)
+            if not start.strip().isdigit() or not end.strip().isdigit():
+                raise ValueError(f"Invalid item range: {part}")
+            start, end = int(start), int(end)
+            if start > end:
+                raise ValueError(f"Invalid item range: {part}")
+            expanded = [str(i) for i in range(start, end + 1)]
+        elif part.isdigit():
+            expanded = [str(int(part))]
+        else:
+            raise ValueError(f"Invalid item id: {part}")
+        for item_id in expanded:
+            if item_id not in seen:
+                seen.add(item_id)
+                ids.append(item_id)
+    return ids
+
+
+# Sanitize item name for filename
+def sanitize_filename(name):
+    # Remove or replace characters that cause filesystem issues
+    name = name.replace(' ', '').replace("'", "").replace("-", "").replace(".", "")
+    name = name.replace("/", "").replace("\\", "").replace(":", "").replace("*", "")
+    name = name.replace("?", "").replace("\"", "").replace("<", "").replace(">", "")
+    name = name.replace("|", "")
+    return name
+
+
+def extract_groups(svg_text, class_names):
+    """Extract groups by class from SVG text (one parse, one traversal)"""
+    return FragmentIndex.from_text(svg_text).find_each(class_names)
+
+
+def write_svg(prepared, path, svg):
+    """Serialize an SVG element tree to path, or keep it in memory (timed as write_svg)"""
+    start = time.perf_counter()
+    prepared.write(path, ET.tostring(svg, encoding='unicode'))
+    if prepared.metrics is not None:
+        prepared.metrics.add('write_svg', time.perf_counter() - start, emit=False)
+
+
+def write_svg_file(prepared, path, elements):
+    """Write SVG file with given elements"""
+    svg = ET.Element(f'{{{SVG_NS}}}svg', {'xmlns': SVG_NS, 'viewBox': '0 0 64 64'})
+    for elem in elements:
+        if elem is not None:
+            svg.append(elem)
+    write_svg(prepared, path, svg)
+
+
+def extract_sleeve_group(svg_text, class_pattern):
+    # Handle None, empty strings and malformed SVGs
+    return FragmentIndex.from_text(svg_text, ignore_errors=True).find(class_pattern)
+
+
+def _sleeve_svg(library, name, position, group_class):
+    """Wrap the (memoized) children of an example sleeve file in a positioned group"""
+    top = ET.Element(f'{{{SVG_NS}}}svg', {'xmlns': SVG_NS, 'viewBox': '0 0 64 64'})
+    inner = ET.SubElement(top, f'{{{SVG_NS}}}svg', {'x': position[0], 'y': position[1]})
+    group = ET.SubElement(inner, f'{{{SVG_NS}}}g', {'class': group_class})
+    group.extend(library.children(name))
+    return top
+
+
+# Left sleeves from examples
+def make_side_sleeve(library, name, pose):
+    return _sleeve_svg(library, name, ('20', '28'), f'gotchi-sleeves gotchi-sleeves-left gotchi-sleeves-{pose}')
+
+
+def make_right_sleeve(library, name, pose):
+    return _sleeve_svg(library, name, ('20', '28'), f'gotchi-sleeves gotchi-sleeves-right gotchi-sleeves-{pose}')
+
+
+def make_back_sleeve(library, name, side, pose):
+    return _sleeve_svg(library, name, ('12', '32'), f'gotchi-sleeves gotchi-sleeves-{side} {pose}')
+
+
+def prepare_non_body_item(item_id, item, item_name_safe, prepared, root, log_per_job=False):
+    """Write the per-view SVGs of a non-body item and return its conversion jobs"""
+    # ===== NON-BODY ITEMS: SIMPLE STRUCTURE =====
+    print("\nProcessing non-body item with simple structure...")
+
+    # Create single output directory
+    output_base = root / f'output/{item_id}_{item_name_safe}'
+    output_base.mkdir(parents=True, exist_ok=True)
+
+    # Create temp directory for SVGs
+    temp_dir = root / f'tmp/{item_id}_{item_name_safe}'
+    prepared.make_dir(temp_dir)
+
+    # Process each view and create single SVG files
+    views_data = [
+        ('front', item['sides']['Front']),
+        ('back', item['sides']['Back']),
+        ('left', item['sides']['Left']),
+        ('right', item['sides']['Right']),
+    ]
+
+    # Process each view separately to avoid duplicates
+    view_idx_map = {'front': 0, 'back': 3, 'left': 1, 'right': 2}
+
+    jobs = []
+    for view_name, view_data in views_data:
+        print(f"\nProcessing {view_name.upper()} view...")
+        try:
+            fragments = FragmentIndex.from_text(view_data['svg'])
+        except ET.ParseError as e:
+            print(f"✗ Error parsing SVG for {view_name} view: {e}")
+            print(f"  Skipping this view...")
+            continue
+
+        # Extract all wearable groups
+        svg_elem = ET.Element(f'{{{SVG_NS}}}svg', {'xmlns': SVG_NS, 'viewBox': '0 0 64 64'})
+        svg_elem.extend(fragments.find_all('gotchi-wearable'))
+
+        # Create separate temp directory for this view
+        view_temp_dir = temp_dir / view_name
+        prepared.make_dir(view_temp_dir)
+
+        # Write SVG file
+        svg_file = view_temp_dir / f'{item_id}_{item_name_safe}_{view_name}.svg'
+        write_svg(prepared, svg_file, svg_elem)
+
+        jobs.append(ConversionJob(
+            item_id, view_name, view_idx_map[view_name], view_temp_dir, output_base,
+            layout='non-body',
+            log_file=temp_dir / f'batch_import_log_{view_name}.txt' if log_per_job else None,
+            documents=prepared.take(view_temp_dir),
+        ))
+
+    print("\nSVG files prepared.")
+    return jobs
+
+
+def prepare_body_item(item_id, item, item_name_safe, prepared, root, examples, log_per_job=False):
+    """Write the body/sleeve SVGs of a body item and return its conversion jobs"""
+    # ===== BODY ITEMS: COMPLEX STRUCTURE WITH SLEEVES =====
+    print("\nProcessing body item with complex structure...")
+
+    # ===== FRONT VIEW =====
+    print("Processing FRONT view...")
+    front_svg = item['sides']['Front']['svg']
+    front_groups = extract_groups(front_svg, ['gotchi-wearable wearable-body'])
+
+    # Extract sleeves from sleeves array
+    sleeves = item.get('sleeves', [])
+
+    # Left/right sleeves up/down
+    # sleeves[0] has all 4, sleeves[1] has left only, sleeves[2] has right only, sleeves[3] has both up
+    sleeve_fragments = FragmentIndex.from_text(sleeves[0] if len(sleeves) > 0 else None, ignore_errors=True)
+    left_up = sleeve_fragments.find('gotchi-sleeves-left gotchi-sleeves-up')
+    left_down = sleeve_fragments.find('gotchi-sleeves-left gotchi-sleeves-down')
+    right_up = sleeve_fragments.find('gotchi-sleeves-right gotchi-sleeves-up')
+    right_down = sleeve_fragments.find('gotchi-sleeves-right gotchi-sleeves-down')
+
+    front_dir = root / f'tmp/{item_id}_{item_name_safe}/Front'
+    prepared.make_dir(front_dir)
+    write_svg_file(prepared, front_dir / f'{item_id}_{item_name_safe}_Front.svg', [front_groups['gotchi-wearable wearable-body']])
+
+    # Separate left and right sleeves
+    if left_up is not None:
+        left_up_svg = ET.Element(f'{{{SVG_NS}}}svg', {'xmlns': SVG_NS, 'viewBox': '0 0 64 64'})
+        left_up_svg.append(left_up)
+        write_svg(prepared, front_dir / f'{item_id}_{item_name_safe}_Front_LeftUp.svg', left_up_svg)
+
+    if left_down is not None:
+        left_down_svg = ET.Element(f'{{{SVG_NS}}}svg', {'xmlns': SVG_NS, 'viewBox': '0 0 64 64'})
+        left_down_svg.append(left_down)
+        write_svg(prepared, front_dir / f'{item_id}_{item_name_safe}_FrontLeft.svg', left_down_svg)
+
+    if right_up is not None:
+        right_up_svg = ET.Element(f'{{{SVG_NS}}}svg', {'xmlns': SVG_NS, 'viewBox': '0 0 64 64'})
+        right_up_svg.append(right_up)
+        write_svg(prepared, front_dir / f'{item_id}_{item_name_safe}_Front_RightUp.svg', right_up_svg)
+
+    if right_down is not None:
+        right_down_svg = ET.Element(f'{{{SVG_NS}}}svg', {'xmlns': SVG_NS, 'viewBox': '0 0 64 64'})
+        right_down_svg.append(right_down)
+        write_svg(prepared, front_dir / f'{item_id}_{item_name_safe}_FrontRight.svg', right_down_svg)
+
+    # ===== LEFT VIEW =====
+    print("Processing LEFT view...")
+    left_svg = item['sides']['Left']['svg']
+    left_groups = extract_groups(left_svg, ['gotchi-wearable wearable-body', 'gotchi-wearable gotchi-secondary'])
+
+    left_dir = root / f'tmp/{item_id}_{item_name_safe}/Left'
+    prepared.make_dir(left_dir)
+    body_elements = [left_groups.get('gotchi-wearable wearable-body')]
+    if 'gotchi-wearable gotchi-secondary' in left_groups:
+        body_elements.append(left_groups['gotchi-wearable gotchi-secondary'])
+    write_svg_file(prepared, left_dir / f'{item_id}_{item_name_safe}_SideLeft.svg', body_elements)
+
+    # Find left sleeve files
+    library = example_library(examples)
+    left_up_files = library.glob(item_id, 'SideLeftUp.svg')
+    left_down_files = library.glob(item_id, 'SideLeftDown.svg')
+    if left_up_files:
+        write_svg(prepared, left_dir / f'{item_id}_{item_name_safe}_SideLeftUp.svg', make_side_sleeve(library, left_up_files[0], 'up'))
+    if left_down_files:
+        write_svg(prepared, left_dir / f'{item_id}_{item_name_safe}_SideLeftDown.svg', make_side_sleeve(library, left_down_files[0], 'down'))
+
+    # ===== RIGHT VIEW =====
+    print("Processing RIGHT view...")
+    right_svg = item['sides']['Right']['svg']
+    right_groups = extract_groups(right_svg, ['gotchi-wearable wearable-body', 'gotchi-wearable gotchi-secondary'])
+
+    right_dir = root / f'tmp/{item_id}_{item_name_safe}/Right'
+    prepared.make_dir(right_dir)
+    body_elements = [right_groups.get('gotchi-wearable wearable-body')]
+    if 'gotchi-wearable gotchi-secondary' in right_groups:
+        body_elements.append(right_groups['gotchi-wearable gotchi-secondary'])
+    write_svg_file(prepared, right_dir / f'{item_id}_{item_name_safe}_SideRight.svg', body_elements)
+
+    # Find right sleeve files
+    right_up_files = library.glob(item_id, 'SideRightUp.svg')
+    right_down_files = library.glob(item_id, 'SideRightDown.svg')
+    if right_up_files:
+        write_svg(prepared, right_dir / f'{item_id}_{item_name_safe}_SideRightUp.svg', make_right_sleeve(library, right_up_files[0], 'up'))
+    if right_down_files:
+        write_svg(prepared, right_dir / f'{item_id}_{item_name_safe}_SideRightDown.svg', make_right_sleeve(library, right_down_files[0], 'down'))
+
+    # ===== BACK VIEW =====
+    print("Processing BACK view...")
+    back_fragments = FragmentIndex.from_text(item['sides']['Back']['svg'])
+    # Embedded sleeves stay in the written group; they were only ever
+    # stripped from the source tree after copying
+    back_body = back_fragments.find_exact('gotchi-wearable wearable-body')
+
+    back_dir = root / f'tmp/{item_id}_{item_name_safe}/Back'
+    prepared.make_dir(back_dir)
+    write_svg_file(prepared, back_dir / f'{item_id}_{item_name_safe}_Back.svg', [back_body])
+
+    # Find back sleeve files
+    back_left_up_files = library.glob(item_id, 'BackLeftUp.svg')
+    back_left_down_files = library.glob(item_id, 'BackLeft.svg')
+    back_right_up_files = library.glob(item_id, 'BackRightUp.svg')
+    back_right_down_files = library.glob(item_id, 'BackRight.svg')
+
+    # Filter out "Up" files from down list
+    back_left_down_files = [f for f in back_left_down_files if 'Up' not in f]
+    back_right_down_files = [f for f in back_right_down_files if 'Up' not in f]
+
+    if back_left_up_files:
+        write_svg(prepared, back_dir / f'{item_id}_{item_name_safe}_Back_LeftUp.svg', make_back_sleeve(library, back_left_up_files[0], 'left', 'gotchi-sleeves-up'))
+    if back_left_down_files:
+        write_svg(prepared, back_dir / f'{item_id}_{item_name_safe}_BackLeft.svg', make_back_sleeve(library, back_left_down_files[0], 'left', 'gotchi-sleeves-down'))
+    if back_right_up_files:
+        write_svg(prepared, back_dir / f'{item_id}_{item_name_safe}_Back_RightUp.svg', make_back_sleeve(library, back_right_up_files[0], 'right', 'gotchi-sleeves-up'))
+    if back_right_down_files:
+        write_svg(prepared, back_dir / f'{item_id}_{item_name_safe}_BackRight.svg', make_back_sleeve(library, back_right_down_files[0], 'right', 'gotchi-sleeves-down'))
+
+    print("\nSVG files prepared.")
+
+    # One batch converter run per view
+    views = [
+        ('Front', 0, front_dir),
+        ('Left', 1, left_dir),
+        ('Right', 2, right_dir),
+        ('Back', 3, back_dir),
+    ]
+
+    output_base = root / f'output/{item_id}_{item_name_safe}'
+    temp_dir = root / f'tmp/{item_id}_{item_name_safe}'
+    return [
+        ConversionJob(
+            item_id, view_name, view_idx, input_dir, output_base / view_name,
+            layout='body',
+            log_file=temp_dir / f'batch_import_log_{view_name}.txt' if log_per_job else None,
+            documents=prepared.take(input_dir),
+        )
+        for view_name, view_idx, input_dir in views
+    ]
+
+
+def prepare_item(item_id, item, is_body_item, prepared, root=Path('.'), examples=EXAMPLES, log_per_job=False):
+    """
+    Prepare every view of a single item into prepared (a PreparedSVGs) and
+    return its conversion jobs; tmp/ and output/ paths are under root, the
+    example sleeves are read from examples.
+    """
+    item_name = item.get('name', f'Item{item_id}')
+    print(f"Item name: {item_name}")
+    print(f"Is body item: {is_body_item}")
+
+    item_name_safe = sanitize_filename(item_name)
+    if is_body_item:
+        return prepare_body_item(item_id, item, item_name_safe, prepared, root, examples, log_per_job)
+    return prepare_non_body_item(item_id, item, item_name_safe, prepared, root, log_per_job)
@@ -0,0 +1,576 @@
+"""
+Shardable job manifest for regenerating the whole library.
+
+plan() expands the full workload into one deterministic list of jobs, one
+per output file:
+
+    wearable     every view/pose file of every wearable (the SVG documents
+                 generate-single-item-all-views.py prepares, native converter)
+    collateral   every body part of every collateral (scripts/convert-collaterals.py)
+    eye-shape    every cell of the eye shape matrix (eye-shapes-matrix.py)
+
+Each job records (kind, subject, view, pose, output, hash, unit): subject is
+the item id or collateral name, output is relative to the library root and
+hash covers the inputs and the renderer scripts. Jobs of one unit (an item,
+a collateral, an eye shape source) share their preparation and always run
+on the same shard. The manifest is a JSON lines file: a header with the tool
+fingerprints per kind, then one job per line.
+
+Nodes coordinate only through a shared work directory. run_shard(i, N) runs
+the units assign_shards() gives shard i of N (1-based; the assignment only
+depends on the manifest) and writes nothing but its own files:
+
+    <work>/shard-i-of-N/output/...   rendered files, laid out like the library
+    <work>/shard-i-of-N.jsonl        completion ledger (build_cache.CompletionLedger),
+                                     outputs relative to shard-i-of-N/
+    <work>/shard-i-of-N.log          per-unit log
+
+An interrupted shard resumes from its ledger. merge() checks that every job
+of the manifest has a ledger entry with the same hash and its output, and
+only then collects the outputs, the shard logs and the merged manifest into
+the library root (through its content store, asset_store.py).
+
+The library root is laid out the way the three tools lay out output/:
+
+    <id>_<name>/...                               wearables (generator)
+    <collateral>/<part>_<collateral>.aseprite     collateral parts
+    <collateral>/eye shape/<set>/<view>_<variant>.aseprite
+
+It is not the layout of output/AavegotchiLibrary/Aseprites, whose files were
+made by other scripts under other names (per-range eye folders, collateral
+icons), so merges go to a root of their own (output/Library by default).
+"""
+import contextlib
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from aseprite_file import write_aseprite
+from asset_store import AssetStore
+from build_cache import NATIVE_TOOL_FILES, CompletionLedger, tool_fingerprint
+from collateral_palette import (
+    COLLATERAL_FILES, MAIN_DB, collateral_parts, load_collaterals, rasterize_part, render_part,
+)
+from eye_shapes import EYE_SHAPES_ROOT, cell_hash, load_sources, plan_matrix, render_source
+from eye_shapes import NATIVE_TOOL_FILES as EYE_SHAPE_TOOL_FILES
+from item_preparation import (
+    DB_JSON_PATHS, EXAMPLES, JSON_PATHS, PreparedSVGs, body_flags_from, find_first_existing, is_body_item_for,
+    load_db_wearables, load_wearables, prepare_item,
+)
+from pixel_store import sprite_key
+from svg_renderer import convert_svg_content
+
+REPO = Path(__file__).resolve().parent
+VERSION = 1
+KINDS = ['wearable', 'collateral', 'eye-shape']
+SIZE = 64
+
+# Scripts behind scripts/convert-collaterals.py
+COLLATERAL_TOOL_FILES = ['collateral_palette.py', 'svg_renderer.py', 'geometry_cache.py', 'aseprite_file.py']
+
+SHARD_FILE = re.compile(r'^shard-(\d+)-of-(\d+)\.jsonl$')
+
+
+@dataclass
+class ManifestJob:
+    kind: str
+    # Item id or collateral name
+    subject: str
+    view: str
+    pose: str
+    # Relative to the library root
+    output: str
+    hash: str
+    # Jobs of one unit are prepared together and run on the same shard
+    unit: str
+
+    @property
+    def key(self) -> str:
+        return self.output
+
+
+def kind_tools() -> Dict[str, str]:
+    """Fingerprint of the renderer scripts per kind"""
+    return {
+        'wearable': tool_fingerprint(REPO, NATIVE_TOOL_FILES),
+        'collateral': tool_fingerprint(REPO, COLLATERAL_TOOL_FILES),
+        # As eye-shapes-matrix.py hashes native cells
+        'eye-shape': f"native\0{tool_fingerprint(REPO, EYE_SHAPE_TOOL_FILES)}",
+    }
+
+
+def _digest(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+# ============================================================================
+# SOURCES (loaded once per process)
+# ============================================================================
+
+_loaded: Dict[str, object] = {}
+
+
+def _cached(name: str, load: Callable):
+    if name not in _loaded:
+        _loaded[name] = load()
+    return _loaded[name]
+
+
+@dataclass
+class WearableSources:
+    wearables: object
+    db_records: object
+    body_flags: Optional[Dict[int, bool]]
+    db_available: bool
+
+
+def _load_wearable_sources() -> WearableSources:
+    json_path = find_first_existing(JSON_PATHS)
+    if not json_path:
+        raise FileNotFoundError(f"No wearables JSON found (searched {', '.join(JSON_PATHS)})")
+    db_json_path = find_first_existing(DB_JSON_PATHS)
+    db_records = load_db_wearables(db_json_path) if db_json_path else None
+    return WearableSources(load_wearables(json_path), db_records or {}, body_flags_from(db_records),
+                           db_json_path is not None)
+
+
+def wearable_sources() -> WearableSources:
+    return _cached('wearables', _load_wearable_sources)
+
+
+def _collaterals():
+    return _cached('collaterals', lambda: {c.name: c for c in load_collaterals([REPO / p for p in COLLATERAL_FILES])})
+
+
+def _parts():
+    return _cached('parts', lambda: {part.prefix: part for part in collateral_parts(REPO / MAIN_DB)})
+
+
+def _masks():
+    def rasterize():
+        masks = {}
+        for prefix, part in _parts().items():
+            try:
+                masks[prefix] = rasterize_part(part.svg, part.wrap)
+            except ValueError:
+                # Rendered per collateral instead
+                pass
+        return masks
+    return _cached('masks', rasterize)
+
+
+def _eye_sources():
+    return _cached('eye_sources', lambda: {
+        source.key: source for source in load_sources(REPO / EYE_SHAPES_ROOT, list(_collaterals().values()))
+    })
+
+
+# ============================================================================
+# PLANNING
+# ============================================================================
+
+def wearable_documents(item_id: str, root: Path, tools: str) -> List[Tuple[ManifestJob, str, str, int]]:
+    """
+    (job, SVG file name, SVG text, view index) per output of an item, as the
+    generator prepares them with root as its ROOT (outputs go to root/output).
+    """
+    sources = wearable_sources()
+    is_body_item = is_body_item_for(item_id, sources.body_flags, sources.db_available)
+    # Prepared SVGs stay in memory instead of going to tmp/
+    prepared = PreparedSVGs(in_memory=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        jobs = prepare_item(item_id, sources.wearables[item_id], is_body_item, prepared, Path(root),
+                            REPO / EXAMPLES)
+    db_record = sources.db_records.get(int(item_id)) if sources.db_records else None
+    extra = json.dumps(db_record, sort_keys=True)
+
+    documents = []
+    for job in jobs:
+        for name, text in job.documents or ():
+            path = job.output_dir / f"{Path(name).stem}.aseprite"
+            key = sprite_key(path)
+            input_hash = _digest(tools, str(job.view_idx), job.layout, extra, name,
+                                 hashlib.sha256(text.encode()).hexdigest())
+            documents.append((
+                ManifestJob('wearable', item_id, key.view, key.pose,
+                            path.relative_to(Path(root) / 'output').as_posix(), input_hash, f"wearable/{item_id}"),
+                name, text, job.view_idx,
+            ))
+    return documents
+
+
+def plan_wearables(item_ids: Sequence[str], tools: str, root: Path) -> Tuple[List[ManifestJob], List[str]]:
+    """Jobs of the given items and the items that could not be prepared"""
+    jobs, failed = [], []
+    for item_id in item_ids:
+        try:
+            jobs.extend(job for job, _, _, _ in wearable_documents(item_id, root, tools))
+        except Exception as e:
+            failed.append(f"{item_id}: {e}")
+    return jobs, failed
+
+
+def collateral_hash(tools: str, part, colors: Dict[str, str]) -> str:
+    return _digest(tools, part.prefix, part.wrap(part.svg), colors['primary'], colors['secondary'], colors['cheek'])
+
+
+def plan_collaterals(names: Sequence[str], tools: str) -> List[ManifestJob]:
+    collaterals, parts = _collaterals(), _parts()
+    return [
+        ManifestJob('collateral', name, 'front', prefix, f"{name}/{prefix}_{name}.aseprite",
+                    collateral_hash(tools, part, collaterals[name].colors), f"collateral/{name}")
+        for name in names
+        for prefix, part in parts.items()
+    ]
+
+
+def plan_eye_shapes(names: Sequence[str], tools: str, collateral_eyes: bool = True) -> List[ManifestJob]:
+    collaterals = [_collaterals()[name] for name in names]
+    sources = [s for s in _eye_sources().values() if collateral_eyes or s.collateral is None]
+    return [
+        ManifestJob('eye-shape', cell.collateral, cell.source.base, cell.variant, cell.output.as_posix(),
+                    cell_hash(cell, tools), f"eye-shape/{cell.source.key}")
+        for cell in plan_matrix(sources, collaterals, Path(''))
+    ]
+
+
+def plan(kinds: Sequence[str], item_ids: Sequence[str], collateral_names: Optional[Sequence[str]] = None,
+         collateral_eyes: bool = True, work_root: Path = Path('.build-cache')) -> Tuple[List[ManifestJob], List[str]]:
+    """All jobs of the selected kinds in a fixed order, and the items that could not be prepared"""
+    tools = kind_tools()
+    names = list(collateral_names) if collateral_names is not None else list(_collaterals())
+    unknown = [name for name in names if name not in _collaterals()]
+    if unknown:
+        raise ValueError(f"Unknown collateral(s): {', '.join(unknown)}")
+    jobs, failed = [], []
+    if 'wearable' in kinds:
+        # prepare_item creates the (empty) output directories of non-body items under its ROOT
+        work_root.mkdir(parents=True, exist_ok=True)
+        with tempfile.TemporaryDirectory(dir=work_root) as root:
+            wearable_jobs, failed = plan_wearables(item_ids, tools['wearable'], Path(root))
+        jobs.extend(wearable_jobs)
+    if 'collateral' in kinds:
+        jobs.extend(plan_collaterals(names, tools['collateral']))
+    if 'eye-shape' in kinds:
+        jobs.extend(plan_eye_shapes(names, tools['eye-shape'], collateral_eyes))
+    return jobs, failed
+
+
+def write_manifest(path: Path, jobs: Sequence[ManifestJob]) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    header = {'version': VERSION, 'tools': kind_tools(), 'jobs': len(jobs)}
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w') as f:
+        f.write(json.dumps(header, sort_keys=True) + '\n')
+        for job in jobs:
+            f.write(json.dumps(asdict(job), sort_keys=True) + '\n')
+    os.replace(tmp_path, path)
+
+
+def read_manifest(path: Path) -> Tuple[dict, List[ManifestJob]]:
+    """(header, jobs); raises ValueError on a file that is not a complete manifest"""
+    with open(path, 'r') as f:
+        header = json.loads(f.readline() or 'null')
+        if not isinstance(header, dict) or header.get('version') != VERSION:
+            raise ValueError(f"{path}: not a version {VERSION} library manifest")
+        jobs = [ManifestJob(**json.loads(line)) for line in f if line.strip()]
+    if len(jobs) != header.get('jobs'):
+        raise ValueError(f"{path}: {len(jobs)} job(s), header says {header.get('jobs')}")
+    return header, jobs
+
+
+# ============================================================================
+# SHARDING
+# ============================================================================
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """'i/N' -> (i, N), 1 <= i <= N"""
+    match = re.fullmatch(r'\s*(\d+)\s*/\s*(\d+)\s*', spec)
+    if not match or not 1 <= int(match.group(1)) <= int(match.group(2)):
+        raise ValueError(f"Invalid shard '{spec}' (expected i/N with 1 <= i <= N)")
+    return int(match.group(1)), int(match.group(2))
+
+
+def shard_name(index: int, count: int) -> str:
+    return f"shard-{index}-of-{count}"
+
+
+def group_units(jobs: Sequence[ManifestJob]) -> Dict[str, List[ManifestJob]]:
+    """Jobs by unit, in manifest order"""
+    units: Dict[str, List[ManifestJob]] = {}
+    for job in jobs:
+        units.setdefault(job.unit, []).append(job)
+    return units
+
+
+def assign_shards(jobs: Sequence[ManifestJob], count: int) -> Dict[str, int]:
+    """
+    Unit -> shard (1-based): largest units first, each to the shard with the
+    fewest jobs so far (ties to the lowest shard), so shards get about the
+    same number of outputs and every node computes the same assignment.
+    """
+    units = group_units(jobs)
+    loads = [0] * count
+    assignment = {}
+    for unit, unit_jobs in sorted(units.items(), key=lambda item: -len(item[1])):
+        shard = min(range(count), key=lambda i: (loads[i], i))
+        assignment[unit] = shard + 1
+        loads[shard] += len(unit_jobs)
+    return assignment
+
+
+# ============================================================================
+# RUNNING A SHARD
+# ============================================================================
+
+# (job key, 'ok' | 'empty' | 'error', message)
+UnitResult = List[Tuple[str, str, str]]
+
+STALE = "inputs changed since the manifest was planned"
+
+
+def _run_wearable(jobs: List[ManifestJob], root: Path, tools: Dict[str, str]) -> UnitResult:
+    wanted = {job.key: job for job in jobs}
+    db_records = wearable_sources().db_records
+    results = []
+    for planned, name, text, view_idx in wearable_documents(jobs[0].subject, root, tools['wearable']):
+        job = wanted.pop(planned.key, None)
+        if job is None:
+            continue
+        if planned.hash != job.hash:
+            results.append((job.key, 'error', STALE))
+            continue
+        output = root / 'output' / job.output
+        output.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            result = convert_svg_content(name, text, output, view_idx, db_records, SIZE, write_aseprite)
+        except (OSError, ValueError) as e:
+            results.append((job.key, 'error', str(e)))
+            continue
+        results.append((job.key, 'ok' if result.pixels else 'empty', ''))
+    results.extend((key, 'error', "no longer prepared for this item") for key in wanted)
+    return results
+
+
+def _run_collateral(jobs: List[ManifestJob], root: Path, tools: Dict[str, str]) -> UnitResult:
+    collateral = _collaterals().get(jobs[0].subject)
+    if collateral is None:
+        return [(job.key, 'error', STALE) for job in jobs]
+    parts, masks = _parts(), _masks()
+    results = []
+    for job in jobs:
+        part = parts.get(job.pose)
+        if part is None or collateral_hash(tools['collateral'], part, collateral.colors) != job.hash:
+            results.append((job.key, 'error', STALE))
+            continue
+        mask = masks.get(part.prefix)
+        if mask is not None:
+            rgba = mask.recolor(collateral.colors) if mask.pixel_count else None
+        else:
+            rgba = render_part(part.svg, collateral.colors, part.wrap)
+            rgba = rgba if any(rgba[3::4]) else None
+        if rgba is None:
+            results.append((job.key, 'empty', ''))
+            continue
+        output = root / 'output' / job.output
+        output.parent.mkdir(parents=True, exist_ok=True)
+        write_aseprite(output, rgba, SIZE, SIZE)
+        results.append((job.key, 'ok', ''))
+    return results
+
+
+def _run_eye_shape(jobs: List[ManifestJob], root: Path, tools: Dict[str, str]) -> UnitResult:
+    source = _eye_sources().get(jobs[0].unit[len('eye-shape/'):])
+    collaterals = _collaterals()
+    if source is None or any(job.subject not in collaterals for job in jobs):
+        return [(job.key, 'error', STALE) for job in jobs]
+    names = list(dict.fromkeys(job.subject for job in jobs))
+    cells = {cell.key: cell for cell in plan_matrix([source], [collaterals[n] for n in names], Path(''))}
+    specs, results = [], []
+    for job in jobs:
+        cell = cells.get(job.key)
+        if cell is None or cell_hash(cell, tools['eye-shape']) != job.hash:
+            results.append((job.key, 'error', STALE))
+            continue
+        specs.append((job.key, cell.eye_hex, cell.primary_hex, str(root / 'output' / job.output)))
+    if specs:
+        results.extend((key, status, '') for key, status, _ in render_source(source.svg, specs))
+    return results
+
+
+RUNNERS = {
+    'wearable': _run_wearable,
+    'collateral': _run_collateral,
+    'eye-shape': _run_eye_shape,
+}
+
+
+def run_unit(task: Tuple[str, List[dict], str, Dict[str, str]]) -> Tuple[str, UnitResult]:
+    """Worker: render the pending jobs of one unit under root; never raises"""
+    unit, job_dicts, root, tools = task
+    jobs = [ManifestJob(**job) for job in job_dicts]
+    try:
+        return unit, RUNNERS[jobs[0].kind](jobs, Path(root), tools)
+    except Exception as e:
+        return unit, [(job.key, 'error', f"{type(e).__name__}: {e}") for job in jobs]
+
+
+@dataclass
+class ShardPaths:
+    root: Path
+    ledger: Path
+    log: Path
+
+    @classmethod
+    def of(cls, work: Path, index: int, count: int) -> 'ShardPaths':
+        name = shard_name(index, count)
+        return cls(Path(work) / name, Path(work) / f"{name}.jsonl", Path(work) / f"{name}.log")
+
+
+def run_shard(manifest: Path, index: int, count: int, work: Path, jobs: int = 1,
+              force: bool = False) -> Dict[str, int]:
+    """Render this shard's pending jobs; returns the counts per status"""
+    header, manifest_jobs = read_manifest(manifest)
+    current = kind_tools()
+    kinds = {job.kind for job in manifest_jobs}
+    changed = sorted(kind for kind in kinds if header['tools'].get(kind) != current[kind])
+    if changed:
+        raise ValueError(f"Renderer scripts for {', '.join(changed)} differ from the ones the manifest was "
+                         f"planned with; check out the same revision on every node or plan again")
+
+    assignment = assign_shards(manifest_jobs, count)
+    mine = [job for job in manifest_jobs if assignment[job.unit] == index]
+    paths = ShardPaths.of(work, index, count)
+    # Outputs are recorded relative to the shard directory, so work can move
+    ledger = CompletionLedger(paths.ledger, paths.root)
+    pending = [job for job in mine if force or not ledger.is_fresh(job.key, job.hash)]
+    units = group_units(pending)
+    print(f"Shard {index}/{count}: {len(mine)} job(s) in {len(group_units(mine))} unit(s), "
+          f"{len(mine) - len(pending)} already done, {len(pending)} to render")
+
+    counts = {'ok': 0, 'empty': 0, 'error': 0}
+    if not units:
+        return counts
+    root = str(paths.root.resolve())
+    by_key = {job.key: job for job in pending}
+    tasks = [(unit, [asdict(job) for job in unit_jobs], root, current) for unit, unit_jobs in units.items()]
+    paths.log.parent.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+
+    with open(paths.log, 'a') as log:
+        def record(done: int, unit: str, results: UnitResult) -> None:
+            unit_counts = {'ok': 0, 'empty': 0, 'error': 0}
+            for key, status, message in results:
+                unit_counts[status] += 1
+                job = by_key[key]
+                if status == 'error':
+                    log.write(f"  ERROR {key}: {message}\n")
+                    continue
+                outputs = [Path('output') / job.output] if status == 'ok' else []
+                ledger.record(key, job.hash, status, outputs)
+            for status, n in unit_counts.items():
+                counts[status] += n
+            summary = ', '.join(f"{n} {status}" for status, n in unit_counts.items() if n)
+            log.write(f"{time.strftime('%Y-%m-%dT%H:%M:%S')} {unit}: {summary}\n")
+            log.flush()
+            print(f"[{done}/{len(tasks)}] {unit}: {summary}")
+
+        log.write(f"{time.strftime('%Y-%m-%dT%H:%M:%S')} shard {index}/{count} started on {os.uname().nodename}: "
+                  f"{len(pending)} job(s) in {len(tasks)} unit(s)\n")
+        try:
+            if jobs <= 1:
+                for done, task in enumerate(tasks, 1):
+                    record(done, *run_unit(task))
+            else:
+                with ProcessPoolExecutor(max_workers=jobs) as executor:
+                    futures = [executor.submit(run_unit, task) for task in tasks]
+                    for done, future in enumerate(as_completed(futures), 1):
+                        record(done, *future.result())
+        finally:
+            ledger.close()
+            log.write(f"{time.strftime('%Y-%m-%dT%H:%M:%S')} shard {index}/{count} finished in "
+                      f"{time.perf_counter() - start:.1f}s: {counts['ok']} ok, {counts['empty']} empty, "
+                      f"{counts['error']} failed\n")
+    return counts
+
+
+# ============================================================================
+# MERGING
+# ============================================================================
+
+@dataclass
+class MergeCheck:
+    # Job key -> (status, staged output or None)
+    done: Dict[str, Tuple[str, Optional[Path]]]
+    missing: List[ManifestJob]
+    ledgers: List[Path]
+
+
+def check_shards(jobs: Sequence[ManifestJob], work: Path) -> MergeCheck:
+    """Match every job against the shard ledgers in work"""
+    ledger_paths = sorted(p for p in Path(work).glob('shard-*-of-*.jsonl') if SHARD_FILE.match(p.name))
+    shards = []
+    for ledger_path in ledger_paths:
+        index, count = map(int, SHARD_FILE.match(ledger_path.name).groups())
+        root = ShardPaths.of(work, index, count).root
+        shards.append((root, CompletionLedger(ledger_path, root)))
+    done, missing = {}, []
+    for job in jobs:
+        for root, ledger in shards:
+            if ledger.is_fresh(job.key, job.hash) and ledger.entries[job.key].get('status') in ('ok', 'empty'):
+                status = ledger.entries[job.key]['status']
+                done[job.key] = (status, root / 'output' / job.output if status == 'ok' else None)
+                break
+        else:
+            missing.append(job)
+    return MergeCheck(done, missing, ledger_paths)
+
+
+def merge(header: dict, jobs: Sequence[ManifestJob], check: MergeCheck, dest: Path, dedup: bool = True) -> int:
+    """Collect the staged outputs, shard logs and the merged manifest into dest; returns the files copied"""
+    dest = Path(dest)
+    store = AssetStore(dest / '.store') if dedup else None
+    copied = 0
+    for job in jobs:
+        status, staged = check.done[job.key]
+        if status != 'ok':
+            continue
+        target = dest / job.output
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if store is not None:
+            store.put(target, staged.read_bytes())
+        else:
+            tmp_path = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+            shutil.copyfile(staged, tmp_path)
+            os.replace(tmp_path, target)
+        copied += 1
+
+    logs = dest / 'logs'
+    logs.mkdir(parents=True, exist_ok=True)
+    for ledger_path in check.ledgers:
+        log_path = ledger_path.with_suffix('.log')
+        if log_path.exists():
+            shutil.copyfile(log_path, logs / log_path.name)
+
+    merged = dest / 'library-manifest.jsonl'
+    tmp_path = merged.with_name(f"{merged.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w') as f:
+        f.write(json.dumps(header, sort_keys=True) + '\n')
+        for job in jobs:
+            f.write(json.dumps({**asdict(job), 'status': check.done[job.key][0]}, sort_keys=True) + '\n')
+    os.replace(tmp_path, merged)
+    return copied
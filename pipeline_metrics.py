@@ -0,0 +1,153 @@
+"""
+Structured timing metrics for the item generator.
+
+Metrics writes one JSON object per line to a metrics file (when a path is
+given) and keeps per-stage totals for the end-of-run summary:
+
+    {"ts": 1760000000.1, "event": "stage", "stage": "prepare", "item_id": "8", "seconds": 0.012}
+    {"ts": ..., "event": "view", "item_id": "8", "view": "Front", "ok": true, "seconds": 3.2,
+     "queued_seconds": 0.4, "timings": {"convert": 3.1, "rename": 0.001}}
+    {"ts": ..., "event": "process", "item_id": "8", "view": "Front",
+     "command": "batch-process.sh", "returncode": 0, "seconds": 3.1}
+    {"ts": ..., "event": "summary", "wall_seconds": 42.0,
+     "stages": {"prepare": {"count": 420, "seconds": 2.4}, ...}}
+
+Stages are named after what they time: load_wearables, load_db, prepare
+(SVG extraction, including write_svg, the temp file writes), hash (build
+cache), wait (draining the conversion queue), and the converter timings
+reported per view (convert, rename, worker_start, render).
+Safe to use from worker threads. Profiler adds cProfile output for the
+Python side (--profile).
+"""
+import cProfile
+import io
+import json
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+
+class Metrics:
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path is not None else None
+        self.totals: Dict[str, Dict[str, float]] = {}
+        self.start = time.perf_counter()
+        self._lock = threading.Lock()
+        self._file = None
+        if self.path is not None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, 'a')
+
+    def emit(self, event: str, **fields) -> None:
+        if self._file is None:
+            return
+        line = json.dumps({'ts': round(time.time(), 3), 'event': event, **fields}, default=str)
+        with self._lock:
+            self._file.write(line + '\n')
+            self._file.flush()
+
+    def add(self, stage: str, seconds: float, emit: bool = True, **labels) -> None:
+        """Record a timed stage; emit=False only adds it to the totals"""
+        with self._lock:
+            total = self.totals.setdefault(stage, {'count': 0, 'seconds': 0.0})
+            total['count'] += 1
+            total['seconds'] += seconds
+        if emit:
+            self.emit('stage', stage=stage, seconds=round(seconds, 6), **labels)
+
+    @contextmanager
+    def stage(self, stage: str, **labels):
+        """Time a block; extra fields can be added to the yielded dict"""
+        fields = dict(labels)
+        start = time.perf_counter()
+        try:
+            yield fields
+        finally:
+            self.add(stage, time.perf_counter() - start, **fields)
+
+    def view(self, result) -> None:
+        """Record a finished conversion job (a conversion_jobs.JobResult)"""
+        job = result.job
+        for stage, seconds in result.timings.items():
+            self.add(stage, seconds, emit=False)
+        self.emit(
+            'view', item_id=job.item_id, view=job.view_name, ok=result.ok,
+            returncode=result.returncode, seconds=round(result.elapsed, 6),
+            queued_seconds=round(result.queued, 6),
+            timings={k: round(v, 6) for k, v in result.timings.items()},
+        )
+        for invocation in result.invocations:
+            self.emit('process', item_id=job.item_id, view=job.view_name, **invocation)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        wall = time.perf_counter() - self.start
+        with self._lock:
+            stages = {k: {'count': v['count'], 'seconds': round(v['seconds'], 6)}
+                      for k, v in self.totals.items()}
+        self.emit('summary', wall_seconds=round(wall, 6), stages=stages)
+        return stages
+
+    def print_summary(self) -> None:
+        stages = self.summary()
+        if not stages:
+            return
+        print("\n== Stage timings ==")
+        for stage, total in sorted(stages.items(), key=lambda kv: -kv[1]['seconds']):
+            print(f"  {stage:<14} {total['seconds']:9.2f}s  ({int(total['count'])}x)")
+        if self.path is not None:
+            print(f"Metrics written to {self.path}")
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class Profiler:
+    """
+    cProfile for the Python side of a run. The main thread is profiled from
+    construction to dump(); conversion runners wrapped with wrap() are
+    profiled on their worker threads and merged into the same stats file.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._profiles = []
+        self._lock = threading.Lock()
+        self._main = cProfile.Profile()
+        self._main.enable()
+
+    def wrap(self, runner):
+        def profiled(job):
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Python 3.12+ profiles every thread from the main profiler
+                return runner(job)
+            try:
+                return runner(job)
+            finally:
+                profile.disable()
+                with self._lock:
+                    self._profiles.append(profile)
+        return profiled
+
+    def dump(self, top: int = 15) -> None:
+        self._main.disable()
+        stats = pstats.Stats(self._main, stream=io.StringIO())
+        with self._lock:
+            for profile in self._profiles:
+                stats.add(profile)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        stats.dump_stats(str(self.path))
+
+        report = io.StringIO()
+        stats.stream = report
+        stats.sort_stats('cumulative').print_stats(top)
+        print(f"\n== Profile (top {top} by cumulative time) ==")
+        print(report.getvalue().strip())
+        print(f"Profile written to {self.path} (python3 -m pstats {self.path})")
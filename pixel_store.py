@@ -0,0 +1,307 @@
+"""
+Single-file pixel store for the generated library.
+
+Every sprite the generator renders is kept trimmed to its opaque bounding
+box in one fixed-layout binary file (little endian), addressed by
+(item id, view, pose, collateral):
+
+    header   64 bytes: b'GPXS', version u16, reserved u16, sprite count u32,
+             strings offset u32, strings size u32, index offset u32,
+             pixels offset u32, zero padding
+    strings  u16 count, then u16 length + UTF-8 text per string; poses and
+             collaterals refer to it by number ('' is always string 0)
+    index    32 bytes per sprite, sorted by key: item id u32, view u8,
+             reserved u8, pose u16, collateral u16, x, y, w, h (opaque
+             rect in the canvas), canvas w, canvas h (u16), 2 bytes padding,
+             pixel offset u64 (absolute, 16-byte aligned)
+    pixels   w * h * 4 RGBA bytes per sprite, row major
+
+Views are numbered as in VIEWS. Poses are the suffix the generator puts after
+the view in the file name ('' for the body/item itself, 'Left', 'LeftUp',
+'Down', ...), see sprite_key(). Fully transparent sprites are stored as empty
+(0 x 0) entries, so a store also records which views rendered nothing.
+
+Sprites of a collateral rather than a wearable use item id COLLATERAL_ITEM
+(0) and the collateral's name: body parts (scripts/convert-collaterals.py)
+are (0, Front, <part>, <collateral>), see part_key(), and eye shape cells
+(eye-shapes-matrix.py) are (0, <view>, 'eye shape/<set>/<base>_<variant>',
+<collateral>), see eye_shape_key().
+
+    store = PixelStore('output/wearables.pxs')
+    store.array((8, 'Front', 'Left', ''))      # NumPy view into the mmap (h, w, 4)
+    store.canvas((8, 'Front', '', ''))         # placed on its 64x64 canvas (a copy)
+    store.array((0, 'Front', 'body_00', 'amDAI'))
+
+Readers only need mmap; array() and canvas() import NumPy when called.
+"""
+import mmap
+import os
+import re
+import struct
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, NamedTuple
+
+from sprite_atlas import crop, trim_rect
+
+MAGIC = b'GPXS'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIIIII')
+HEADER_SIZE = 64
+RECORD = struct.Struct('<IBBHH6H2xQ')
+ALIGN = 16
+
+VIEWS = ['Front', 'Left', 'Right', 'Back']
+
+ITEM_DIR = re.compile(r'^(\d+)_')
+# Item id of collateral sprites (wearable ids start at 1)
+COLLATERAL_ITEM = 0
+
+
+class Key(NamedTuple):
+    item_id: int
+    view: str
+    pose: str = ''
+    collateral: str = ''
+
+    def __str__(self) -> str:
+        return '/'.join(str(part) for part in self if part != '')
+
+
+@dataclass
+class Sprite:
+    # Opaque rect in the canvas and its RGBA bytes (w * h * 4)
+    x: int
+    y: int
+    w: int
+    h: int
+    canvas_w: int
+    canvas_h: int
+    pixels: bytes = b''
+
+
+def sprite_key(path: Path) -> Key:
+    """
+    Key of a generator output file:
+
+        output/8_MarineJacket/Front/8_MarineJacket_Front_LeftUp.aseprite  -> (8, Front, LeftUp)
+        output/8_MarineJacket/Left/8_MarineJacket_SideLeftDown.aseprite   -> (8, Left, Down)
+        output/1_CamoHat/1_CamoHat_front.aseprite                         -> (1, Front, '')
+    """
+    path = Path(path)
+    item_dir = next((p for p in path.parents if ITEM_DIR.match(p.name)), None)
+    if item_dir is None:
+        raise ValueError(f"Not a generator output path: {path}")
+    rest = path.stem[len(item_dir.name) + 1:] if path.stem.startswith(item_dir.name + '_') else path.stem
+    if path.parent == item_dir:
+        view = rest.capitalize()
+        pose = ''
+    else:
+        view = path.parent.name
+        pose = rest[len('Side'):] if rest.startswith('Side') else rest
+        pose = pose[len(view):] if pose.startswith(view) else pose
+        pose = pose.lstrip('_')
+    if view not in VIEWS:
+        raise ValueError(f"Unknown view '{view}' in {path}")
+    return Key(int(ITEM_DIR.match(item_dir.name).group(1)), view, pose, '')
+
+
+def part_key(collateral: str, part: str) -> Key:
+    """Key of a collateral body part, e.g. ('amDAI', 'hands_up') -> (0, Front, hands_up, amDAI)"""
+    return Key(COLLATERAL_ITEM, 'Front', part, collateral)
+
+
+def eye_shape_key(collateral: str, set_name: str, base: str, variant: str) -> Key:
+    """
+    Key of an eye shape cell; the view is the suffix of the source file:
+
+        ('amDAI', 'haunt1_id00_range0-1', 'haunt1_id00_left', 'common')
+            -> (0, Left, 'eye shape/haunt1_id00_range0-1/haunt1_id00_left_common', amDAI)
+    """
+    view = base.rsplit('_', 1)[-1].capitalize()
+    if view not in VIEWS:
+        raise ValueError(f"No view in eye shape name '{base}'")
+    return Key(COLLATERAL_ITEM, view, f"eye shape/{set_name}/{base}_{variant}", collateral)
+
+
+def make_sprite(rgba: bytes, width: int, height: int) -> Sprite:
+    """Trim RGBA canvas bytes to their opaque rect"""
+    x, y, w, h = trim_rect(bytes(rgba), width, height)
+    return Sprite(x, y, w, h, width, height, crop(bytes(rgba), width, (x, y, w, h)))
+
+
+# ============================================================================
+# WRITING
+# ============================================================================
+
+class PixelStoreBuilder:
+    """Sprites collected from converter threads, written as one store file"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.sprites: Dict[Key, Sprite] = {}
+        # Keys added in this run (as opposed to loaded from the existing store)
+        self.added = set()
+        self.lock = threading.Lock()
+
+    def load_existing(self) -> int:
+        """Start from the sprites of the store at path (for incremental runs)"""
+        if not self.path.exists():
+            return 0
+        try:
+            store = PixelStore(self.path)
+        except ValueError as e:
+            print(f"Warning: Ignoring unreadable pixel store {self.path}: {e}")
+            return 0
+        with self.lock:
+            for key in store.keys():
+                self.sprites[key] = store.sprite(key)
+        store.close()
+        return len(self.sprites)
+
+    def add(self, key: Key, rgba: bytes, width: int, height: int) -> None:
+        sprite = make_sprite(rgba, width, height)
+        with self.lock:
+            self.sprites[key] = sprite
+            self.added.add(key)
+
+    def add_empty(self, key: Key, width: int = 64, height: int = 64) -> None:
+        with self.lock:
+            self.sprites[key] = Sprite(0, 0, 0, 0, width, height)
+            self.added.add(key)
+
+    def __contains__(self, key: Key) -> bool:
+        with self.lock:
+            return key in self.sprites
+
+    def __len__(self) -> int:
+        return len(self.sprites)
+
+    def encode(self) -> bytes:
+        with self.lock:
+            items = sorted(self.sprites.items())
+        strings = ['']
+        string_ids = {'': 0}
+        for key, _ in items:
+            for text in (key.pose, key.collateral):
+                if text not in string_ids:
+                    string_ids[text] = len(strings)
+                    strings.append(text)
+        string_block = struct.pack('<H', len(strings)) + b''.join(
+            struct.pack('<H', len(s.encode('utf-8'))) + s.encode('utf-8') for s in strings
+        )
+
+        strings_offset = HEADER_SIZE
+        index_offset = _aligned(strings_offset + len(string_block))
+        pixels_offset = _aligned(index_offset + RECORD.size * len(items))
+        records = []
+        pixel_parts = []
+        position = pixels_offset
+        for key, sprite in items:
+            records.append(RECORD.pack(
+                key.item_id, VIEWS.index(key.view), 0, string_ids[key.pose], string_ids[key.collateral],
+                sprite.x, sprite.y, sprite.w, sprite.h, sprite.canvas_w, sprite.canvas_h, position,
+            ))
+            padded = _aligned(len(sprite.pixels))
+            pixel_parts.append(sprite.pixels.ljust(padded, b'\0'))
+            position += padded
+
+        header = HEADER.pack(MAGIC, VERSION, 0, len(items), strings_offset, len(string_block),
+                             index_offset, pixels_offset).ljust(HEADER_SIZE, b'\0')
+        return b''.join([
+            header,
+            string_block.ljust(index_offset - strings_offset, b'\0'),
+            b''.join(records).ljust(pixels_offset - index_offset, b'\0'),
+            *pixel_parts,
+        ])
+
+    def save(self) -> None:
+        """Write the store atomically (readers keep their old mapping)"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(self.encode())
+        os.replace(tmp_path, self.path)
+
+
+def _aligned(size: int) -> int:
+    return -(-size // ALIGN) * ALIGN
+
+
+# ============================================================================
+# READING
+# ============================================================================
+
+class PixelStore:
+    """Memory-mapped, read-only view of a pixel store file"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < HEADER_SIZE:
+                raise ValueError(f"{self.path}: file too small for a pixel store")
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, _, count, strings_offset, _, index_offset, _ = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError(f"{self.path}: not a version {VERSION} pixel store")
+
+        string_count, = struct.unpack_from('<H', self._map, strings_offset)
+        strings = []
+        position = strings_offset + 2
+        for _ in range(string_count):
+            length, = struct.unpack_from('<H', self._map, position)
+            strings.append(self._map[position + 2:position + 2 + length].decode('utf-8'))
+            position += 2 + length
+
+        # key -> (x, y, w, h, canvas w, canvas h, pixel offset)
+        self._index: Dict[Key, tuple] = {}
+        for i in range(count):
+            item_id, view, _, pose, collateral, *rect, offset = RECORD.unpack_from(
+                self._map, index_offset + i * RECORD.size)
+            self._index[Key(item_id, VIEWS[view], strings[pose], strings[collateral])] = (*rect, offset)
+
+    def keys(self) -> Iterator[Key]:
+        return iter(self._index)
+
+    def __contains__(self, key) -> bool:
+        return Key(*key) in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def entry(self, key) -> tuple:
+        """(x, y, w, h, canvas w, canvas h, pixel offset) of a sprite"""
+        return self._index[Key(*key)]
+
+    def pixels(self, key) -> memoryview:
+        """Zero-copy view of a sprite's trimmed RGBA bytes"""
+        _, _, w, h, _, _, offset = self.entry(key)
+        return memoryview(self._map)[offset:offset + w * h * 4]
+
+    def sprite(self, key) -> Sprite:
+        x, y, w, h, canvas_w, canvas_h, offset = self.entry(key)
+        return Sprite(x, y, w, h, canvas_w, canvas_h, self._map[offset:offset + w * h * 4])
+
+    def array(self, key):
+        """Trimmed sprite as a read-only NumPy (h, w, 4) view into the mapping"""
+        import numpy as np
+        _, _, w, h, _, _, offset = self.entry(key)
+        return np.frombuffer(self._map, dtype=np.uint8, count=w * h * 4, offset=offset).reshape(h, w, 4)
+
+    def canvas(self, key):
+        """Sprite placed on its full transparent canvas (a NumPy copy)"""
+        import numpy as np
+        x, y, w, h, canvas_w, canvas_h, _ = self.entry(key)
+        canvas = np.zeros((canvas_h, canvas_w, 4), dtype=np.uint8)
+        if w:
+            canvas[y:y + h, x:x + w] = self.array(key)
+        return canvas
+
+    def close(self) -> None:
+        try:
+            self._map.close()
+        except BufferError:
+            # NumPy views handed out by array() still reference the mapping
+            pass
+
@@ -0,0 +1,306 @@
+"""
+Local preview service: wearable views rendered to PNG on demand.
+
+PreviewRenderer turns (item id, view, pose, collateral) into a 64x64 PNG
+with the Python renderer (svg_renderer.py), starting from the per-view SVG
+documents the generator prepares for an item. Rendered PNGs and prepared
+documents are kept in size-bounded LRU caches; concurrent requests for the
+same missing entry render it once. PreviewServer serves it over HTTP, one
+thread per request:
+
+    GET /render/8/front.png                              body item, front view
+    GET /render/8/front.png?pose=LeftUp&collateral=amDAI one sleeve pose, recolored
+    GET /items/8                                         name and renderable (view, pose) pairs
+    GET /collaterals                                     collateral names
+    GET /stats                                           cache hits/misses and latencies
+
+Poses are named as in pixel_store.sprite_key(): '' for the item itself,
+'Left', 'LeftUp', 'Down', ... Without a collateral, color classes render the
+way the generator renders them (black); with one, groups of class
+gotchi-primary, gotchi-secondary or gotchi-cheek take the collateral's color.
+scripts/preview-server.py wires it to the generator.
+"""
+import json
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from collateral_palette import Collateral
+from conversion_jobs import ConversionJob
+from pixel_store import VIEWS, sprite_key
+from svg_renderer import convert_svg_content, encode_png
+
+TARGET_SIZE = 64
+
+GROUP_TAG = re.compile(r'<g\b[^>]*>')
+COLOR_CLASSES = {
+    'gotchi-primary': 'primary',
+    'gotchi-secondary': 'secondary',
+    'gotchi-cheek': 'cheek',
+}
+
+
+class LRUCache:
+    """Thread-safe LRU mapping bounded by the total size of its values"""
+
+    def __init__(self, max_bytes: int, size: Callable = len):
+        self.max_bytes = max_bytes
+        self.size = size
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._pending: Dict[object, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key, compute: Callable[[], object]) -> Tuple[object, bool]:
+        """(value, hit); a miss computes the value once while other callers for the key wait"""
+        while True:
+            with self._lock:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return self._entries[key], True
+                pending = self._pending.get(key)
+                if pending is None:
+                    self.misses += 1
+                    pending = self._pending[key] = threading.Event()
+                    break
+            pending.wait()
+            # The value may have been evicted again or failed; look it up anew
+
+        try:
+            value = compute()
+            self.put(key, value)
+            return value, False
+        finally:
+            with self._lock:
+                del self._pending[key]
+            pending.set()
+
+    def put(self, key, value) -> None:
+        size = self.size(value)
+        with self._lock:
+            if key in self._entries:
+                self.bytes -= self.size(self._entries.pop(key))
+            if size > self.max_bytes:
+                return
+            self._entries[key] = value
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= self.size(evicted)
+                self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries), 'bytes': self.bytes, 'max_bytes': self.max_bytes,
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+class LatencyStats:
+    """Request latencies: totals plus percentiles over the most recent requests"""
+
+    def __init__(self, window: int = 1024):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+            self._recent.append(seconds)
+
+    def stats(self) -> dict:
+        with self._lock:
+            recent = sorted(self._recent)
+            count, total, longest = self.count, self.total, self.max
+
+        def percentile(p):
+            return round(recent[min(len(recent) - 1, int(p * len(recent)))] * 1000, 3) if recent else None
+
+        return {
+            'count': count,
+            'mean_ms': round(total / count * 1000, 3) if count else None,
+            'p50_ms': percentile(0.5),
+            'p95_ms': percentile(0.95),
+            'max_ms': round(longest * 1000, 3),
+        }
+
+
+def apply_collateral(svg: str, colors: Dict[str, str]) -> str:
+    """Give groups of a color class without their own fill the collateral's color"""
+    def fill(match):
+        tag = match.group()
+        class_match = re.search(r'\bclass="([^"]*)"', tag)
+        if not class_match or re.search(r'\sfill=', tag):
+            return tag
+        slot = next((COLOR_CLASSES[c] for c in class_match.group(1).split() if c in COLOR_CLASSES), None)
+        if slot is None:
+            return tag
+        return f'{tag[:2]} fill="{colors[slot]}"{tag[2:]}'
+    return GROUP_TAG.sub(fill, svg)
+
+
+# (view, pose) -> (SVG file name, SVG text, view index)
+Documents = Dict[Tuple[str, str], Tuple[str, str, int]]
+
+
+class PreviewRenderer:
+    """
+    Renders the views of wearables on demand. prepare(item_id) returns the
+    item's conversion jobs with their documents in memory (see
+    generate-single-item-all-views.py --in-memory); it is never called
+    concurrently.
+    """
+
+    def __init__(self, wearables, db_records, prepare: Callable[[str], List[ConversionJob]],
+                 collaterals: Sequence[Collateral] = (), cache_bytes: int = 64 << 20,
+                 document_bytes: int = 32 << 20):
+        self.wearables = wearables
+        self.db_records = db_records if db_records is not None else {}
+        self.prepare = prepare
+        self.collaterals = {c.name.lower(): c for c in collaterals}
+        self.renders = LRUCache(cache_bytes)
+        self.documents = LRUCache(document_bytes, size=lambda docs: sum(len(text) for _, text, _ in docs.values()))
+        self.hit_latency = LatencyStats()
+        self.miss_latency = LatencyStats()
+        self._prepare_lock = threading.Lock()
+
+    def item_documents(self, item_id: str) -> Documents:
+        if item_id not in self.wearables:
+            raise KeyError(f"Item {item_id} not found in wearables JSON")
+
+        def prepare():
+            with self._prepare_lock:
+                jobs = self.prepare(item_id)
+            documents = {}
+            for job in jobs:
+                for name, text in job.documents or ():
+                    key = sprite_key(Path(job.output_dir) / f"{Path(name).stem}.png")
+                    documents[(key.view, key.pose)] = (name, text, job.view_idx)
+            return documents
+
+        return self.documents.get_or_compute(item_id, prepare)[0]
+
+    def collateral(self, name: Optional[str]) -> Optional[Collateral]:
+        if not name:
+            return None
+        collateral = self.collaterals.get(name.lower())
+        if collateral is None:
+            raise KeyError(f"Unknown collateral '{name}'")
+        return collateral
+
+    def render(self, item_id: str, view: str, pose: str = '', collateral: Optional[str] = None) -> Tuple[bytes, bool]:
+        """(PNG bytes, cache hit) of one view; a view that renders nothing is a transparent PNG"""
+        start = time.perf_counter()
+        view = view.capitalize()
+        if view not in VIEWS:
+            raise ValueError(f"Unknown view '{view}' (expected one of {', '.join(VIEWS)})")
+        colors = self.collateral(collateral)
+        key = (str(item_id), view, pose, colors.name if colors else '')
+
+        def render():
+            documents = self.item_documents(str(item_id))
+            if (view, pose) not in documents:
+                raise KeyError(f"Item {item_id} has no {view} view" + (f" with pose '{pose}'" if pose else ''))
+            name, svg, view_idx = documents[(view, pose)]
+            if colors is not None:
+                svg = apply_collateral(svg, colors.colors)
+            rendered = []
+            convert_svg_content(name, svg, None, view_idx, self.db_records, TARGET_SIZE,
+                                lambda _path, rgba, width, height: rendered.append(rgba))
+            rgba = rendered[0] if rendered else bytes(TARGET_SIZE * TARGET_SIZE * 4)
+            return encode_png(rgba, TARGET_SIZE, TARGET_SIZE)
+
+        png, hit = self.renders.get_or_compute(key, render)
+        (self.hit_latency if hit else self.miss_latency).record(time.perf_counter() - start)
+        return png, hit
+
+    def item_info(self, item_id: str) -> dict:
+        documents = self.item_documents(item_id)
+        record = self.wearables[item_id]
+        return {
+            'id': int(item_id),
+            'name': record.get('name'),
+            'views': [{'view': view, 'pose': pose} for view, pose in
+                      sorted(documents, key=lambda key: (VIEWS.index(key[0]), key[1]))],
+        }
+
+    def stats(self) -> dict:
+        return {
+            'renders': self.renders.stats(),
+            'documents': self.documents.stats(),
+            'latency': {'hit': self.hit_latency.stats(), 'miss': self.miss_latency.stats()},
+        }
+
+
+class PreviewHandler(BaseHTTPRequestHandler):
+    server: 'PreviewServer'
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        parts = [part for part in url.path.split('/') if part]
+        renderer = self.server.renderer
+        try:
+            if len(parts) == 3 and parts[0] == 'render' and parts[2].endswith('.png'):
+                png, hit = renderer.render(parts[1], parts[2][:-len('.png')], query.get('pose', ''),
+                                           query.get('collateral'))
+                self.send(200, png, 'image/png', {'X-Cache': 'hit' if hit else 'miss'})
+            elif len(parts) == 2 and parts[0] == 'items':
+                self.send_json(200, renderer.item_info(parts[1]))
+            elif parts == ['collaterals']:
+                self.send_json(200, sorted(c.name for c in renderer.collaterals.values()))
+            elif parts == ['stats']:
+                self.send_json(200, renderer.stats())
+            else:
+                self.send_json(404, {'error': f"No such endpoint: {url.path}"})
+        except KeyError as e:
+            self.send_json(404, {'error': e.args[0]})
+        except ValueError as e:
+            self.send_json(400, {'error': str(e)})
+        except Exception as e:
+            self.send_json(500, {'error': f"{type(e).__name__}: {e}"})
+
+    def send(self, status: int, body: bytes, content_type: str, headers: Optional[dict] = None) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, status: int, data) -> None:
+        self.send(status, json.dumps(data, indent=2).encode('utf-8') + b'\n', 'application/json')
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class PreviewServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, renderer: PreviewRenderer, verbose: bool = False):
+        super().__init__(address, PreviewHandler)
+        self.renderer = renderer
+        self.verbose = verbose
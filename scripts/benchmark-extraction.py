@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Time the SVG preparation stage of generate-single-item-all-views.py (fragment
+extraction and writing of the per-view SVGs, no conversion) over every body
+item, or every item with --all-items.
+
+Usage: python3 scripts/benchmark-extraction.py [--repeat 3] [--keep DIR]
+"""
+import argparse
+import contextlib
+import io
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO))
+
+from item_preparation import (  # noqa: E402
+    PreparedSVGs, body_flags_from, load_db_wearables, load_wearables, prepare_item,
+)
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Benchmark per-item SVG fragment extraction for body items."
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Timing runs; the best run is reported (default: 3).",
+    )
+    parser.add_argument(
+        "--all-items",
+        action="store_true",
+        help="Include non-body items.",
+    )
+    parser.add_argument(
+        "--keep",
+        help="Write the prepared SVGs of the last run to this directory (for diffing).",
+    )
+    return parser
+
+
+def main() -> None:
+    args = build_arg_parser().parse_args()
+    examples = REPO / 'examples/svgItems'
+    wearables = load_wearables(str(REPO / 'wearables-1-420.json'))
+    body_flags = body_flags_from(load_db_wearables(str(REPO / 'aavegotchi_db_wearables.json')))
+    items = [
+        (item_id, body_flags.get(int(item_id), False))
+        for item_id in sorted(wearables, key=int)
+        if args.all_items or body_flags.get(int(item_id), False)
+    ]
+    records = {item_id: wearables[item_id] for item_id, _ in items}
+
+    best = None
+    for _ in range(max(1, args.repeat)):
+        work_dir = Path(tempfile.mkdtemp(prefix='extract-bench-'))
+        prepared = PreparedSVGs()
+        failures = 0
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for item_id, is_body in items:
+                try:
+                    prepare_item(item_id, records[item_id], is_body, prepared, work_dir, examples)
+                except Exception:
+                    failures += 1
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        if args.keep:
+            shutil.rmtree(args.keep, ignore_errors=True)
+            shutil.copytree(work_dir / 'tmp', args.keep)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    kind = 'items' if args.all_items else 'body items'
+    print(f"Prepared {len(items)} {kind} in {best:.2f}s "
+          f"({best / max(1, len(items)) * 1000:.1f} ms/item, {failures} failed)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark the per-pixel renderer (svg_renderer) against the vectorized
+NumPy raster core (svg_renderer_numpy) over every wearable view in the
+wearables JSON, and check that both produce identical RGBA tiles.
+
+Usage: python3 scripts/benchmark-raster.py [--json wearables-1-420.json] [--repeat 3]
+"""
+import argparse
+import json
+import math
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from svg_renderer import parse_svg, place_pixels, render  # noqa: E402
+from svg_renderer_numpy import render_batch  # noqa: E402
+
+VIEWS = ['Front', 'Left', 'Right', 'Back']
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Compare per-pixel and NumPy rasterization over all wearable views."
+    )
+    parser.add_argument(
+        "--json",
+        default="wearables-1-420.json",
+        help="Path to the wearables JSON file (default: wearables-1-420.json).",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Timing runs per renderer; the best run is reported (default: 3).",
+    )
+    return parser
+
+
+def load_views(json_path: Path):
+    """Parse every side SVG once; both renderers share the parsed data"""
+    wearables = json.loads(json_path.read_text())['wearables']
+    views = []
+    for item_id in sorted(wearables, key=int):
+        sides = wearables[item_id].get('sides') or {}
+        for view in VIEWS:
+            svg = (sides.get(view) or {}).get('svg')
+            if svg:
+                views.append((item_id, view, parse_svg(svg.strip().strip('`'))))
+    return views
+
+
+def native_size(svg_data):
+    return math.floor(svg_data.view_box.width), math.floor(svg_data.view_box.height)
+
+
+def per_pixel(parsed):
+    """svg_renderer.render one view at a time, converted to RGBA arrays"""
+    canvases = []
+    for svg_data in parsed:
+        width, height = native_size(svg_data)
+        result = render(svg_data, width, height)
+        size = max(width, height, 1)
+        rgba = np.frombuffer(place_pixels(result, (0, 0), size), dtype=np.uint8)
+        canvases.append(rgba.reshape(size, size, 4)[:height, :width])
+    return canvases
+
+
+def vectorized(parsed):
+    """svg_renderer_numpy.render_batch over every view at once"""
+    stack = render_batch(parsed)
+    return [stack[i, :height, :width] for i, (width, height) in enumerate(map(native_size, parsed))]
+
+
+def time_renderer(renderer, parsed, repeat):
+    best = None
+    canvases = None
+    for _ in range(max(1, repeat)):
+        start = time.perf_counter()
+        canvases = renderer(parsed)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, canvases
+
+
+def main() -> None:
+    args = build_arg_parser().parse_args()
+
+    start = time.perf_counter()
+    views = load_views(Path(args.json))
+    print(f"Parsed {len(views)} views in {time.perf_counter() - start:.2f}s")
+
+    parsed = [svg_data for _, _, svg_data in views]
+    pixel_time, pixel_out = time_renderer(per_pixel, parsed, args.repeat)
+    numpy_time, numpy_out = time_renderer(vectorized, parsed, args.repeat)
+
+    mismatches = [
+        f"{item_id} {view}"
+        for (item_id, view, _), a, b in zip(views, pixel_out, numpy_out)
+        if not np.array_equal(a, b)
+    ]
+
+    print(f"Per-pixel: {pixel_time:.2f}s ({len(views) / pixel_time:.0f} views/s)")
+    print(f"NumPy:     {numpy_time:.2f}s ({len(views) / numpy_time:.0f} views/s)")
+    print(f"Speedup:   {pixel_time / numpy_time:.1f}x")
+    print(f"Identical: {len(views) - len(mismatches)}/{len(views)}")
+    for label in mismatches[:20]:
+        print(f"  ✗ {label}")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
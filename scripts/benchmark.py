@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the Python side of the pipeline, on the repo's fixtures
+(wearables-1-420.json, aavegotchi_db_wearables.json, examples/svgItems and
+the haunt collateral JSONs). Every stage reports items/sec (best of
+--repeat runs) and its peak traced memory (one extra run under tracemalloc):
+
+    json_load           index wearables-1-420.json and decode every record
+    group_extraction    wearable groups of every side SVG (FragmentIndex)
+    sleeve_assembly     per-view SVGs of every body item, sleeves included
+                        (the generator's prepare step, in memory)
+    path_parsing        svg_renderer.parse_svg of every side SVG
+    rasterization       svg_renderer.render of every parsed side
+    rasterization_numpy svg_renderer_numpy.render_batch (when NumPy is installed)
+    aseprite_encode     .aseprite encoding of every rendered side
+    collateral_recolor  body parts x collaterals by palette swap, encoded
+
+svg_renderer.py is a pixel-identical port of svg-parser.lua and
+svg-renderer-professional.lua, so the parsing and rasterization stages track
+changes to the Lua algorithms too.
+
+Results go to a JSON file (default .build-cache/bench/<time>-<commit>.json);
+--compare OLD.json prints the change per stage against an earlier run on the
+same machine and exits with 1 when a stage got slower than --threshold.
+
+Usage: python3 scripts/benchmark.py [--repeat 3] [--stages a,b] [--limit N]
+                                    [--output PATH] [--compare OLD.json]
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+REPO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO))
+
+from aseprite_file import encode_aseprite  # noqa: E402
+from collateral_palette import COLLATERAL_FILES, MAIN_DB, collateral_parts, load_collaterals, rasterize_part  # noqa: E402
+from item_preparation import PreparedSVGs, body_flags_from, prepare_item  # noqa: E402
+from svg_fragments import FragmentIndex  # noqa: E402
+from svg_renderer import parse_svg, place_pixels, render  # noqa: E402
+from wearables_data import open_wearables  # noqa: E402
+
+VIEWS = ['Front', 'Left', 'Right', 'Back']
+WEARABLES_JSON = REPO / 'wearables-1-420.json'
+DB_JSON = REPO / 'aavegotchi_db_wearables.json'
+
+# setup() -> state, run(state) -> items processed
+Stage = Tuple[Callable[[], object], Callable[[object], int]]
+
+
+class Fixtures:
+    """Inputs shared by the stages, loaded once (outside the timings)"""
+
+    def __init__(self, limit: Optional[int] = None):
+        self.limit = limit
+        self._wearables = None
+        self._sides = None
+        self._parsed = None
+
+    @property
+    def wearables(self) -> Dict[str, dict]:
+        if self._wearables is None:
+            records = json.loads(WEARABLES_JSON.read_text())['wearables']
+            ids = sorted(records, key=int)[:self.limit]
+            self._wearables = {item_id: records[item_id] for item_id in ids}
+        return self._wearables
+
+    @property
+    def sides(self) -> List[str]:
+        """Side SVG texts of every item, in item and view order"""
+        if self._sides is None:
+            self._sides = [
+                svg.strip().strip('`')
+                for item in self.wearables.values()
+                for view in VIEWS
+                for svg in [((item.get('sides') or {}).get(view) or {}).get('svg')]
+                if svg
+            ]
+        return self._sides
+
+    @property
+    def parsed(self):
+        if self._parsed is None:
+            self._parsed = [parse_svg(svg) for svg in self.sides]
+        return self._parsed
+
+
+def native_size(svg_data) -> Tuple[int, int]:
+    return math.floor(svg_data.view_box.width), math.floor(svg_data.view_box.height)
+
+
+def stage_json_load(fixtures: Fixtures) -> Stage:
+    def run(index_dir: Path) -> int:
+        # A fresh index every run: the scan is part of loading
+        index_dir.mkdir(parents=True, exist_ok=True)
+        for path in index_dir.glob('*'):
+            path.unlink()
+        wearables = open_wearables(WEARABLES_JSON, index_dir)
+        ids = sorted(wearables, key=int)[:fixtures.limit]
+        for item_id in ids:
+            wearables[item_id]
+        return len(ids)
+    return (lambda: REPO / '.build-cache/bench/index'), run
+
+
+def stage_group_extraction(fixtures: Fixtures) -> Stage:
+    def run(sides: List[str]) -> int:
+        for svg in sides:
+            FragmentIndex.from_text(svg, ignore_errors=True).find_all('gotchi-wearable')
+        return len(sides)
+    return (lambda: fixtures.sides), run
+
+
+def stage_sleeve_assembly(fixtures: Fixtures) -> Stage:
+    def setup():
+        body_flags = body_flags_from(open_wearables(DB_JSON))
+        return [(item_id, item) for item_id, item in fixtures.wearables.items()
+                if body_flags.get(int(item_id), False)]
+
+    def run(items) -> int:
+        prepared = PreparedSVGs(in_memory=True)
+        with contextlib.redirect_stdout(io.StringIO()):
+            for item_id, item in items:
+                prepare_item(item_id, item, True, prepared, REPO, REPO / 'examples/svgItems')
+        return len(items)
+    return setup, run
+
+
+def stage_path_parsing(fixtures: Fixtures) -> Stage:
+    def run(sides: List[str]) -> int:
+        for svg in sides:
+            parse_svg(svg)
+        return len(sides)
+    return (lambda: fixtures.sides), run
+
+
+def stage_rasterization(fixtures: Fixtures) -> Stage:
+    def run(parsed) -> int:
+        for svg_data in parsed:
+            render(svg_data, *native_size(svg_data))
+        return len(parsed)
+    return (lambda: fixtures.parsed), run
+
+
+def stage_rasterization_numpy(fixtures: Fixtures) -> Optional[Stage]:
+    try:
+        from svg_renderer_numpy import render_batch
+    except ImportError:
+        return None
+
+    def run(parsed) -> int:
+        render_batch(parsed)
+        return len(parsed)
+    return (lambda: fixtures.parsed), run
+
+
+def stage_aseprite_encode(fixtures: Fixtures) -> Stage:
+    def setup():
+        tiles = []
+        for svg_data in fixtures.parsed:
+            width, height = native_size(svg_data)
+            size = max(width, height, 1)
+            tiles.append((place_pixels(render(svg_data, width, height), (0, 0), size), size))
+        return tiles
+
+    def run(tiles) -> int:
+        for rgba, size in tiles:
+            encode_aseprite(rgba, size, size)
+        return len(tiles)
+    return setup, run
+
+
+def stage_collateral_recolor(fixtures: Fixtures) -> Stage:
+    def setup():
+        return collateral_parts(REPO / MAIN_DB), load_collaterals([REPO / p for p in COLLATERAL_FILES])
+
+    def run(state) -> int:
+        parts, collaterals = state
+        variants = 0
+        for part in parts:
+            mask = rasterize_part(part.svg, part.wrap)
+            for collateral in collaterals:
+                encode_aseprite(mask.recolor(collateral.colors), 64, 64)
+                variants += 1
+        return variants
+    return setup, run
+
+
+STAGES = {
+    'json_load': stage_json_load,
+    'group_extraction': stage_group_extraction,
+    'sleeve_assembly': stage_sleeve_assembly,
+    'path_parsing': stage_path_parsing,
+    'rasterization': stage_rasterization,
+    'rasterization_numpy': stage_rasterization_numpy,
+    'aseprite_encode': stage_aseprite_encode,
+    'collateral_recolor': stage_collateral_recolor,
+}
+
+
+def measure(stage: Stage, repeat: int) -> dict:
+    setup, run = stage
+    state = setup()
+    best = None
+    items = 0
+    for _ in range(max(1, repeat)):
+        gc.collect()
+        start = time.perf_counter()
+        items = run(state)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    gc.collect()
+    tracemalloc.start()
+    run(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'items': items,
+        'seconds': round(best, 6),
+        'items_per_sec': round(items / best, 2) if best else None,
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+def git_commit() -> Tuple[str, bool]:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=REPO,
+                                    capture_output=True, text=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown', False
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> bool:
+    """Print per-stage changes; True when a stage got slower than threshold"""
+    regressed = False
+    print(f"\nAgainst {baseline.get('commit', '?')[:10]} ({baseline.get('timestamp', '?')}):")
+    for name, stage in current['stages'].items():
+        old = baseline.get('stages', {}).get(name)
+        if not old or not old.get('items_per_sec') or not stage.get('items_per_sec'):
+            print(f"  {name:20s} (no baseline)")
+            continue
+        change = stage['items_per_sec'] / old['items_per_sec'] - 1
+        memory = stage['peak_kib'] - old['peak_kib']
+        flag = ''
+        if change < -threshold:
+            flag = '  SLOWER'
+            regressed = True
+        print(f"  {name:20s} {change:+7.1%} items/s, {memory:+10.1f} KiB peak{flag}")
+    if baseline.get('machine') != current.get('machine'):
+        print("  Warning: the baseline was recorded on a different machine")
+    if baseline.get('limit') != current.get('limit'):
+        print("  Warning: the baseline used a different --limit")
+    return regressed
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Benchmark JSON loading, extraction, sleeve assembly, parsing, rasterization and encoding."
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Timing runs per stage; the best run is reported (default: 3).",
+    )
+    parser.add_argument(
+        "--stages",
+        help=f"Comma-separated stages to run (default: all of {', '.join(STAGES)}).",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        help="Only use the first N wearables (quick runs).",
+    )
+    parser.add_argument(
+        "--output",
+        help="Results file (default: .build-cache/bench/<time>-<commit>.json).",
+    )
+    parser.add_argument(
+        "--compare",
+        metavar="OLD_JSON",
+        help="Compare with the results of an earlier run.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="Slowdown that counts as a regression with --compare (default: 0.10).",
+    )
+    return parser
+
+
+def main() -> None:
+    parser = build_arg_parser()
+    args = parser.parse_args()
+    names = [n.strip() for n in args.stages.split(',')] if args.stages else list(STAGES)
+    unknown = [n for n in names if n not in STAGES]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    os.chdir(REPO)
+    fixtures = Fixtures(args.limit)
+    commit, dirty = git_commit()
+    results = {
+        'commit': commit,
+        'dirty': dirty,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'machine': f"{platform.node()} {platform.machine()} {os.cpu_count()} cpu",
+        'python': platform.python_version(),
+        'repeat': args.repeat,
+        'limit': args.limit,
+        'stages': {},
+    }
+
+    for name in names:
+        stage = STAGES[name](fixtures)
+        if stage is None:
+            print(f"{name:20s} skipped (dependency not installed)")
+            continue
+        result = measure(stage, args.repeat)
+        results['stages'][name] = result
+        print(f"{name:20s} {result['items']:6d} items {result['seconds']:8.3f}s "
+              f"{result['items_per_sec'] or 0:10.1f} items/s {result['peak_kib']:10.1f} KiB peak")
+
+    output = Path(args.output) if args.output else (
+        REPO / '.build-cache/bench' / f"{time.strftime('%Y%m%d-%H%M%S')}-{commit[:10]}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2) + '\n')
+    print(f"Results written to {output}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Check aseprite_file.py against files saved by Aseprite: decode every
+.aseprite under a directory, re-encode it and compare the bytes.
+
+Files Aseprite saved for svg-file-converter.lua (full-canvas cel, default
+palette) should all be identical; sprites with cropped cels or other layer
+setups from older importers are reported as differing.
+
+Usage: python3 scripts/check-aseprite-file.py [DIR] [--show N]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO))
+
+from aseprite_file import AsepriteFormatError, decode_sprite, encode_sprite  # noqa: E402
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Round-trip .aseprite files through aseprite_file.py and compare bytes."
+    )
+    parser.add_argument(
+        "directory",
+        nargs="?",
+        default=str(REPO / 'output'),
+        help="Directory searched recursively for .aseprite files (default: output/).",
+    )
+    parser.add_argument(
+        "--show",
+        type=int,
+        default=10,
+        help="Differing files to list (default: 10).",
+    )
+    return parser
+
+
+def main() -> None:
+    args = build_arg_parser().parse_args()
+    files = sorted(Path(args.directory).rglob('*.aseprite'))
+    identical = 0
+    differing = []
+    unreadable = []
+    for path in files:
+        data = path.read_bytes()
+        try:
+            sprite = decode_sprite(data)
+        except (AsepriteFormatError, ValueError) as e:
+            unreadable.append(f"{path}: {e}")
+            continue
+        if encode_sprite(sprite) == data:
+            identical += 1
+        else:
+            differing.append(str(path))
+
+    print(f"{len(files)} file(s): {identical} identical, {len(differing)} differing, "
+          f"{len(unreadable)} unsupported")
+    for line in (differing + unreadable)[:args.show]:
+        print(f"  {line}")
+    if not files:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
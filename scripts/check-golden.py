@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Golden-image regression check: render (or decode) every asset of the chosen
+sets and diff it against the stored golden stacks (golden_images.py).
+
+    python3 scripts/check-golden.py --update          # record the golden set
+    python3 scripts/check-golden.py                   # check against it
+
+Prints per-set totals and the most changed assets, writes one heatmap PNG
+(golden | current | changed pixels) per changed asset and, with --report,
+the changed pixel count of every asset as JSON. Exits with 1 when any asset
+changed, disappeared or is new.
+
+Sets: wearables, collaterals, eye-shapes (default: all three), a directory
+of .aseprite files (e.g. --sets output/AavegotchiLibrary) or a .pxs pixel
+store (pixel_store.py).
+
+Usage: python3 scripts/check-golden.py [--sets a,b] [--update] [--jobs N]
+                                       [--golden DIR] [--heatmaps DIR] [--report PATH]
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO))
+
+from golden_images import (  # noqa: E402
+    BUILTIN_SETS, compare, heatmap_name, load_golden, render_set, save_golden, set_file_name, write_heatmap,
+)
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Compare rendered assets with a stored golden set."
+    )
+    parser.add_argument(
+        "--sets",
+        default=','.join(BUILTIN_SETS),
+        help=f"Comma-separated asset sets, .aseprite directories or .pxs pixel stores (default: {','.join(BUILTIN_SETS)}).",
+    )
+    parser.add_argument(
+        "--update",
+        action="store_true",
+        help="Store the current renders as the golden set instead of checking.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes for rendering (default: CPU count).",
+    )
+    parser.add_argument(
+        "--golden",
+        default=".build-cache/golden",
+        help="Golden set directory (default: .build-cache/golden).",
+    )
+    parser.add_argument(
+        "--heatmaps",
+        default=".build-cache/golden/heatmaps",
+        help="Heatmap PNG directory, cleared on every check (default: .build-cache/golden/heatmaps).",
+    )
+    parser.add_argument(
+        "--max-heatmaps",
+        type=int,
+        default=200,
+        help="Heatmaps to write per set, most changed first (default: 200).",
+    )
+    parser.add_argument(
+        "--report",
+        help="Write per-asset changed pixel counts as JSON to this path.",
+    )
+    parser.add_argument(
+        "--show",
+        type=int,
+        default=10,
+        help="Changed assets to list per set (default: 10).",
+    )
+    return parser
+
+
+def main() -> None:
+    args = build_arg_parser().parse_args()
+    os.chdir(REPO)
+    golden_dir = Path(args.golden)
+    heatmap_dir = Path(args.heatmaps)
+    sets = [name.strip() for name in args.sets.split(',') if name.strip()]
+
+    if not args.update and heatmap_dir.exists():
+        shutil.rmtree(heatmap_dir)
+
+    report = {}
+    failed = False
+    for name in sets:
+        start = time.perf_counter()
+        names, pixels = render_set(name, args.jobs)
+        render_time = time.perf_counter() - start
+        golden_path = golden_dir / set_file_name(name)
+
+        if args.update:
+            save_golden(golden_path, names, pixels)
+            print(f"{name}: stored {len(names)} asset(s) in {golden_path} ({render_time:.1f}s)")
+            continue
+        if not golden_path.exists():
+            print(f"{name}: no golden set at {golden_path} (run with --update first)")
+            failed = True
+            continue
+
+        start = time.perf_counter()
+        comparison, golden_pixels, current_pixels, common = compare(load_golden(golden_path), (names, pixels))
+        diff_time = time.perf_counter() - start
+        changed = sorted(comparison.changed.items(), key=lambda item: -item[1])
+        print(f"{name}: {len(comparison.diffs)} compared, {len(changed)} changed, "
+              f"{len(comparison.missing)} missing, {len(comparison.added)} new "
+              f"(render {render_time:.1f}s, compare {diff_time:.2f}s)")
+        for asset, count in changed[:args.show]:
+            print(f"  ✗ {asset}: {count} pixel(s)")
+        for asset in comparison.missing[:args.show]:
+            print(f"  - {asset}: missing")
+        for asset in comparison.added[:args.show]:
+            print(f"  + {asset}: new")
+
+        position = {asset: i for i, asset in enumerate(common)}
+        for asset, _ in changed[:args.max_heatmaps]:
+            i = position[asset]
+            write_heatmap(heatmap_dir / set_file_name(name)[:-len('.npz')] / heatmap_name(asset),
+                          golden_pixels[i], current_pixels[i])
+        if changed:
+            print(f"  Heatmaps: {heatmap_dir / set_file_name(name)[:-len('.npz')]}")
+
+        report[name] = {
+            'diffs': comparison.diffs,
+            'missing': comparison.missing,
+            'added': comparison.added,
+        }
+        failed = failed or not comparison.ok
+
+    if args.report and not args.update:
+        Path(args.report).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.report).write_text(json.dumps(report, indent=2) + '\n')
+        print(f"Report written to {args.report}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Compile the geometry cache (geometry_cache.py) from the whole library and
+measure what it saves.
+
+The workload is every rasterization a full library build does with the
+Python renderer: the view/pose documents the generator prepares for every
+item of wearables-1-420.json, every collateral body part (haunt JSONs +
+aavegotchi_db_main.json) and every eye shape source, including the
+collaterals' own eyeShapeSvgs. It is rendered once with an empty cache in
+recording mode, and the parsed command lists and filled spans are written
+to OUTPUT. Every later run of svg_renderer picks the file up (until
+svg_renderer.py or geometry_cache.py change).
+
+With --benchmark the same workload is then rendered --repeat times without
+the cache and with the compiled file freshly loaded, and the pixels of both
+are compared.
+
+Usage: python3 scripts/compile-geometry.py [--output PATH] [--benchmark] [--repeat N]
+"""
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+REPO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO))
+
+from collateral_palette import (  # noqa: E402
+    COLLATERAL_FILES, MAIN_DB, PLACEHOLDERS, apply_colors, check_placeholders, collateral_parts, load_collaterals,
+)
+from eye_shapes import EYE_SHAPES_ROOT, SIZE, load_sources, plan_matrix, prepare_svg  # noqa: E402
+from eye_shapes import PLACEHOLDERS as EYE_PLACEHOLDERS  # noqa: E402
+from geometry_cache import DEFAULT_PATH, GeometryCache  # noqa: E402
+from library_manifest import wearable_documents, wearable_sources  # noqa: E402
+from svg_renderer import RenderResult, parse_svg, render, render_svg, set_geometry_cache  # noqa: E402
+
+# (kind, render) with render() -> RenderResult
+Workload = List[Tuple[str, Callable[[], RenderResult]]]
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Compile parsed path commands and filled spans of the whole library."
+    )
+    parser.add_argument(
+        "--output",
+        help=f"Cache file to write (default: {DEFAULT_PATH.relative_to(REPO)}).",
+    )
+    parser.add_argument(
+        "--benchmark",
+        action="store_true",
+        help="Render the library without and with the compiled cache and compare.",
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Benchmark rounds per mode; the fastest counts (default: 3).",
+    )
+    return parser
+
+
+def library_workload() -> Workload:
+    """Every render of a full library build, with the SVG documents prepared up front"""
+    workload: Workload = []
+
+    sources = wearable_sources()
+    with tempfile.TemporaryDirectory(prefix='geometry-') as root:
+        for item_id in sources.wearables:
+            try:
+                documents = wearable_documents(item_id, Path(root), '')
+            except Exception as e:
+                print(f"  skipped item {item_id}: {e}")
+                continue
+            for _, _, text, _ in documents:
+                workload.append(('wearable', lambda text=text: render_svg(text)))
+
+    collaterals = load_collaterals([REPO / p for p in COLLATERAL_FILES])
+    for part in collateral_parts(REPO / MAIN_DB):
+        try:
+            check_placeholders(part.svg, PLACEHOLDERS)
+            variants = [PLACEHOLDERS]
+        except ValueError:
+            # Rendered per collateral (see library_manifest._run_collateral)
+            variants = [c.colors for c in collaterals]
+        for colors in variants:
+            svg = part.wrap(apply_colors(part.svg, colors))
+            workload.append(('collateral', lambda svg=svg: render(parse_svg(svg), SIZE, SIZE)))
+
+    for source in load_sources(REPO / EYE_SHAPES_ROOT, collaterals):
+        try:
+            check_placeholders(source.svg, EYE_PLACEHOLDERS)
+            cells = [(EYE_PLACEHOLDERS['eye'].lstrip('#'), EYE_PLACEHOLDERS['primary'].lstrip('#'))]
+        except ValueError:
+            # Rendered per cell (see eye_shapes.render_source)
+            names = [source.collateral] if source.collateral else [c.name for c in collaterals]
+            cells = [(cell.eye_hex, cell.primary_hex) for cell in
+                     plan_matrix([source], [c for c in collaterals if c.name in names], Path(''))]
+        for eye_hex, primary_hex in cells:
+            svg = prepare_svg(source.svg, eye_hex, primary_hex)
+            workload.append(('eye-shape', lambda svg=svg: render(parse_svg(svg), SIZE, SIZE)))
+    return workload
+
+
+def run(workload: Workload) -> Tuple[float, List[RenderResult]]:
+    start = time.perf_counter()
+    results = [render_one() for _, render_one in workload]
+    return time.perf_counter() - start, results
+
+
+def digest(results: List[RenderResult]) -> str:
+    sha = hashlib.sha256()
+    for result in results:
+        sha.update(repr((result.width, result.height, list(result.pixels.items()))).encode())
+    return sha.hexdigest()
+
+
+def main() -> None:
+    args = build_arg_parser().parse_args()
+    output = Path(args.output).resolve() if args.output else DEFAULT_PATH
+    os.chdir(REPO)
+
+    start = time.perf_counter()
+    workload = library_workload()
+    counts = {}
+    for kind, _ in workload:
+        counts[kind] = counts.get(kind, 0) + 1
+    print(f"Prepared {len(workload)} render(s) in {time.perf_counter() - start:.1f}s: "
+          + ", ".join(f"{n} {kind}" for kind, n in counts.items()))
+
+    cache = GeometryCache()
+    set_geometry_cache(cache)
+    elapsed, _ = run(workload)
+    size = cache.save(output)
+    stats = cache.stats()
+    print(f"Compiled {stats['memo_commands']} command list(s) and {stats['memo_spans']} span list(s) "
+          f"in {elapsed:.1f}s -> {output} ({size / (1 << 20):.1f} MiB)")
+
+    if not args.benchmark:
+        return
+    timings = {'without cache': [], 'with cache': []}
+    digests = {}
+    for _ in range(max(1, args.repeat)):
+        set_geometry_cache(None)
+        elapsed, results = run(workload)
+        timings['without cache'].append(elapsed)
+        digests['without cache'] = digest(results)
+
+        load_start = time.perf_counter()
+        set_geometry_cache(GeometryCache(output))
+        elapsed, results = run(workload)
+        timings['with cache'].append(time.perf_counter() - load_start)
+        digests['with cache'] = digest(results)
+    set_geometry_cache(None)
+
+    for mode, values in timings.items():
+        print(f"  {mode}: {min(values):.2f}s (best of {len(values)})")
+    print(f"  speedup: {min(timings['without cache']) / min(timings['with cache']):.2f}x")
+    if digests['without cache'] != digests['with cache']:
+        sys.exit("Error: renders with the cache differ from renders without it")
+    print("  pixels identical")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Python/native counterpart of batch-all-collaterals-converter-v2.lua: write
+the body, hand poses, mouths and shadows of every collateral as .aseprite
+files (output/<collateral>/<part>_<collateral>.aseprite) without Aseprite.
+
+Each part is rasterized once into a color-slot mask (collateral_palette.py)
+and recolored per collateral; --verify also renders every variant the old
+way (color substitution + full render) and checks the pixels are identical.
+Files are written through the content store OUTPUT/.store (asset_store.py),
+so identical parts of different collaterals take disk space once.
+--pixel-store also collects every part into a pixel store file
+(pixel_store.py), keyed (0, Front, <part>, <collateral>).
+
+Usage: python3 scripts/convert-collaterals.py [--output DIR] [--verify] [--no-dedup] [--pixel-store PATH]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO))
+
+from aseprite_file import encode_aseprite, write_aseprite  # noqa: E402
+from asset_store import AssetStore  # noqa: E402
+from collateral_palette import (  # noqa: E402
+    COLLATERAL_FILES, MAIN_DB, collateral_parts, load_collaterals, rasterize_part, render_part,
+)
+from pixel_store import PixelStoreBuilder, part_key  # noqa: E402
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Convert every collateral's body parts by palette swap."
+    )
+    parser.add_argument(
+        "--output",
+        default="output",
+        help="Output root; files go to OUTPUT/<collateral>/ (default: output).",
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Also render each variant directly and compare it with the palette swap.",
+    )
+    parser.add_argument(
+        "--no-dedup",
+        action="store_true",
+        help="Write plain files instead of through the OUTPUT/.store content store.",
+    )
+    parser.add_argument(
+        "--pixel-store",
+        metavar="PATH",
+        help="Also collect the parts into one pixel store file at PATH "
+             "(updated in place, see pixel_store.py).",
+    )
+    return parser
+
+
+def main() -> None:
+    args = build_arg_parser().parse_args()
+    collaterals = load_collaterals([REPO / p for p in COLLATERAL_FILES])
+    parts = collateral_parts(REPO / MAIN_DB)
+    print(f"Loaded {len(collaterals)} collaterals, {len(parts)} parts")
+
+    start = time.perf_counter()
+    masks = {}
+    for part in parts:
+        try:
+            masks[part.prefix] = rasterize_part(part.svg, part.wrap)
+        except ValueError as e:
+            print(f"  {part.prefix}: {e}, rendering it per collateral")
+    mask_time = time.perf_counter() - start
+
+    write = write_aseprite if args.no_dedup else AssetStore(Path(args.output) / '.store').writer(encode_aseprite)
+    pixels = None
+    if args.pixel_store:
+        pixels = PixelStoreBuilder(Path(args.pixel_store))
+        pixels.load_existing()
+    files = 0
+    mismatches = []
+    start = time.perf_counter()
+    for collateral in collaterals:
+        output_dir = Path(args.output) / collateral.name
+        output_dir.mkdir(parents=True, exist_ok=True)
+        for part in parts:
+            mask = masks.get(part.prefix)
+            if mask is not None:
+                if mask.pixel_count == 0:
+                    print(f"  ERROR: No pixels rendered: {part.prefix}_{collateral.name}")
+                    if pixels is not None:
+                        pixels.add_empty(part_key(collateral.name, part.prefix))
+                    continue
+                rgba = mask.recolor(collateral.colors)
+            else:
+                rgba = render_part(part.svg, collateral.colors, part.wrap)
+                if not any(rgba[3::4]):
+                    print(f"  ERROR: No pixels rendered: {part.prefix}_{collateral.name}")
+                    if pixels is not None:
+                        pixels.add_empty(part_key(collateral.name, part.prefix))
+                    continue
+            if args.verify and mask is not None and rgba != render_part(part.svg, collateral.colors, part.wrap):
+                mismatches.append(f"{part.prefix}_{collateral.name}")
+            write(output_dir / f"{part.prefix}_{collateral.name}.aseprite", rgba, 64, 64)
+            if pixels is not None:
+                pixels.add(part_key(collateral.name, part.prefix), rgba, 64, 64)
+            files += 1
+    if pixels is not None:
+        pixels.save()
+        print(f"Pixel store: {len(pixels)} sprite(s) in {args.pixel_store}")
+    convert_time = time.perf_counter() - start
+
+    print(f"Rasterized {len(masks)} part(s) in {mask_time:.2f}s; "
+          f"wrote {files} file(s) for {len(collaterals)} collateral(s) in {convert_time:.2f}s")
+    if args.verify:
+        if mismatches:
+            print(f"{len(mismatches)} variant(s) differ from a direct render:")
+            for name in mismatches:
+                print(f"  {name}")
+            sys.exit(1)
+        print("All palette-swapped variants match a direct render")
+
+
+if __name__ == "__main__":
+    main()
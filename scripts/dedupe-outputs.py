@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Move an existing output tree into the content store (asset_store.py): every
+generated file is hashed, one blob is kept per distinct content and each
+file becomes a hardlink to its blob. Replaces the cleanup-*-duplicates.js
+passes for trees written before the pipeline stored its outputs; runs after
+that only pick up new files.
+
+Usage: python3 scripts/dedupe-outputs.py [DIR] [--store DIR] [--dry-run] [--gc]
+"""
+import argparse
+import hashlib
+import sys
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO))
+
+from asset_store import AssetStore, iter_files  # noqa: E402
+
+SUFFIXES = ['.aseprite', '.png', '.svg', '.json']
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Hardlink identical generated files to one blob in the content store."
+    )
+    parser.add_argument(
+        "directory",
+        nargs="?",
+        default=str(REPO / 'output'),
+        help="Tree to deduplicate (default: output/).",
+    )
+    parser.add_argument(
+        "--store",
+        help="Content store (default: output/.store; must be on the same filesystem).",
+    )
+    parser.add_argument(
+        "--suffix",
+        action="append",
+        help=f"File suffix to include, repeatable (default: {' '.join(SUFFIXES)}).",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only report how many files and bytes are duplicates.",
+    )
+    parser.add_argument(
+        "--gc",
+        action="store_true",
+        help="Afterwards delete blobs no file links to any more.",
+    )
+    return parser
+
+
+def main() -> None:
+    args = build_arg_parser().parse_args()
+    store = AssetStore(Path(args.store) if args.store else REPO / 'output/.store')
+    files = duplicates = saved = 0
+    seen = set()
+    for path in iter_files(Path(args.directory), args.suffix or SUFFIXES):
+        files += 1
+        stat = path.stat()
+        if args.dry_run:
+            if (stat.st_dev, stat.st_ino) in seen:
+                continue
+            seen.add((stat.st_dev, stat.st_ino))
+            digest = hashlib.sha256(path.read_bytes()).hexdigest()
+            duplicate = digest in seen
+            seen.add(digest)
+        else:
+            _, stored = store.put_file(path)
+            # A file that was already a link frees nothing
+            duplicate = stored and stat.st_nlink == 1
+        if duplicate:
+            duplicates += 1
+            saved += stat.st_size
+
+    verb = "would free" if args.dry_run else "freed"
+    print(f"{files} file(s), {duplicates} duplicate(s); {verb} {saved / 1024:.1f} KiB")
+    if args.gc and not args.dry_run:
+        print(f"Removed {store.gc()} unreferenced blob(s)")
+
+
+if __name__ == "__main__":
+    main()
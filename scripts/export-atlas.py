@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Pack generated sprites into memory-mappable texture atlases (sprite_atlas.py).
+
+By default every wearable the generator has written to output/ goes into one
+atlas named "wearables"; --items and --slot narrow that down. --collateral
+packs one collateral of output/AavegotchiLibrary and --source any directory
+of .aseprite files.
+
+    python3 scripts/export-atlas.py                       # output/atlas/wearables-*.atlas
+    python3 scripts/export-atlas.py --slot Head --png     # output/atlas/head-*.atlas (+ PNG previews)
+    python3 scripts/export-atlas.py --collateral amDAI    # output/atlas/amdai-*.atlas
+
+Usage: python3 scripts/export-atlas.py [--items SPEC] [--slot NAME] [--collateral NAME]
+                                       [--source DIR] [--name NAME] [--dest DIR]
+                                       [--page-size N] [--padding N] [--png] [--jobs N]
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO))
+
+from item_preparation import parse_item_spec  # noqa: E402
+from sprite_atlas import directory_sources, pack, wearable_sources, write_atlas  # noqa: E402
+from wearables_data import open_wearables  # noqa: E402
+
+WEARABLES_JSON = Path('wearables-1-420.json')
+COLLATERAL_ROOT = Path('output/AavegotchiLibrary/Aseprites')
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Pack generated .aseprite sprites into texture atlases."
+    )
+    selection = parser.add_mutually_exclusive_group()
+    selection.add_argument(
+        "--collateral",
+        help="Pack one collateral of output/AavegotchiLibrary/Aseprites instead of wearables.",
+    )
+    selection.add_argument(
+        "--source",
+        help="Pack every .aseprite under this directory instead of wearables.",
+    )
+    parser.add_argument(
+        "--items",
+        default="all",
+        help="Wearables to pack: 'all', ids, ranges or a comma separated list (default: all).",
+    )
+    parser.add_argument(
+        "--slot",
+        help="Only pack wearables of this slot, e.g. Body, Head, Eyes, Face, 'Left Hand', Pet.",
+    )
+    parser.add_argument(
+        "--output-root",
+        default="output",
+        help="Directory the generator wrote the wearables to (default: output).",
+    )
+    parser.add_argument(
+        "--name",
+        help="Atlas name (default: wearables, the slot or the collateral name).",
+    )
+    parser.add_argument(
+        "--dest",
+        default="output/atlas",
+        help="Directory for the atlas pages and index (default: output/atlas).",
+    )
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=1024,
+        help="Maximum page width and height in pixels (default: 1024).",
+    )
+    parser.add_argument(
+        "--padding",
+        type=int,
+        default=1,
+        help="Transparent pixels between sprites (default: 1).",
+    )
+    parser.add_argument(
+        "--png",
+        action="store_true",
+        help="Also write a PNG preview of every page.",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes for decoding (default: CPU count).",
+    )
+    return parser
+
+
+def main() -> None:
+    args = build_arg_parser().parse_args()
+    os.chdir(REPO)
+
+    if args.collateral:
+        matches = [d for d in COLLATERAL_ROOT.iterdir() if d.is_dir() and d.name.lower() == args.collateral.lower()] \
+            if COLLATERAL_ROOT.is_dir() else []
+        if not matches:
+            sys.exit(f"Error: no collateral '{args.collateral}' in {COLLATERAL_ROOT}")
+        sources = directory_sources(matches[0])
+        name = args.name or matches[0].name.lower()
+    elif args.source:
+        if not Path(args.source).is_dir():
+            sys.exit(f"Error: {args.source} is not a directory")
+        sources = directory_sources(Path(args.source))
+        name = args.name or Path(args.source).name.lower()
+    else:
+        wearables = open_wearables(WEARABLES_JSON)
+        try:
+            item_ids = parse_item_spec(args.items, list(wearables))
+        except ValueError as e:
+            sys.exit(f"Error: {e}")
+        records = {item_id: wearables[item_id] for item_id in item_ids}
+        if args.slot:
+            records = {i: r for i, r in records.items() if (r.get('slotName') or '').lower() == args.slot.lower()}
+        sources = wearable_sources(Path(args.output_root), records)
+        name = args.name or (args.slot.lower().replace(' ', '-') if args.slot else 'wearables')
+
+    if not sources:
+        sys.exit("Error: no .aseprite files to pack (run the generator first)")
+
+    start = time.perf_counter()
+    atlas = pack(sources, name, args.page_size, args.padding, args.jobs)
+    index_path = write_atlas(Path(args.dest), atlas, png=args.png)
+    elapsed = time.perf_counter() - start
+
+    print(f"Packed {len(atlas.frames)} sprite(s) ({atlas.shared} shared) into {len(atlas.pages)} page(s) "
+          f"in {elapsed:.1f}s")
+    for i, page in enumerate(atlas.pages):
+        print(f"  page {i}: {page.width}x{page.height}, {len(page.frames)} frame(s)")
+    print(f"Index: {index_path}")
+
+
+if __name__ == "__main__":
+    main()
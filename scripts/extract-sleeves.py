@@ -1,33 +1,66 @@
 #!/usr/bin/env python3
+"""
+Extract the individual sleeve SVGs (left/right x up/down) of wearable items.
+
+    python3 scripts/extract-sleeves.py --json wearables-1-420.json --item 8 --output sleeves/
+    python3 scripts/extract-sleeves.py --json wearables-1-420.json --items 1-50 --output sleeves/
+    python3 scripts/extract-sleeves.py --json wearables-1-420.json --all --jobs 8 --output sleeves/
+
+--items and --all take every body item of the selection, split it over
+--jobs worker processes and finish with a report of the items that lack
+sleeve poses. Records are read through the wearables index
+(wearables_data.py) and fragments are cut out with svg_fragments.scan_groups,
+which keeps nested <g> groups whole.
+"""
 import argparse
-import json
 import os
-import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict
+from typing import Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from item_preparation import parse_item_spec  # noqa: E402
+from svg_fragments import scan_groups  # noqa: E402
+from wearables_data import open_wearables  # noqa: E402
 
 
 def build_arg_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(
-        description="Extract individual sleeve SVGs for a wearable item."
+        description="Extract individual sleeve SVGs for one or more wearable items."
     )
     parser.add_argument(
         "--json",
         required=True,
         help="Path to the wearables JSON file (e.g. wearables-1-20.json).",
     )
-    parser.add_argument(
+    selection = parser.add_mutually_exclusive_group(required=True)
+    selection.add_argument(
         "--item",
-        required=True,
         type=int,
         help="Wearable item id to extract sleeves for.",
     )
+    selection.add_argument(
+        "--items",
+        help="Item ids and ranges (e.g. 1-20,25); body items among them are extracted.",
+    )
+    selection.add_argument(
+        "--all",
+        action="store_true",
+        help="Extract the sleeves of every body item.",
+    )
     parser.add_argument(
         "--output",
         required=True,
         help="Directory to write the extracted SVG files.",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes for --items/--all (default: CPU count).",
+    )
     return parser
 
 
@@ -41,12 +74,11 @@ SLEEVE_CLASSES = {
 
 def load_wearable(json_path: Path, item_id: int) -> dict:
     try:
-        data = json.loads(json_path.read_text())
+        wearables = open_wearables(json_path)
+        wearable = wearables.get(item_id)
     except Exception as exc:
         sys.exit(f"Failed to read {json_path}: {exc}")
 
-    wearables = data.get("wearables") or {}
-    wearable = wearables.get(str(item_id))
     if wearable is None:
         sys.exit(f"Item id {item_id} not found in {json_path}")
     return wearable
@@ -57,15 +89,17 @@ def extract_g_fragments(svg_text: str) -> Dict[str, str]:
     Collect all <g ...>...</g> fragments keyed by their class attribute.
     """
     fragments: dict[str, str] = {}
-    for match in re.finditer(r'(<g[^>]*class="([^"]+)"[^>]*>.*?</g>)', svg_text, re.DOTALL):
-        fragment_html, class_attr = match.groups()
-        fragments[class_attr] = fragment_html
+    for class_attr, fragment_html in scan_groups(svg_text):
+        if class_attr:
+            fragments.setdefault(class_attr, fragment_html)
     return fragments
 
 
 def gather_sleeve_fragments(wearable: dict) -> Dict[str, str]:
     fragments: Dict[str, str] = {}
-    for sleeve_svg in wearable.get("sleeves", []):
+    for sleeve_svg in wearable.get("sleeves") or []:
+        if not isinstance(sleeve_svg, str):
+            continue
         for class_name, fragment in extract_g_fragments(sleeve_svg).items():
             fragments.setdefault(class_name, fragment)
     return fragments
@@ -79,12 +113,75 @@ def wrap_svg(fragment: str) -> str:
     )
 
 
+def write_sleeves(item_id, fragments_by_class: Dict[str, str], output_dir: Path) -> Tuple[List[Path], List[str]]:
+    """Write the sleeve SVGs found for an item; returns the files and the missing pose slugs"""
+    written, missing = [], []
+    for slug, class_name in SLEEVE_CLASSES.items():
+        fragment = fragments_by_class.get(class_name)
+        if not fragment:
+            missing.append(slug)
+            continue
+        dest_path = output_dir / f"{item_id}_front_sleeve_{slug}.svg"
+        dest_path.write_text(wrap_svg(fragment))
+        written.append(dest_path)
+    return written, missing
+
+
+def extract_items(task: Tuple[str, List[str], str]) -> List[Tuple[str, int, List[str]]]:
+    """Worker: (item id, files written, missing poses) for a chunk of items"""
+    json_path, item_ids, output_dir = task
+    wearables = open_wearables(Path(json_path))
+    results = []
+    for item_id in item_ids:
+        written, missing = write_sleeves(item_id, gather_sleeve_fragments(wearables[item_id]), Path(output_dir))
+        results.append((item_id, len(written), missing))
+    return results
+
+
+def extract_library(json_path: Path, item_ids: List[str], output_dir: Path, jobs: int) -> int:
+    chunk_size = max(1, -(-len(item_ids) // (max(1, jobs) * 4)))
+    tasks = [(str(json_path), item_ids[i:i + chunk_size], str(output_dir))
+             for i in range(0, len(item_ids), chunk_size)]
+    if jobs <= 1:
+        chunks = [extract_items(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            chunks = list(executor.map(extract_items, tasks))
+    results = [result for chunk in chunks for result in chunk]
+
+    written = sum(count for _, count, _ in results)
+    incomplete = [(item_id, missing) for item_id, _, missing in results if missing]
+    print(f"Wrote {written} sleeve SVG(s) for {len(results)} body item(s) to {output_dir}")
+    if incomplete:
+        print(f"{len(incomplete)} item(s) lack sleeve poses:")
+        for item_id, missing in incomplete:
+            label = "no sleeves" if len(missing) == len(SLEEVE_CLASSES) else ", ".join(missing)
+            print(f"  {item_id:>4}: {label}")
+    return written
+
+
 def main() -> None:
     parser = build_arg_parser()
     args = parser.parse_args()
 
     json_path = Path(args.json).expanduser()
     output_dir = Path(args.output).expanduser()
+
+    if args.item is None:
+        try:
+            wearables = open_wearables(json_path)
+            selected = list(wearables) if args.all else [i for i in parse_item_spec(args.items, wearables) if i in wearables]
+        except ValueError as exc:
+            sys.exit(f"Error: {exc}")
+        except Exception as exc:
+            sys.exit(f"Failed to read {json_path}: {exc}")
+        item_ids = sorted((i for i in selected if wearables.entry(i).is_body), key=int)
+        if not item_ids:
+            sys.exit("No body items selected")
+        output_dir.mkdir(parents=True, exist_ok=True)
+        extract_library(json_path, item_ids, output_dir, args.jobs)
+        return
+
     wearable = load_wearable(json_path, args.item)
     fragments_by_class = gather_sleeve_fragments(wearable)
 
@@ -93,16 +190,12 @@ def main() -> None:
 
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    for slug, class_name in SLEEVE_CLASSES.items():
-        fragment = fragments_by_class.get(class_name)
-        if not fragment:
-            print(f"Skipping {slug}: class '{class_name}' not present", file=sys.stderr)
-            continue
-        dest_path = output_dir / f"{args.item}_front_sleeve_{slug}.svg"
-        dest_path.write_text(wrap_svg(fragment))
+    written, missing = write_sleeves(args.item, fragments_by_class, output_dir)
+    for slug in missing:
+        print(f"Skipping {slug}: class '{SLEEVE_CLASSES[slug]}' not present", file=sys.stderr)
+    for dest_path in written:
         print(f"Wrote {dest_path}")
 
 
 if __name__ == "__main__":
     main()
-
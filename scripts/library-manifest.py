@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Plan, shard and merge a full library regeneration (library_manifest.py).
+
+    # once, on any node: expand the workload into a manifest on the shared filesystem
+    python3 scripts/library-manifest.py plan --manifest /shared/library.jsonl
+
+    # on each of N nodes (same checkout), with i = 1..N
+    python3 scripts/library-manifest.py run --manifest /shared/library.jsonl --work /shared/shards --shard i/N
+
+    # once all shards finished: validate and collect into output/Library
+    python3 scripts/library-manifest.py merge --manifest /shared/library.jsonl --work /shared/shards
+
+Every job is rendered with the Aseprite-free backends (the generator's native
+converter, scripts/convert-collaterals.py, eye-shapes-matrix.py --backend
+native), so nodes need Python only. A shard that is interrupted resumes when
+run again; merge refuses to collect anything while jobs are missing.
+
+Usage: python3 scripts/library-manifest.py plan [--manifest PATH] [--kinds LIST] [--items SPEC]
+                                                [--collaterals LIST] [--no-collateral-eyes]
+       python3 scripts/library-manifest.py run --shard i/N [--manifest PATH] [--work DIR] [--jobs N] [--force]
+       python3 scripts/library-manifest.py merge [--manifest PATH] [--work DIR] [--dest DIR] [--check] [--no-dedup]
+"""
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO))
+
+from item_preparation import parse_item_spec  # noqa: E402
+from library_manifest import (  # noqa: E402
+    KINDS, SHARD_FILE, assign_shards, check_shards, group_units, merge, parse_shard, plan, read_manifest,
+    run_shard, wearable_sources, write_manifest,
+)
+
+DEFAULT_MANIFEST = '.build-cache/library-manifest.jsonl'
+DEFAULT_WORK = '.build-cache/shards'
+DEFAULT_DEST = 'output/Library'
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Split a full library regeneration across build machines."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    plan_parser = commands.add_parser("plan", help="Write the job manifest.")
+    plan_parser.add_argument(
+        "--kinds",
+        default=",".join(KINDS),
+        help=f"Comma-separated job kinds (default: {','.join(KINDS)}).",
+    )
+    plan_parser.add_argument(
+        "--items",
+        default="all",
+        help="Wearables to plan: 'all', ids, ranges or a comma separated list (default: all).",
+    )
+    plan_parser.add_argument(
+        "--collaterals",
+        help="Comma-separated collateral names (default: all in the haunt JSONs).",
+    )
+    plan_parser.add_argument(
+        "--no-collateral-eyes",
+        action="store_true",
+        help="Skip the collaterals' own eye shapes (eyeShapeSvgs).",
+    )
+
+    run_parser = commands.add_parser("run", help="Render one shard of the manifest.")
+    run_parser.add_argument(
+        "--shard",
+        required=True,
+        help="Shard to run as i/N, 1 <= i <= N (e.g. 2/4).",
+    )
+    run_parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes on this node (default: CPU count).",
+    )
+    run_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Render every job of the shard, ignoring its ledger.",
+    )
+
+    merge_parser = commands.add_parser("merge", help="Validate the shards and collect their outputs.")
+    merge_parser.add_argument(
+        "--dest",
+        help=f"Library root to collect into (default: {DEFAULT_DEST}).",
+    )
+    merge_parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Only report whether the shards are complete.",
+    )
+    merge_parser.add_argument(
+        "--no-dedup",
+        action="store_true",
+        help="Write plain files instead of through the DEST/.store content store.",
+    )
+
+    for sub in (plan_parser, run_parser, merge_parser):
+        sub.add_argument(
+            "--manifest",
+            help=f"Job manifest (default: {DEFAULT_MANIFEST}).",
+        )
+    for sub in (run_parser, merge_parser):
+        sub.add_argument(
+            "--work",
+            help=f"Shared directory for shard outputs, ledgers and logs (default: {DEFAULT_WORK}).",
+        )
+    return parser
+
+
+def command_plan(args, parser) -> None:
+    kinds = [kind.strip() for kind in args.kinds.split(',') if kind.strip()]
+    unknown = [kind for kind in kinds if kind not in KINDS]
+    if unknown:
+        parser.error(f"unknown kind(s): {', '.join(unknown)}")
+    names = [n.strip() for n in args.collaterals.split(',') if n.strip()] if args.collaterals else None
+
+    start = time.perf_counter()
+    item_ids = []
+    if 'wearable' in kinds:
+        try:
+            item_ids = parse_item_spec(args.items, list(wearable_sources().wearables))
+        except ValueError as e:
+            sys.exit(f"Error: {e}")
+    try:
+        jobs, failed = plan(kinds, item_ids, names, not args.no_collateral_eyes)
+    except ValueError as e:
+        sys.exit(f"Error: {e}")
+    write_manifest(Path(args.manifest), jobs)
+
+    counts = Counter(job.kind for job in jobs)
+    units = Counter(job.kind for job in (unit_jobs[0] for unit_jobs in group_units(jobs).values()))
+    print(f"Planned {len(jobs)} job(s) in {time.perf_counter() - start:.1f}s -> {args.manifest}")
+    for kind in kinds:
+        print(f"  {kind}: {counts[kind]} output(s) in {units[kind]} unit(s)")
+    for message in failed:
+        print(f"  skipped item {message}")
+
+
+def command_run(args, parser) -> None:
+    try:
+        index, count = parse_shard(args.shard)
+    except ValueError as e:
+        parser.error(str(e))
+    start = time.perf_counter()
+    try:
+        counts = run_shard(Path(args.manifest), index, count, Path(args.work), args.jobs, args.force)
+    except (OSError, ValueError) as e:
+        sys.exit(f"Error: {e}")
+    print(f"Shard {index}/{count} done in {time.perf_counter() - start:.1f}s: {counts['ok']} written, "
+          f"{counts['empty']} empty, {counts['error']} failed (see the shard log)")
+    if counts['error']:
+        sys.exit(1)
+
+
+def command_merge(args, parser) -> None:
+    try:
+        header, jobs = read_manifest(Path(args.manifest))
+    except (OSError, ValueError) as e:
+        sys.exit(f"Error: {e}")
+    check = check_shards(jobs, Path(args.work))
+    print(f"{len(jobs) - len(check.missing)} of {len(jobs)} job(s) done in {len(check.ledgers)} shard ledger(s)")
+    if check.missing:
+        # Which shard still owes them, when all ledgers come from one split
+        counts = {int(SHARD_FILE.match(p.name).group(2)) for p in check.ledgers}
+        if len(counts) == 1:
+            count = counts.pop()
+            assignment = assign_shards(jobs, count)
+            owing = Counter(assignment[job.unit] for job in check.missing)
+            for index, n in sorted(owing.items()):
+                print(f"  shard {index}/{count}: {n} job(s) missing")
+        for job in check.missing[:10]:
+            print(f"  missing {job.kind} {job.output}")
+        if len(check.missing) > 10:
+            print(f"  ... and {len(check.missing) - 10} more")
+        sys.exit(1)
+    if args.check:
+        return
+    start = time.perf_counter()
+    copied = merge(header, jobs, check, Path(args.dest), dedup=not args.no_dedup)
+    print(f"Collected {copied} file(s) into {args.dest} in {time.perf_counter() - start:.1f}s "
+          f"({len(jobs) - copied} empty job(s) have no file)")
+
+
+def main() -> None:
+    parser = build_arg_parser()
+    args = parser.parse_args()
+    # Paths given on the command line are relative to the caller, the defaults to the repo
+    for name, default in (('manifest', DEFAULT_MANIFEST), ('work', DEFAULT_WORK), ('dest', DEFAULT_DEST)):
+        if hasattr(args, name):
+            value = getattr(args, name)
+            setattr(args, name, Path(value).resolve() if value else REPO / default)
+    os.chdir(REPO)
+    {'plan': command_plan, 'run': command_run, 'merge': command_merge}[args.command](args, parser)
+
+
+if __name__ == "__main__":
+    main()
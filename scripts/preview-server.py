@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Serve rendered wearable views as PNG over local HTTP (preview_service.py).
+
+The wearables JSON and DB stay open for the life of the server. Views are
+prepared with the generator's own item loading and group extraction (in
+memory, nothing under tmp/ or output/) and rendered with the Python renderer
+when first requested; later requests come from the LRU cache.
+
+    python3 scripts/preview-server.py --port 8765
+    curl -o 8.png 'http://127.0.0.1:8765/render/8/front.png?collateral=amDAI'
+    curl 'http://127.0.0.1:8765/stats'
+
+Usage: python3 scripts/preview-server.py [--host HOST] [--port N] [--cache-mb N] [--verbose]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO))
+
+from collateral_palette import COLLATERAL_FILES, load_collaterals  # noqa: E402
+from item_preparation import (  # noqa: E402
+    DB_JSON_PATHS, JSON_PATHS, PreparedSVGs, body_flags_from, find_first_existing, is_body_item_for,
+    load_db_wearables, load_wearables, prepare_item,
+)
+from preview_service import PreviewRenderer, PreviewServer  # noqa: E402
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Serve wearable views rendered on demand as PNG."
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Address to listen on (default: 127.0.0.1).",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=8765,
+        help="Port to listen on (default: 8765).",
+    )
+    parser.add_argument(
+        "--cache-mb",
+        type=float,
+        default=64,
+        help="Size bound of the rendered PNG cache in MiB (default: 64).",
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Log every request.",
+    )
+    return parser
+
+
+def make_renderer(cache_bytes: int, root: Path) -> PreviewRenderer:
+    json_path = find_first_existing(JSON_PATHS)
+    if not json_path:
+        sys.exit(f"Error: no wearables JSON found (searched {', '.join(JSON_PATHS)})")
+    wearables = load_wearables(json_path)
+    db_json_path = find_first_existing(DB_JSON_PATHS)
+    db_records = load_db_wearables(db_json_path) if db_json_path else None
+    body_flags = body_flags_from(db_records)
+
+    def prepare(item_id):
+        is_body_item = is_body_item_for(item_id, body_flags, db_json_path is not None)
+        # Documents stay in memory (one sink per request thread); the output
+        # directories prepare_item creates go under root
+        with contextlib.redirect_stdout(io.StringIO()):
+            return prepare_item(item_id, wearables[item_id], is_body_item, PreparedSVGs(in_memory=True), root)
+
+    print(f"Loaded {len(wearables)} wearable(s) from {json_path}")
+    return PreviewRenderer(wearables, db_records, prepare, load_collaterals(COLLATERAL_FILES), cache_bytes)
+
+
+def main() -> None:
+    args = build_arg_parser().parse_args()
+    os.chdir(REPO)
+
+    with tempfile.TemporaryDirectory(prefix='preview-') as root:
+        renderer = make_renderer(int(args.cache_mb * (1 << 20)), Path(root))
+        server = PreviewServer((args.host, args.port), renderer, args.verbose)
+        print(f"Serving previews on http://{args.host}:{server.server_port}/render/<item>/<view>.png "
+              "(Ctrl-C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\nStopped")
+        finally:
+            server.server_close()
+
+
+if __name__ == "__main__":
+    main()
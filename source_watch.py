@@ -0,0 +1,120 @@
+"""
+Change detection for the generator's --watch mode.
+
+SourceWatcher polls the modification time and size of a set of files and
+directories (no file system notification dependency) and reports which
+paths changed once they have stopped changing, so an editor's save is seen
+as one change.
+
+RecordSnapshot keeps the raw bytes of a wearables JSON file together with
+the byte range of every record (wearables_data.scan_records). Comparing two
+snapshots finds the records whose bytes changed; changed_views() narrows a
+changed record down to the views whose inputs differ:
+
+    old = RecordSnapshot(Path('wearables-1-420.json'))
+    ...                                   # the file is edited
+    new = RecordSnapshot(Path('wearables-1-420.json'))
+    for item_id in old.changed(new):
+        changed_views(old.record(item_id), new.record(item_id))   # e.g. {'Left'}
+"""
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from wearables_data import scan_records
+
+VIEWS = ['Front', 'Left', 'Right', 'Back']
+
+# (mtime_ns, size) per watched file, or per entry of a watched directory
+Snapshot = Dict[Path, Tuple[int, int]]
+
+
+def snapshot(paths: Iterable[Path]) -> Snapshot:
+    state = {}
+    for path in paths:
+        try:
+            if path.is_dir():
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        if entry.is_file():
+                            stat = entry.stat()
+                            state[Path(entry.path)] = (stat.st_mtime_ns, stat.st_size)
+            else:
+                stat = path.stat()
+                state[path] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            continue
+    return state
+
+
+class SourceWatcher:
+    """Polls files and directories for changes every `interval` seconds"""
+
+    def __init__(self, paths: Iterable[Path], interval: float = 0.5):
+        self.paths = [Path(p) for p in paths]
+        self.interval = interval
+        self.state = snapshot(self.paths)
+
+    def wait(self) -> Set[Path]:
+        """Block until something changed and has been stable for one interval; returns the changed paths"""
+        while True:
+            time.sleep(self.interval)
+            current = snapshot(self.paths)
+            if current == self.state:
+                continue
+            while True:
+                time.sleep(self.interval)
+                settled = snapshot(self.paths)
+                if settled == current:
+                    break
+                current = settled
+            changed = {p for p in set(self.state) | set(current) if self.state.get(p) != current.get(p)}
+            self.state = current
+            return changed
+
+
+class RecordSnapshot:
+    """Raw bytes and record ranges of one wearables JSON file"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.data = self.path.read_bytes()
+        # Raises ValueError on a file that is not (yet) valid JSON
+        self.entries = scan_records(self.data)
+
+    def raw(self, item_id: str) -> Optional[bytes]:
+        entry = self.entries.get(item_id)
+        if entry is None:
+            return None
+        return self.data[entry.offset:entry.offset + entry.length]
+
+    def record(self, item_id: str) -> Optional[dict]:
+        raw = self.raw(item_id)
+        return json.loads(raw) if raw is not None else None
+
+    def changed(self, newer: 'RecordSnapshot') -> List[str]:
+        """Ids whose record was added, removed or changed in newer"""
+        ids = set(self.entries) | set(newer.entries)
+        return sorted((i for i in ids if self.raw(i) != newer.raw(i)), key=lambda i: int(i) if i.isdigit() else 0)
+
+
+def changed_views(old: Optional[dict], new: Optional[dict]) -> Set[str]:
+    """
+    Views of a wearable whose inputs differ between two versions of its
+    record: a changed side affects that view, changed sleeves the front view
+    (the side and back sleeves come from examples/svgItems), anything else
+    (name, slots, dimensions, ...) every view.
+    """
+    if old is None or new is None:
+        return set(VIEWS)
+    rest = set(old) | set(new)
+    rest -= {'sides', 'sleeves'}
+    if any(old.get(key) != new.get(key) for key in rest):
+        return set(VIEWS)
+    old_sides, new_sides = old.get('sides') or {}, new.get('sides') or {}
+    views = {view for view in VIEWS if old_sides.get(view) != new_sides.get(view)}
+    if old.get('sleeves') != new.get('sleeves'):
+        views.add('Front')
+    return views
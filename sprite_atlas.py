@@ -0,0 +1,334 @@
+"""
+Packed sprite atlases for the generated library.
+
+The generator writes one small .aseprite per view and sleeve pose. pack()
+decodes a set of them, trims each sprite to its opaque bounding box, stores
+identical trimmed sprites once and shelf-packs the rest into pages of at most
+page_size x page_size pixels. Every page is written as one uncompressed,
+memory-mappable .atlas file (little endian):
+
+    header   64 bytes: b'GATL', version u16, reserved u16, width u32,
+             height u32, frame count u32, pixels/frames/names offsets u32,
+             names size u32, zero padding
+    pixels   width * height * 4 RGBA bytes, row major, at offset 64
+    frames   16 bytes per frame: x, y, w, h (rect in the page),
+             offset x, offset y (trim offset in the source sprite),
+             source w, source h (all u16)
+    names    u16 length + UTF-8 name per frame, in frame order
+
+plus one <name>.json index over all pages:
+
+    {"version": 1, "pages": [{"file": "wearables-0.atlas", "width": ..., ...}],
+     "frames": {"8_MarineJacket/Front/8_MarineJacket_Front":
+                {"page": 0, "x": ..., "y": ..., "w": ..., "h": ...,
+                 "offsetX": ..., "offsetY": ..., "sourceW": 64, "sourceH": 64,
+                 "itemId": 8, "dimensions": {...}}, ...}}
+
+Frame names are the source paths relative to the source root, without the
+suffix. Fully transparent sprites get an empty (0 x 0) rect on page 0.
+
+    atlas = pack(wearable_sources(Path('output'), wearables), 'wearables')
+    write_atlas(Path('output/atlas'), atlas)
+    page = read_atlas(Path('output/atlas/wearables-0.atlas'))
+    page.frame('8_MarineJacket/Front/8_MarineJacket_Front')   # RGBA bytes
+"""
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from aseprite_file import read_aseprite
+from svg_renderer import write_png
+
+MAGIC = b'GATL'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIIIIIII')
+HEADER_SIZE = 64
+FRAME = struct.Struct('<8H')
+INDEX_VERSION = 1
+
+ITEM_DIR = re.compile(r'^(\d+)_')
+
+Rect = Tuple[int, int, int, int]
+
+
+@dataclass
+class Source:
+    name: str
+    path: Path
+    item_id: Optional[int] = None
+    dimensions: Optional[dict] = None
+
+
+@dataclass
+class Frame:
+    name: str
+    page: int
+    x: int
+    y: int
+    w: int
+    h: int
+    offset_x: int
+    offset_y: int
+    source_w: int
+    source_h: int
+    item_id: Optional[int] = None
+    dimensions: Optional[dict] = None
+
+    def to_json(self) -> dict:
+        entry = {
+            'page': self.page, 'x': self.x, 'y': self.y, 'w': self.w, 'h': self.h,
+            'offsetX': self.offset_x, 'offsetY': self.offset_y,
+            'sourceW': self.source_w, 'sourceH': self.source_h,
+        }
+        if self.item_id is not None:
+            entry['itemId'] = self.item_id
+        if self.dimensions is not None:
+            entry['dimensions'] = self.dimensions
+        return entry
+
+
+@dataclass
+class Page:
+    width: int
+    height: int
+    pixels: bytearray
+    frames: List[Frame] = field(default_factory=list)
+
+
+@dataclass
+class Atlas:
+    name: str
+    pages: List[Page]
+    frames: List[Frame]
+    # Sprites stored once for several frames (identical trimmed pixels)
+    shared: int = 0
+
+
+# ============================================================================
+# SOURCES
+# ============================================================================
+
+def wearable_sources(output_root: Path, wearables: Mapping[str, dict],
+                     item_ids: Optional[Iterable[str]] = None) -> List[Source]:
+    """Generator outputs (output/{id}_{name}/...) of the given (default: all) items"""
+    wanted = None if item_ids is None else {str(i) for i in item_ids}
+    sources = []
+    for item_dir in sorted(output_root.iterdir()) if output_root.is_dir() else []:
+        match = ITEM_DIR.match(item_dir.name)
+        if not item_dir.is_dir() or not match:
+            continue
+        item_id = match.group(1)
+        if item_id not in wearables or (wanted is not None and item_id not in wanted):
+            continue
+        dimensions = wearables[item_id].get('dimensions')
+        for path in sorted(item_dir.rglob('*.aseprite')):
+            name = path.relative_to(output_root).with_suffix('').as_posix()
+            sources.append(Source(name, path, int(item_id), dimensions))
+    return sources
+
+
+def directory_sources(root: Path) -> List[Source]:
+    """Every .aseprite under root (e.g. one collateral of output/AavegotchiLibrary)"""
+    return [
+        Source(path.relative_to(root).with_suffix('').as_posix(), path)
+        for path in sorted(root.rglob('*.aseprite'))
+        if '.store' not in path.relative_to(root).parts
+    ]
+
+
+# ============================================================================
+# TRIM AND PACK
+# ============================================================================
+
+def trim_rect(rgba: bytes, width: int, height: int) -> Rect:
+    """(x, y, w, h) of the opaque pixels, (0, 0, 0, 0) if there are none"""
+    alpha = rgba[3::4]
+    left, right, top, bottom = width, -1, None, -1
+    for y in range(height):
+        row = alpha[y * width:(y + 1) * width]
+        stripped = row.lstrip(b'\0')
+        if not stripped:
+            continue
+        if top is None:
+            top = y
+        bottom = y
+        left = min(left, width - len(stripped))
+        right = max(right, len(row.rstrip(b'\0')) - 1)
+    if top is None:
+        return 0, 0, 0, 0
+    return left, top, right - left + 1, bottom - top + 1
+
+
+def crop(rgba: bytes, width: int, rect: Rect) -> bytes:
+    x, y, w, h = rect
+    stride = width * 4
+    return b''.join(rgba[(y + row) * stride + x * 4:(y + row) * stride + (x + w) * 4] for row in range(h))
+
+
+def _load(sources: List[Tuple[str, str]]) -> List[Tuple[str, int, int, Rect, bytes]]:
+    """Decode and trim one chunk of sprites (runs in a worker process)"""
+    sprites = []
+    for name, path in sources:
+        sprite = read_aseprite(path)
+        rgba = sprite.frames[0] if sprite.frames else b''
+        rect = trim_rect(rgba, sprite.width, sprite.height) if rgba else (0, 0, 0, 0)
+        sprites.append((name, sprite.width, sprite.height, rect, crop(rgba, sprite.width, rect)))
+    return sprites
+
+
+def load_sprites(sources: List[Source], jobs: int = 1) -> List[Tuple[str, int, int, Rect, bytes]]:
+    """(name, source w, source h, trim rect, trimmed RGBA) per source, in order"""
+    items = [(s.name, str(s.path)) for s in sources]
+    if jobs <= 1 or len(items) < 64:
+        return _load(items)
+    size = -(-len(items) // (jobs * 4))
+    chunks = [items[i:i + size] for i in range(0, len(items), size)]
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        return [sprite for chunk in executor.map(_load, chunks) for sprite in chunk]
+
+
+def shelf_pack(sizes: List[Tuple[int, int]], page_size: int, padding: int) -> Tuple[List[Tuple[int, int, int]], List[Tuple[int, int]]]:
+    """
+    Place (w, h) rects on shelves, tallest first, opening a new page when one
+    is full. Returns (page, x, y) per rect and the used (width, height) per page.
+    """
+    order = sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0]))
+    placements: List[Tuple[int, int, int]] = [(0, 0, 0)] * len(sizes)
+    pages: List[Tuple[int, int]] = []
+    page, x, y, shelf = -1, 0, 0, 0
+    for i in order:
+        w, h = sizes[i]
+        if w > page_size or h > page_size:
+            raise ValueError(f"Sprite of {w}x{h} does not fit a {page_size}x{page_size} page")
+        if page >= 0 and x + w > page_size:
+            x, y, shelf = 0, y + shelf + padding, 0
+        if page < 0 or y + h > page_size:
+            page, x, y, shelf = page + 1, 0, 0, 0
+            pages.append((0, 0))
+        placements[i] = (page, x, y)
+        pages[page] = (max(pages[page][0], x + w), max(pages[page][1], y + h))
+        x += w + padding
+        shelf = max(shelf, h)
+    return placements, pages
+
+
+def pack(sources: List[Source], name: str, page_size: int = 1024, padding: int = 1, jobs: int = 1) -> Atlas:
+    """Decode, trim, deduplicate and pack sources into atlas pages"""
+    sprites = load_sprites(sources, jobs)
+
+    unique: Dict[bytes, int] = {}
+    images: List[Tuple[int, int, bytes]] = []
+    image_of = []
+    for _, _, _, (_, _, w, h), pixels in sprites:
+        if not w:
+            image_of.append(None)
+            continue
+        key = hashlib.sha256(struct.pack('<HH', w, h) + pixels).digest()
+        if key not in unique:
+            unique[key] = len(images)
+            images.append((w, h, pixels))
+        image_of.append(unique[key])
+
+    placements, page_sizes = shelf_pack([(w, h) for w, h, _ in images], page_size, padding)
+    pages = [Page(w, h, bytearray(w * h * 4)) for w, h in page_sizes] or [Page(0, 0, bytearray())]
+    for (w, h, pixels), (page_index, x, y) in zip(images, placements):
+        page = pages[page_index]
+        stride = page.width * 4
+        for row in range(h):
+            start = (y + row) * stride + x * 4
+            page.pixels[start:start + w * 4] = pixels[row * w * 4:(row + 1) * w * 4]
+
+    frames = []
+    for source, (sprite_name, source_w, source_h, (offset_x, offset_y, w, h), _), image in zip(sources, sprites, image_of):
+        page_index, x, y = placements[image] if image is not None else (0, 0, 0)
+        frame = Frame(sprite_name, page_index, x, y, w, h, offset_x, offset_y, source_w, source_h,
+                      source.item_id, source.dimensions)
+        frames.append(frame)
+        pages[page_index].frames.append(frame)
+    return Atlas(name, pages, frames, shared=sum(1 for i in image_of if i is not None) - len(images))
+
+
+# ============================================================================
+# ATLAS FILES
+# ============================================================================
+
+def page_file_name(name: str, index: int) -> str:
+    return f"{name}-{index}.atlas"
+
+
+def encode_page(page: Page) -> bytes:
+    names = b''.join(struct.pack('<H', len(n)) + n for n in (f.name.encode('utf-8') for f in page.frames))
+    frames = b''.join(
+        FRAME.pack(f.x, f.y, f.w, f.h, f.offset_x, f.offset_y, f.source_w, f.source_h) for f in page.frames
+    )
+    pixels_offset = HEADER_SIZE
+    frames_offset = pixels_offset + len(page.pixels)
+    names_offset = frames_offset + len(frames)
+    header = HEADER.pack(MAGIC, VERSION, 0, page.width, page.height, len(page.frames),
+                         pixels_offset, frames_offset, names_offset, len(names))
+    return header.ljust(HEADER_SIZE, b'\0') + bytes(page.pixels) + frames + names
+
+
+def write_atlas(directory: Path, atlas: Atlas, png: bool = False) -> Path:
+    """Write every page (and optional PNG previews) plus the JSON index; returns the index path"""
+    directory.mkdir(parents=True, exist_ok=True)
+    for index, page in enumerate(atlas.pages):
+        path = directory / page_file_name(atlas.name, index)
+        tmp = path.with_name(path.name + '.tmp')
+        tmp.write_bytes(encode_page(page))
+        os.replace(tmp, path)
+        if png and page.width:
+            write_png(directory / f"{atlas.name}-{index}.png", bytes(page.pixels), page.width, page.height)
+
+    index_path = directory / f"{atlas.name}.json"
+    index_path.write_text(json.dumps({
+        'version': INDEX_VERSION,
+        'pages': [
+            {'file': page_file_name(atlas.name, i), 'width': p.width, 'height': p.height, 'frames': len(p.frames)}
+            for i, p in enumerate(atlas.pages)
+        ],
+        'frames': {f.name: f.to_json() for f in atlas.frames},
+    }, indent=1) + '\n')
+    return index_path
+
+
+class AtlasPage:
+    """A memory-mapped .atlas page; pixels is a zero-copy view of the RGBA block"""
+
+    def __init__(self, path: Path):
+        with open(path, 'rb') as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, _, self.width, self.height, count,
+         pixels_offset, frames_offset, names_offset, names_size) = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path}: not a version {VERSION} atlas page")
+        view = memoryview(self._map)
+        self.pixels = view[pixels_offset:pixels_offset + self.width * self.height * 4]
+        self.frames: Dict[str, Tuple[int, ...]] = {}
+        position = names_offset
+        for i in range(count):
+            length, = struct.unpack_from('<H', self._map, position)
+            name = bytes(view[position + 2:position + 2 + length]).decode('utf-8')
+            position += 2 + length
+            self.frames[name] = FRAME.unpack_from(self._map, frames_offset + i * FRAME.size)
+
+    def frame(self, name: str) -> bytes:
+        """Trimmed RGBA bytes of a frame"""
+        x, y, w, h = self.frames[name][:4]
+        stride = self.width * 4
+        return b''.join(self.pixels[(y + row) * stride + x * 4:(y + row) * stride + (x + w) * 4] for row in range(h))
+
+    def close(self) -> None:
+        self.pixels.release()
+        self._map.close()
+
+
+def read_atlas(path: Path) -> AtlasPage:
+    return AtlasPage(path)
@@ -0,0 +1,133 @@
+-- SVG File Converter
+-- Renders one wearable SVG with its metadata offset onto a target size canvas
+-- and saves it as .aseprite. Shared by batch-svg-importer.lua and
+-- aseprite-worker.lua so both produce identical files.
+
+local SVGParser = dofile("svg-parser.lua")
+local SVGRenderer = dofile("svg-renderer-professional.lua")
+local JsonMetadataLoader = dofile("json-metadata-loader.lua")
+
+local SVGFileConverter = {}
+
+-- Extract wearable ID from filename
+function SVGFileConverter.extractWearableId(filename)
+    local id = filename:match("^(%d+)_")
+    return id and tonumber(id) or nil
+end
+
+-- Convert a single SVG file to outputPath
+-- log is a table of {info = function(message), error = function(message)}
+-- Returns true, pixelsPlaced, fileTime on success and false on failure
+function SVGFileConverter.convert(svgPath, outputPath, viewIndex, targetSize, log)
+    -- Read SVG file
+    local file = io.open(svgPath, "r")
+    if not file then
+        log.error("Could not open file: " .. svgPath)
+        return false
+    end
+
+    local svgContent = file:read("*all")
+    file:close()
+
+    return SVGFileConverter.convertContent(svgContent, app.fs.fileName(svgPath), outputPath, viewIndex, targetSize, log, svgPath)
+end
+
+-- Convert SVG text that is already in memory (e.g. streamed by the worker
+-- client). filename carries the wearable ID prefix ("8_MarineJacket_Front.svg");
+-- source names the SVG in error messages and defaults to filename.
+function SVGFileConverter.convertContent(svgContent, filename, outputPath, viewIndex, targetSize, log, source)
+    local fileStartTime = os.clock()
+    source = source or filename
+
+    log.info("Processing: " .. filename)
+
+    -- Extract wearable ID
+    local wearableId = SVGFileConverter.extractWearableId(filename)
+    if not wearableId then
+        log.error("Could not extract wearable ID from filename: " .. filename)
+        return false
+    end
+
+    -- Get offset for this wearable and view (metadata is parsed once per process)
+    local offset = JsonMetadataLoader.getOffsetForWearable(wearableId, viewIndex)
+    local wearableName = JsonMetadataLoader.getWearableName(wearableId)
+
+    log.info("Wearable ID: " .. wearableId .. " (" .. wearableName .. "), View: " .. (viewIndex + 1) .. ", Offset: (" .. offset.x .. "," .. offset.y .. ")")
+
+    if not svgContent or svgContent == "" then
+        log.error("File is empty: " .. source)
+        return false
+    end
+
+    -- Parse SVG to get native dimensions
+    local svgData = SVGParser.parse(svgContent)
+    if not svgData or not svgData.viewBox then
+        log.error("Could not parse SVG: " .. source)
+        return false
+    end
+
+    -- Use SVG's native dimensions for initial import
+    local nativeWidth = math.floor(svgData.viewBox.width)
+    local nativeHeight = math.floor(svgData.viewBox.height)
+
+    log.info("Native SVG size: " .. nativeWidth .. "x" .. nativeHeight)
+
+    -- Render SVG to pixels at native size
+    local renderResult = SVGRenderer.render(svgData, nativeWidth, nativeHeight)
+
+    if not renderResult or not renderResult.pixels or #renderResult.pixels == 0 then
+        log.error("No pixels rendered from SVG: " .. source)
+        return false
+    end
+
+    log.info("Rendered " .. #renderResult.pixels .. " pixels")
+
+    -- Create target size sprite with transparent background
+    local sprite = Sprite(targetSize, targetSize, ColorMode.RGB)
+    local layer = sprite.layers[1]
+    local cel = sprite:newCel(layer, 1)
+    local image = cel.image
+
+    -- Clear canvas to transparent
+    app.transaction(function()
+        for y = 0, targetSize - 1 do
+            for x = 0, targetSize - 1 do
+                image:drawPixel(x, y, Color{r = 0, g = 0, b = 0, a = 0})
+            end
+        end
+    end)
+
+    -- Position and draw SVG pixels with offset
+    local pixelsPlaced = 0
+    app.transaction(function()
+        for _, pixel in ipairs(renderResult.pixels) do
+            -- Calculate target position with offset
+            local targetX = pixel.x + offset.x
+            local targetY = pixel.y + offset.y
+
+            -- Only draw pixels that fit within the target canvas
+            if targetX >= 0 and targetX < targetSize and targetY >= 0 and targetY < targetSize then
+                local color = Color{r = pixel.color.r, g = pixel.color.g, b = pixel.color.b}
+                image:drawPixel(targetX, targetY, color)
+                pixelsPlaced = pixelsPlaced + 1
+            end
+        end
+    end)
+
+    log.info("Placed " .. pixelsPlaced .. " pixels on " .. targetSize .. "x" .. targetSize .. " canvas")
+
+    -- Save as .aseprite file
+    app.command.SaveFileAs{
+        ui = false,
+        filename = outputPath
+    }
+
+    sprite:close()
+
+    local fileTime = os.clock() - fileStartTime
+    log.info("Saved: " .. outputPath .. " (Time: " .. string.format("%.2f", fileTime) .. "s)")
+
+    return true, pixelsPlaced, fileTime
+end
+
+return SVGFileConverter
@@ -0,0 +1,185 @@
+"""
+Single-pass <g> fragment extraction for the item generator.
+
+A FragmentIndex parses an SVG source once and records every <g> element
+with its class attribute in document order; all class lookups for that
+source then run against the recorded list instead of re-parsing and walking
+the tree. Matched elements are returned as-is: ElementTree elements can be
+appended to several new parents and serialized without being copied, as
+long as nobody mutates them.
+
+scan_groups() is the text-level counterpart for tools that copy fragments
+verbatim: one linear scan over the tags with a stack of open <g> elements,
+so nested groups are returned whole.
+
+ExampleLibrary lists examples/svgItems once and memoizes the parsed children
+of each example sleeve file, replacing a directory glob per sleeve and a
+parse per pose.
+"""
+import os
+import re
+import threading
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SVG_NS = 'http://www.w3.org/2000/svg'
+G_TAG = f'{{{SVG_NS}}}g'
+
+# Comments, CDATA, or a tag: (closing '/'), name, attributes (quoted values may contain '>'), self-closing '/'
+TAG = re.compile(
+    r'<!--.*?-->|<!\[CDATA\[.*?\]\]>|<(/?)([A-Za-z_][\w:.-]*)((?:[^>"\']|"[^"]*"|\'[^\']*\')*?)(/?)>',
+    re.DOTALL,
+)
+CLASS_ATTR = re.compile(r'(?:^|\s)class\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+
+
+def parse_svg_text(svg_text: Optional[str]) -> Optional[ET.Element]:
+    """Parse an SVG string; backticks (some JSON entries have them) are stripped"""
+    if not svg_text:
+        return None
+    svg_text = svg_text.strip().strip('`')
+    if not svg_text:
+        return None
+    return ET.fromstring(svg_text)
+
+
+def scan_groups(svg_text: str) -> List[Tuple[str, str]]:
+    """
+    (class attribute, source text) of every <g> element, nested ones
+    included, in document order. Unclosed groups are left out.
+    """
+    groups = []
+    open_groups = []
+    for match in TAG.finditer(svg_text):
+        closing, name, attributes, self_closing = match.groups()
+        if name != 'g':
+            continue
+        if closing:
+            if open_groups:
+                start, class_attr = open_groups.pop()
+                groups.append((start, class_attr, svg_text[start:match.end()]))
+            continue
+        class_match = CLASS_ATTR.search(attributes)
+        class_attr = (class_match.group(1) if class_match.group(1) is not None else class_match.group(2)) \
+            if class_match else ''
+        if self_closing:
+            groups.append((match.start(), class_attr, match.group()))
+        else:
+            open_groups.append((match.start(), class_attr))
+    groups.sort(key=lambda group: group[0])
+    return [(class_attr, text) for _, class_attr, text in groups]
+
+
+class FragmentIndex:
+    """Every <g> of one parsed SVG, with its class, in document order"""
+
+    def __init__(self, root: Optional[ET.Element]):
+        self.root = root
+        self.groups: List[Tuple[str, ET.Element]] = []
+        if root is not None:
+            self.groups = [(g.get('class', ''), g) for g in root.iter(G_TAG) if g is not root]
+
+    @classmethod
+    def from_text(cls, svg_text: Optional[str], ignore_errors: bool = False) -> 'FragmentIndex':
+        """Index an SVG string; with ignore_errors a malformed SVG gives an empty index"""
+        try:
+            return cls(parse_svg_text(svg_text))
+        except ET.ParseError:
+            if ignore_errors:
+                return cls(None)
+            raise
+
+    def find(self, pattern: str) -> Optional[ET.Element]:
+        """First group whose class attribute contains pattern"""
+        for cls, group in self.groups:
+            if pattern in cls:
+                return group
+        return None
+
+    def find_exact(self, class_attr: str) -> Optional[ET.Element]:
+        """First group whose class attribute is exactly class_attr"""
+        for cls, group in self.groups:
+            if cls == class_attr:
+                return group
+        return None
+
+    def find_all(self, pattern: str) -> List[ET.Element]:
+        return [group for cls, group in self.groups if pattern in cls]
+
+    def find_each(self, class_names: Iterable[str]) -> Dict[str, ET.Element]:
+        """
+        Map each class name to the first group containing it, in one pass.
+        A group is claimed by the first of class_names it matches.
+        """
+        class_names = list(class_names)
+        found = {}
+        for cls, group in self.groups:
+            for name in class_names:
+                if name in cls and name not in found:
+                    found[name] = group
+                    break
+            if len(found) == len(class_names):
+                break
+        return found
+
+
+class ExampleLibrary:
+    """File listing and parsed sleeve files of examples/svgItems, loaded on demand"""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self._by_item: Optional[Dict[str, List[str]]] = None
+        self._children: Dict[str, Tuple[ET.Element, ...]] = {}
+        self._lock = threading.Lock()
+
+    def _listing(self) -> Dict[str, List[str]]:
+        """File names grouped by their '{item_id}_' prefix, in directory order"""
+        if self._by_item is None:
+            by_item = {}
+            try:
+                # Directory order, as Path.glob would return it
+                names = os.listdir(self.directory)
+            except FileNotFoundError:
+                names = []
+            for name in names:
+                prefix, sep, _ = name.partition('_')
+                if sep and not name.startswith('.'):
+                    by_item.setdefault(prefix, []).append(name)
+            self._by_item = by_item
+        return self._by_item
+
+    def invalidate(self) -> None:
+        """Forget the listing and parsed files (after examples changed on disk)"""
+        with self._lock:
+            self._by_item = None
+            self._children.clear()
+
+    def glob(self, item_id, suffix: str) -> List[str]:
+        """Names matching '{item_id}_*{suffix}'"""
+        min_length = len(f'{item_id}_') + len(suffix)
+        return [
+            name for name in self._listing().get(str(item_id), [])
+            if name.endswith(suffix) and len(name) >= min_length
+        ]
+
+    def children(self, name: str) -> Tuple[ET.Element, ...]:
+        """Top-level children of an example SVG, parsed once"""
+        with self._lock:
+            children = self._children.get(name)
+            if children is None:
+                children = tuple(ET.fromstring((self.directory / name).read_text()))
+                self._children[name] = children
+        return children
+
+
+_libraries: Dict[Path, ExampleLibrary] = {}
+
+
+def example_library(directory: Path) -> ExampleLibrary:
+    """Shared ExampleLibrary per directory"""
+    directory = Path(directory)
+    library = _libraries.get(directory)
+    if library is None:
+        library = _libraries[directory] = ExampleLibrary(directory)
+    return library
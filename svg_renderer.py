@@ -0,0 +1,719 @@
+"""
+Pure-Python port of svg-parser.lua and svg-renderer-professional.lua.
+
+Renders Aavegotchi SVGs without Aseprite, pixel for pixel the same as the Lua
+importer: the same tokenizer (M/L/H/V/Z, first parameter pair only), nested
+<svg x= y=> offsets, CSS class fills, rect rotation handling, the integer
+scanline fill used at 1:1 scale, and a last-writer-wins pixel map.
+Quirks of the Lua code are kept on purpose (see the comments) so that both
+renderers can be compared against each other.
+
+    result = render_svg(svg_text)                 # native viewBox size
+    rgba = place_pixels(result, (x, y), 64)       # like svg-file-converter.lua
+    write_png('out.png', rgba, 64, 64)
+"""
+import math
+import os
+import re
+import struct
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+Color = Tuple[int, int, int]
+# (type, is_relative, params) with type one of M, L, H, V, Z
+PathCommand = Tuple[str, bool, List[float]]
+
+BLACK: Color = (0, 0, 0)
+EPSILON = 0.0001
+
+_LUA_NUMBER = re.compile(r'[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?')
+_LUA_HEX_NUMBER = re.compile(r'[+-]?0[xX][0-9a-fA-F]+')
+_LUA_SPACE = ' \t\n\r\f\v'
+
+
+def lua_tonumber(text) -> Optional[float]:
+    """tonumber() for decimal/hex strings: None where Lua returns nil"""
+    if text is None:
+        return None
+    text = text.strip(_LUA_SPACE)
+    if _LUA_NUMBER.fullmatch(text):
+        return float(text)
+    if _LUA_HEX_NUMBER.fullmatch(text):
+        return float(int(text, 16))
+    return None
+
+
+# ============================================================================
+# PARSER (svg-parser.lua)
+# ============================================================================
+
+@dataclass
+class ViewBox:
+    x: float = 0
+    y: float = 0
+    width: float = 64
+    height: float = 64
+
+
+@dataclass
+class PathElement:
+    fill: Color
+    commands: List[PathCommand]
+    svg_offset: Tuple[float, float] = (0, 0)
+    type: str = 'path'
+    # The d= attribute the commands were parsed from (None for converted rects)
+    path_data: Optional[str] = None
+
+
+@dataclass
+class RectElement:
+    fill: Color
+    x: float
+    y: float
+    width: float
+    height: float
+    transform: Optional[str] = None
+    svg_offset: Tuple[float, float] = (0, 0)
+    type: str = 'rect'
+
+
+@dataclass
+class ParsedSVG:
+    view_box: ViewBox = field(default_factory=ViewBox)
+    elements: list = field(default_factory=list)
+
+
+_NON_ALNUM = re.compile(r'[^0-9A-Za-z]')
+_HEX_PAIR = re.compile(r'[0-9a-fA-F]{1,2}')
+
+
+def _hex_byte(text: str) -> int:
+    # tonumber(s, 16) or 0
+    return int(text, 16) if _HEX_PAIR.fullmatch(text) else 0
+
+
+def hex_to_rgb(hex_str: Optional[str]) -> Color:
+    """Parse hex color to RGB (anything unparseable is black)"""
+    if not hex_str:
+        return BLACK
+    hex_str = _NON_ALNUM.sub('', hex_str.replace('#', ''))
+    if len(hex_str) == 3:
+        hex_str = ''.join(c * 2 for c in hex_str)
+    if len(hex_str) >= 6:
+        return (_hex_byte(hex_str[0:2]), _hex_byte(hex_str[2:4]), _hex_byte(hex_str[4:6]))
+    return BLACK
+
+
+_VIEWBOX_TOKEN = re.compile(r'[0-9.\-]+')
+
+
+def parse_view_box(view_box: Optional[str]) -> ViewBox:
+    if view_box is None:
+        return ViewBox()
+    coords = [n for n in (lua_tonumber(t) for t in _VIEWBOX_TOKEN.findall(view_box)) if n is not None]
+    if len(coords) >= 4:
+        return ViewBox(coords[0], coords[1], coords[2], coords[3])
+    return ViewBox()
+
+
+_COMMAND_CHARS = set('MmLlHhVvZz')
+_NUMBER_START = set('0123456789.-')
+_NUMBER_CHARS = set('0123456789.')
+
+
+def parse_path_data(path_data: str) -> List[PathCommand]:
+    """Tokenize path data exactly like parsePathData (no exponents, '-' only leading)"""
+    commands = []
+    n = len(path_data)
+    i = 0
+    max_iterations = n * 2  # Safety limit
+    iterations = 0
+
+    while i < n and iterations < max_iterations:
+        iterations += 1
+        char = path_data[i]
+        if char not in _COMMAND_CHARS:
+            i += 1
+            continue
+
+        command_type = char.upper()
+        is_relative = char.islower()
+        if command_type == 'Z':
+            commands.append(('Z', is_relative, []))
+            i += 1
+            continue
+
+        params = []
+        i += 1
+        last_i = i
+        while i < n and iterations < max_iterations:
+            iterations += 1
+            next_char = path_data[i]
+            if next_char in _COMMAND_CHARS:
+                break
+            if next_char in _LUA_SPACE or next_char == ',':
+                i += 1
+            elif next_char in _NUMBER_START:
+                start = i
+                if next_char == '-':
+                    i += 1
+                while i < n and path_data[i] in _NUMBER_CHARS:
+                    i += 1
+                num = lua_tonumber(path_data[start:i])
+                if num is not None:
+                    params.append(num)
+            else:
+                # Unknown character, skip it
+                i += 1
+            # Safety check: ensure we're making progress
+            if i == last_i:
+                i += 1
+            last_i = i
+
+        commands.append((command_type, is_relative, params))
+
+    return commands
+
+
+_CDATA_STYLE = re.compile(r'<style><!\[CDATA\[(.*?)\]\]></style>', re.S)
+_PLAIN_STYLE = re.compile(r'<style>(.*?)</style>', re.S)
+_CSS_RULE = re.compile(r'\.([^{]+)\{fill:([^}]+)\}')
+
+
+def parse_css_styles(svg_content: str) -> Dict[str, Color]:
+    """Parse `.class{fill:#color}` rules from the <style> block"""
+    styles = {}
+    match = _CDATA_STYLE.search(svg_content) or _PLAIN_STYLE.search(svg_content)
+    if match:
+        for class_name, color in _CSS_RULE.findall(match.group(1)):
+            styles[class_name] = hex_to_rgb(color)
+    return styles
+
+
+def _attr(tag: str, name: str, quotes: str = '"') -> Optional[str]:
+    # tag:match('name="([^"]*)"'): first occurrence anywhere in the tag, so
+    # x=" also matches inside viewBox=" and d=" inside id=", as in Lua
+    for quote in quotes:
+        match = re.search(f'{name}={quote}([^{quote}]*){quote}', tag)
+        if match:
+            return match.group(1)
+    return None
+
+
+def _element_fill(tag: str, css_styles: Dict[str, Color], group_fill: Optional[Color]) -> Color:
+    fill = _attr(tag, 'fill')
+    if fill is not None:
+        return hex_to_rgb(fill)
+    css_class = _attr(tag, 'class')
+    if css_class is not None and css_class in css_styles:
+        return css_styles[css_class]
+    if group_fill is not None:
+        return group_fill
+    return BLACK
+
+
+def parse_svg(svg_content: str) -> ParsedSVG:
+    """Port of SVGParser.parse"""
+    result = ParsedSVG()
+    cache = geometry_cache()
+    css_styles = parse_css_styles(svg_content)
+
+    view_box = _attr(svg_content, 'viewBox')
+    if view_box is not None:
+        result.view_box = parse_view_box(view_box)
+
+    group_fill_stack = []
+    current_group_fill = None
+    svg_offset_stack = []
+    current_offset = (0, 0)
+
+    n = len(svg_content)
+    i = 0
+    while i < n:
+        i = svg_content.find('<', i)
+        if i < 0:
+            break
+
+        if svg_content.startswith('g', i + 1) and i + 2 < n and svg_content[i + 2] in _LUA_SPACE + '>':
+            g_end = svg_content.find('>', i)
+            if g_end < 0:
+                i += 1
+                continue
+            g_tag = svg_content[i:g_end + 1]
+            group_fill = _attr(g_tag, 'fill')
+            group_class = _attr(g_tag, 'class')
+            if group_fill is not None:
+                current_group_fill = hex_to_rgb(group_fill)
+                group_fill_stack.append(current_group_fill)
+            elif group_class is not None and group_class in css_styles:
+                current_group_fill = css_styles[group_class]
+                group_fill_stack.append(current_group_fill)
+            else:
+                # Inherit parent group fill
+                group_fill_stack.append(current_group_fill)
+            i = g_end + 1
+
+        elif svg_content.startswith('svg', i + 1) and i + 4 < n and svg_content[i + 4] in _LUA_SPACE + '>':
+            svg_end = svg_content.find('>', i)
+            if svg_end < 0:
+                i += 1
+                continue
+            svg_tag = svg_content[i:svg_end + 1]
+            svg_x = lua_tonumber(_attr(svg_tag, 'x', '"\'')) or 0
+            svg_y = lua_tonumber(_attr(svg_tag, 'y', '"\'')) or 0
+            current_offset = (current_offset[0] + svg_x, current_offset[1] + svg_y)
+            svg_offset_stack.append(current_offset)
+            i = svg_end + 1
+
+        elif svg_content.startswith('</g>', i):
+            if group_fill_stack:
+                group_fill_stack.pop()
+                current_group_fill = group_fill_stack[-1] if group_fill_stack else None
+            i += 4
+
+        elif svg_content.startswith('</svg>', i):
+            if svg_offset_stack:
+                svg_offset_stack.pop()
+                current_offset = svg_offset_stack[-1] if svg_offset_stack else (0, 0)
+            i += 6
+
+        elif svg_content.startswith('path', i + 1):
+            path_end = svg_content.find('/>', i)
+            if path_end < 0:
+                i += 1
+                continue
+            path_tag = svg_content[i:path_end + 2]
+            d = _attr(path_tag, 'd')
+            if d is None:
+                commands = []
+            elif cache is not None:
+                commands = cache.commands(d)
+            else:
+                commands = parse_path_data(d)
+            result.elements.append(PathElement(
+                _element_fill(path_tag, css_styles, current_group_fill),
+                commands, current_offset, path_data=d,
+            ))
+            i = path_end + 2
+
+        elif svg_content.startswith('rect', i + 1):
+            rect_end = svg_content.find('/>', i)
+            if rect_end < 0:
+                i += 1
+                continue
+            rect_tag = svg_content[i:rect_end + 2]
+
+            def number(name):
+                value = _attr(rect_tag, name, '"\'')
+                return lua_tonumber(value if value is not None else '0') or 0
+
+            result.elements.append(RectElement(
+                _element_fill(rect_tag, css_styles, current_group_fill),
+                number('x'), number('y'), number('width'), number('height'),
+                _attr(rect_tag, 'transform', '"\''),
+                current_offset,
+            ))
+            i = rect_end + 2
+
+        else:
+            i += 1
+
+    return result
+
+
+# ============================================================================
+# GEOMETRY CACHE (geometry_cache.py)
+# ============================================================================
+
+_geometry_cache = None
+_geometry_cache_opened = False
+
+
+def set_geometry_cache(cache) -> None:
+    """Use cache (a geometry_cache.GeometryCache, or None for none) from now on"""
+    global _geometry_cache, _geometry_cache_opened
+    _geometry_cache, _geometry_cache_opened = cache, True
+
+
+def geometry_cache():
+    """The active geometry cache; the compiled default file is opened on first use"""
+    global _geometry_cache, _geometry_cache_opened
+    if not _geometry_cache_opened:
+        from geometry_cache import open_default
+        _geometry_cache, _geometry_cache_opened = open_default(), True
+    return _geometry_cache
+
+
+# ============================================================================
+# RENDERER (svg-renderer-professional.lua)
+# ============================================================================
+
+@dataclass
+class RenderResult:
+    width: int
+    height: int
+    # y * width + x -> color, later elements overwrite earlier ones
+    pixels: Dict[int, Color] = field(default_factory=dict)
+
+
+def separate_sub_paths(commands: List[PathCommand]) -> List[List[PathCommand]]:
+    sub_paths = []
+    current = []
+    for command in commands:
+        if command[0] == 'M':
+            if current:
+                sub_paths.append(current)
+            current = [command]
+        else:
+            current.append(command)
+    if current:
+        sub_paths.append(current)
+    return sub_paths
+
+
+def sub_path_to_points(commands, scale, offset_x, offset_y, view_box_x, view_box_y,
+                       initial_x=0.0, initial_y=0.0):
+    """
+    Convert sub-path commands to points; returns (points, end_x, end_y).
+    Relative moves start from initial_x/initial_y, which for the first
+    sub-path is (0, 0) without the nested svg offset (as in Lua).
+    """
+    points = []
+    current_x, current_y = initial_x, initial_y
+    start_x, start_y = 0.0, 0.0
+
+    for command_type, is_relative, params in commands:
+        if command_type == 'M':
+            if len(params) >= 2:
+                if is_relative:
+                    current_x += params[0] * scale
+                    current_y += params[1] * scale
+                else:
+                    current_x = (params[0] - view_box_x) * scale + offset_x
+                    current_y = (params[1] - view_box_y) * scale + offset_y
+                start_x, start_y = current_x, current_y
+                points.append((current_x, current_y))
+        elif command_type == 'L':
+            if len(params) >= 2:
+                if is_relative:
+                    end_x = current_x + params[0] * scale
+                    end_y = current_y + params[1] * scale
+                else:
+                    end_x = (params[0] - view_box_x) * scale + offset_x
+                    end_y = (params[1] - view_box_y) * scale + offset_y
+                points.append((end_x, end_y))
+                current_x, current_y = end_x, end_y
+        elif command_type == 'H':
+            if len(params) >= 1:
+                if is_relative:
+                    end_x = current_x + params[0] * scale
+                else:
+                    end_x = (params[0] - view_box_x) * scale + offset_x
+                points.append((end_x, current_y))
+                current_x = end_x
+        elif command_type == 'V':
+            if len(params) >= 1:
+                if is_relative:
+                    end_y = current_y + params[0] * scale
+                else:
+                    end_y = (params[0] - view_box_y) * scale + offset_y
+                points.append((current_x, end_y))
+                current_y = end_y
+        elif command_type == 'Z':
+            if current_x != start_x or current_y != start_y:
+                points.append((start_x, start_y))
+            current_x, current_y = start_x, start_y
+
+    return points, current_x, current_y
+
+
+def path_to_sub_path_points(element: PathElement, view_box: ViewBox, scale: float) -> List[list]:
+    """Point lists of every sub-path with at least 3 points"""
+    offset_x, offset_y = element.svg_offset
+    last_x, last_y = 0.0, 0.0
+    polygons = []
+    for sub_path in separate_sub_paths(element.commands):
+        points, end_x, end_y = sub_path_to_points(
+            sub_path, scale, offset_x, offset_y, view_box.x, view_box.y, last_x, last_y)
+        if len(points) >= 3:
+            # Only filled sub-paths move the start of the next relative m
+            last_x, last_y = end_x, end_y
+            polygons.append(points)
+    return polygons
+
+
+def build_integer_edges(polygons) -> List[Tuple[int, int, float, float, int]]:
+    """Edge table of scanlineFillIntegerMultiPath: (y_min, y_max, x, dx, winding)"""
+    edges = []
+    for points in polygons:
+        n = len(points)
+        for j in range(n):
+            x1, y1 = points[j]
+            x2, y2 = points[(j + 1) % n]
+            py1, py2 = math.floor(y1), math.floor(y2)
+            if py1 == py2:
+                continue
+            if py1 < py2:
+                edges.append((py1, py2, x1, (x2 - x1) / (y2 - y1), 1))
+            else:
+                edges.append((py2, py1, x2, (x1 - x2) / (y1 - y2), -1))
+    return edges
+
+
+def build_scaled_edges(polygons) -> List[Tuple[float, float, float, float, int]]:
+    """
+    Edge table of scanlineFillNonZeroMultiPath (createEdge). createEdge swaps
+    the end points before computing the winding, so every edge winds +1.
+    """
+    edges = []
+    for points in polygons:
+        n = len(points)
+        if n < 2:
+            continue
+        for j in range(n):
+            x1, y1 = points[j]
+            x2, y2 = points[(j + 1) % n]
+            if y1 > y2:
+                x1, y1, x2, y2 = x2, y2, x1, y1
+            if y1 == y2:
+                continue
+            edges.append((y1, y2, x1, (x2 - x1) / (y2 - y1), 1))
+    return edges
+
+
+def _fill_spans(edges, y_range, sample_offset, width, emit) -> None:
+    """Non-zero winding scanline fill; calls emit(y, x_start, x_end) per span"""
+    for y in y_range:
+        sample_y = y + sample_offset
+        crossings = sorted(
+            (x + (sample_y - y_min) * dx, winding)
+            for y_min, y_max, x, dx, winding in edges
+            if y_min <= y < y_max
+        )
+        winding_count = 0
+        fill_start = None
+        for x, winding in crossings:
+            previous = winding_count
+            winding_count += winding
+            if previous == 0 and winding_count != 0:
+                fill_start = x
+            if previous != 0 and winding_count == 0 and fill_start is not None:
+                x_start = max(0, math.floor(fill_start + EPSILON))
+                x_end = min(width - 1, math.floor(x - EPSILON))
+                if x_start <= x_end:
+                    emit(y, x_start, x_end)
+                fill_start = None
+
+
+def fill_polygons(polygons, scale: float, width: int, height: int, emit) -> None:
+    """Fill sub-paths together: integer algorithm at scale 1, scaled otherwise"""
+    if not polygons:
+        return
+    if scale == 1.0:
+        edges = build_integer_edges(polygons)
+        if not edges:
+            return
+        min_y = max(0, min(e[0] for e in edges))
+        max_y = min(height - 1, max(e[1] for e in edges))
+        _fill_spans(edges, range(min_y, max_y + 1), 0.5, width, emit)
+    else:
+        edges = build_scaled_edges(polygons)
+        if not edges:
+            return
+        min_y = max(0, math.floor(min(e[0] for e in edges)))
+        max_y = min(height - 1, math.ceil(max(e[1] for e in edges)))
+        _fill_spans(edges, range(min_y, max_y + 1), 0.0, width, emit)
+
+
+def render_scale(view_box: ViewBox, width: int, height: int) -> Optional[float]:
+    """min(width / vbw, height / vbh) with Lua float division semantics"""
+    def divide(a, b):
+        if b == 0:
+            return math.inf if a > 0 else (-math.inf if a < 0 else math.nan)
+        return a / b
+    scale = min(divide(width, view_box.width), divide(height, view_box.height))
+    if scale != scale or scale <= 0:
+        return None
+    return scale
+
+
+def rect_to_path(rect: RectElement) -> PathElement:
+    """Port of renderRect's rect -> path conversion (90 degree rotations only)"""
+    x = rect.x + rect.svg_offset[0]
+    y = rect.y + rect.svg_offset[1]
+    width, height = rect.width, rect.height
+
+    if rect.transform:
+        match = re.search(r'rotate\(([^\s,]+)\s*([^\s,]+)\s*([^)]+)\)', rect.transform)
+        if match:
+            angle, cx, cy = match.groups()
+        else:
+            match = re.search(r'rotate\(([^)]+)\)', rect.transform)
+            angle, cx, cy = (match.group(1) if match else None), None, None
+        if angle is not None:
+            angle = lua_tonumber(angle) or 0
+            if abs(abs(angle) - 90) < 0.1:
+                width, height = height, width
+                if cx is not None and cy is not None:
+                    cx, cy = lua_tonumber(cx), lua_tonumber(cy)
+                    if cx is None or cy is None:
+                        # Arithmetic on nil: the Lua pcall drops the element
+                        raise ValueError(f"Invalid rotate center in {rect.transform!r}")
+                    old_center_x = x + width / 2
+                    old_center_y = y + height / 2
+                    if angle < 0:
+                        x = cx - (old_center_y - cy) - width / 2
+                        y = cy + (old_center_x - cx) - height / 2
+                    else:
+                        x = cx + (old_center_y - cy) - width / 2
+                        y = cy - (old_center_x - cx) - height / 2
+
+    commands = [
+        ('M', False, [x, y]),
+        ('L', False, [x + width, y]),
+        ('L', False, [x + width, y + height]),
+        ('L', False, [x, y + height]),
+        ('Z', False, []),
+    ]
+    return PathElement(rect.fill, commands, (0, 0))
+
+
+def render(svg_data: ParsedSVG, width: int, height: int) -> RenderResult:
+    """Port of SVGRenderer.render: elements in order, last writer wins"""
+    result = RenderResult(width, height)
+    if svg_data is None or width is None or height is None or width <= 0 or height <= 0:
+        return result
+
+    scale = render_scale(svg_data.view_box, width, height)
+    pixels = result.pixels
+    cache = geometry_cache()
+
+    for element in svg_data.elements:
+        try:
+            if element.type == 'rect':
+                if element.width <= 0 or element.height <= 0:
+                    continue
+                element = rect_to_path(element)
+            if not element.commands or scale is None:
+                continue
+            color = element.fill
+
+            def emit(y, x_start, x_end):
+                base = y * width
+                for x in range(x_start, x_end + 1):
+                    pixels[base + x] = color
+
+            if cache is not None:
+                spans, complete = cache.spans(element, svg_data.view_box, scale, width, height)
+                for span in spans:
+                    emit(*span)
+                if not complete:
+                    continue
+            else:
+                fill_polygons(path_to_sub_path_points(element, svg_data.view_box, scale),
+                              scale, width, height, emit)
+        except (ValueError, ArithmeticError):
+            # pcall in the Lua renderer: a failing element is skipped
+            continue
+
+    return result
+
+
+def render_svg(svg_content: str) -> RenderResult:
+    """Parse and render at the SVG's native viewBox size (as the importer does)"""
+    svg_data = parse_svg(svg_content)
+    width = math.floor(svg_data.view_box.width)
+    height = math.floor(svg_data.view_box.height)
+    return render(svg_data, width, height)
+
+
+# ============================================================================
+# OUTPUT
+# ============================================================================
+
+def place_pixels(result: RenderResult, offset=(0, 0), target_size: int = 64) -> bytearray:
+    """
+    Draw rendered pixels onto a transparent target_size canvas shifted by the
+    wearable's preview offset; returns RGBA bytes (row major).
+    """
+    rgba = bytearray(target_size * target_size * 4)
+    offset_x, offset_y = int(offset[0]), int(offset[1])
+    for key, (r, g, b) in result.pixels.items():
+        y, x = divmod(key, result.width)
+        tx, ty = x + offset_x, y + offset_y
+        if 0 <= tx < target_size and 0 <= ty < target_size:
+            i = (ty * target_size + tx) * 4
+            rgba[i:i + 4] = bytes((r, g, b, 255))
+    return rgba
+
+
+def encode_png(rgba, width: int, height: int) -> bytes:
+    """Minimal RGBA PNG encoder (8 bit, no interlace)"""
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data) & 0xffffffff)
+
+    stride = width * 4
+    raw = b''.join(b'\x00' + bytes(rgba[y * stride:(y + 1) * stride]) for y in range(height))
+    header = struct.pack('>IIBBBBB', width, height, 8, 6, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header)
+            + chunk(b'IDAT', zlib.compress(raw, 9)) + chunk(b'IEND', b''))
+
+
+def write_png(path, rgba, width: int, height: int) -> None:
+    # Replace rather than overwrite: path may be a hardlink into the asset store
+    path = Path(path)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(encode_png(rgba, width, height))
+    os.replace(tmp_path, path)
+
+
+def preview_offset(db_record: Optional[dict], view_idx: int) -> Tuple[float, float]:
+    """Offset of a wearable view from its aavegotchi_db_wearables.json record"""
+    if not db_record:
+        return (0, 0)
+    offsets = db_record.get('previewoffsets') or []
+    if view_idx >= len(offsets):
+        return (0, 0)
+    offset = offsets[view_idx]
+    return (lua_tonumber(str(offset.get('x'))) or 0, lua_tonumber(str(offset.get('y'))) or 0)
+
+
+def convert_svg_content(name: str, svg_content: str, output_path, view_idx: int,
+                        db_records: Dict[int, dict], target_size: int = 64,
+                        write=write_png) -> RenderResult:
+    """
+    Python counterpart of svg-file-converter.lua: render one wearable SVG at
+    its native size, place it with the DB preview offset and write a PNG
+    (or whatever write(path, rgba, width, height) encodes, e.g.
+    aseprite_file.write_aseprite). name is the SVG file name, which carries
+    the wearable ID. Raises
+    ValueError where the Lua converter reports a failure. Like the Lua
+    converter, nothing is written when the SVG renders no pixels (empty
+    views such as the back of eye wearables); the empty result is returned.
+    """
+    match = re.match(r'(\d+)_', name)
+    if not match:
+        raise ValueError(f"Could not extract wearable ID from filename: {name}")
+    offset = preview_offset(db_records.get(int(match.group(1))), view_idx)
+
+    if not svg_content:
+        raise ValueError(f"File is empty: {name}")
+
+    result = render_svg(svg_content)
+    if not result.pixels:
+        return result
+
+    write(output_path, place_pixels(result, offset, target_size), target_size, target_size)
+    return result
+
+
+def convert_svg_file(svg_path, output_path, view_idx: int, db_records: Dict[int, dict],
+                     target_size: int = 64, write=write_png) -> RenderResult:
+    """convert_svg_content for an SVG file on disk"""
+    svg_path = Path(svg_path)
+    if not re.match(r'(\d+)_', svg_path.name):
+        raise ValueError(f"Could not extract wearable ID from filename: {svg_path.name}")
+    return convert_svg_content(svg_path.name, svg_path.read_text(), output_path, view_idx,
+                               db_records, target_size, write)
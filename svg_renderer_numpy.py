@@ -0,0 +1,235 @@
+"""
+Vectorized raster core for svg_renderer.
+
+Produces the same pixels as svg_renderer.render (and therefore the Lua
+renderer) but writes uint8[H, W, 4] arrays instead of a pixel dict. The
+points of every element of a batch of SVGs go into flat arrays; edges are
+built, expanded to one crossing per (edge, scanline) and sorted per element
+and scanline with a single lexsort, then turned into spans with a cumulative
+winding count. Each pixel takes the colour of the last element covering it,
+which is the same last-writer-wins result as painting in document order.
+
+Wearable SVGs are small, so the fixed cost of the array operations is what
+matters: render_batch() rasterizes any number of SVGs with the same handful
+of calls.
+
+    canvases = render_batch([parse_svg(text) for text in svgs])   # (N, H, W, 4)
+    canvas = render_svg_array(svg_text)                           # one SVG
+    tile = place_array(canvas, (x, y), 64)                        # preview offset
+"""
+import math
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+
+from svg_renderer import (
+    EPSILON,
+    ParsedSVG,
+    parse_svg,
+    path_to_sub_path_points,
+    rect_to_path,
+    render_scale,
+)
+
+
+class PointBatch:
+    """Flat point lists of many SVGs, filled element by element"""
+
+    def __init__(self):
+        self.points = []
+        self.polygon_sizes = []
+        self.element_sizes = []
+        self.element_canvas = []
+        self.element_integer = []
+        self.colors = []
+
+    def add_svg(self, svg_data: ParsedSVG, scale: float, canvas: int) -> None:
+        """Append every drawable element; failing ones are dropped like the Lua pcall does"""
+        for element in svg_data.elements:
+            try:
+                if element.type == 'rect':
+                    if element.width <= 0 or element.height <= 0:
+                        continue
+                    element = rect_to_path(element)
+                if not element.commands:
+                    continue
+                polygons = path_to_sub_path_points(element, svg_data.view_box, scale)
+            except (ValueError, ArithmeticError):
+                # pcall in the Lua renderer: a failing element is skipped
+                continue
+            if not polygons:
+                continue
+            count = 0
+            for polygon in polygons:
+                self.points.extend(polygon)
+                self.polygon_sizes.append(len(polygon))
+                count += len(polygon)
+            self.element_sizes.append(count)
+            self.element_canvas.append(canvas)
+            # scanlineFillIntegerMultiPath at scale 1, the createEdge fill otherwise
+            self.element_integer.append(scale == 1.0)
+            self.colors.append(element.fill)
+
+
+def build_edges(batch: PointBatch):
+    """
+    Edge table of a PointBatch as arrays (y_min, y_max, x, dx, winding, element),
+    in document order; returns None when there are no edges.
+    """
+    if not batch.points:
+        return None
+    xy = np.asarray(batch.points, dtype=np.float64)
+    element_ids = np.repeat(np.arange(len(batch.element_sizes)), batch.element_sizes)
+    integer = np.asarray(batch.element_integer)[element_ids]
+
+    # Each point connects to the next one of its polygon, the last to the first
+    sizes = np.asarray(batch.polygon_sizes)
+    ends = np.cumsum(sizes)
+    following = np.arange(1, len(xy) + 1)
+    following[ends - 1] = ends - sizes
+    x1, y1 = xy[:, 0], xy[:, 1]
+    x2, y2 = x1[following], y1[following]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # Integer fill: edges between floored rows; createEdge: raw end points
+        top = np.where(integer, np.floor(y1), y1)
+        bottom = np.where(integer, np.floor(y2), y2)
+        keep = top != bottom
+        finite = np.isfinite(xy).all(axis=1)
+        if not finite.all():
+            # math.floor raises on inf/nan, failing the whole element
+            keep &= ~(np.isin(element_ids, element_ids[~finite]) & integer)
+        downward = top < bottom
+        y_min = np.where(downward, top, bottom)
+        y_max = np.where(downward, bottom, top)
+        # createEdge swaps the end points first, so its edges all wind +1
+        winding = np.where(downward | ~integer, 1, -1)
+        dx = (x2 - x1) / (y2 - y1)
+    x = np.where(downward, x1, x2)
+
+    if not keep.any():
+        return None
+    return tuple(column[keep] for column in (y_min, y_max, x, dx, winding, element_ids))
+
+
+def fill_spans(edges, batch: PointBatch, sizes: np.ndarray, shape: Tuple[int, int, int]) -> np.ndarray:
+    """
+    Non-zero winding fill of every element of a batch. `sizes` holds each
+    canvas' (width, height). Returns, for every pixel of the
+    (canvases, rows, columns) `shape`, the index of the last element covering
+    it, or -1. A run only counts once the winding returns to zero, as in the
+    Lua fill.
+    """
+    y_min, y_max, x0, dx, winding, element = edges
+    canvas = np.asarray(batch.element_canvas)[element]
+    width, height = sizes[canvas, 0], sizes[canvas, 1]
+    sample_offset = np.where(np.asarray(batch.element_integer)[element], 0.5, 0.0)
+
+    # One crossing per scanline y with y_min <= y < y_max, on the canvas
+    with np.errstate(invalid='ignore'):
+        first = np.maximum(np.ceil(y_min), 0)
+        last = np.minimum(np.ceil(y_max) - 1, height - 1)
+        count = np.where(last >= first, last - first + 1, 0).astype(np.intp)
+    pair_edge = np.repeat(np.arange(len(count)), count)
+    offsets = np.arange(len(pair_edge)) - np.repeat(np.cumsum(count) - count, count)
+    ys = first[pair_edge].astype(np.intp) + offsets
+    xs = x0[pair_edge] + (ys + sample_offset[pair_edge] - y_min[pair_edge]) * dx[pair_edge]
+    windings = winding[pair_edge]
+    groups = element[pair_edge]
+
+    # Crossings of one element and scanline sorted as the Lua table.sort of (x, winding)
+    order = np.lexsort((windings, xs, ys, groups))
+    xs, ys, windings, groups, pair_edge = (a[order] for a in (xs, ys, windings, groups, pair_edge))
+    new_line = np.r_[True, (groups[1:] != groups[:-1]) | (ys[1:] != ys[:-1])]
+    line_starts = np.flatnonzero(new_line)
+    line_of = np.cumsum(new_line) - 1
+
+    # Winding count after each crossing, restarted on every scanline
+    totals = np.cumsum(windings)
+    counts = totals - (totals - windings)[line_starts][line_of]
+
+    # Segment i lies between crossings i and i + 1; it is filled when the
+    # winding after crossing i is non-zero and the run is closed later on
+    index = np.arange(len(xs))
+    closes = np.where(counts == 0, index, -1)
+    last_close = np.maximum.reduceat(closes, line_starts)[line_of]
+    inside = (counts[:-1] != 0) & (index[:-1] < last_close[:-1])
+
+    starts = np.maximum(0, np.floor(xs[:-1] + EPSILON))
+    stops = np.minimum(width[pair_edge[:-1]] - 1, np.floor(xs[1:] - EPSILON))
+    inside &= starts <= stops
+
+    # Expand the spans to pixels; the highest element index wins
+    segments = np.flatnonzero(inside)
+    span_first = starts[segments].astype(np.intp)
+    lengths = stops[segments].astype(np.intp) - span_first + 1
+    rows, columns = shape[1:]
+    span_first += (canvas[pair_edge[segments]] * rows + ys[segments]) * columns
+    pixels = np.repeat(span_first - (np.cumsum(lengths) - lengths), lengths) + np.arange(lengths.sum())
+    top = np.full(shape, -1, dtype=np.intp)
+    np.maximum.at(top.reshape(-1), pixels, np.repeat(groups[segments], lengths))
+    return top
+
+
+def _native_size(svg_data: ParsedSVG) -> Tuple[int, int]:
+    return math.floor(svg_data.view_box.width), math.floor(svg_data.view_box.height)
+
+
+def render_batch(svgs: Sequence[ParsedSVG], sizes: Optional[Sequence[Tuple[int, int]]] = None,
+                 out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Rasterize many parsed SVGs, each at its (width, height) (the native
+    viewBox size by default), into a uint8[N, H, W, 4] stack; canvas i holds
+    its pixels in out[i, :height_i, :width_i].
+    """
+    if sizes is None:
+        sizes = [_native_size(svg_data) for svg_data in svgs]
+    rows = max([height for _, height in sizes] + [0])
+    columns = max([width for width, _ in sizes] + [0])
+    if out is None:
+        out = np.zeros((len(svgs), rows, columns, 4), dtype=np.uint8)
+
+    batch = PointBatch()
+    for i, (svg_data, (width, height)) in enumerate(zip(svgs, sizes)):
+        if svg_data is None or width <= 0 or height <= 0:
+            continue
+        scale = render_scale(svg_data.view_box, width, height)
+        if scale is not None:
+            batch.add_svg(svg_data, scale, i)
+
+    edges = build_edges(batch)
+    if edges is None:
+        return out
+    top = fill_spans(edges, batch, np.asarray(sizes).reshape(-1, 2), out.shape[:3])
+    colors = np.array([(r, g, b, 255) for r, g, b in batch.colors], dtype=np.uint8)
+    covered = top >= 0
+    out[covered] = colors[top[covered]]
+    return out
+
+
+def render_array(svg_data: ParsedSVG, width: int, height: int) -> np.ndarray:
+    """Vectorized counterpart of svg_renderer.render; returns uint8[H, W, 4]"""
+    return render_batch([svg_data], [(width, height)])[0]
+
+
+def render_svg_array(svg_content: str) -> np.ndarray:
+    """Parse and render at the SVG's native viewBox size"""
+    svg_data = parse_svg(svg_content)
+    width, height = _native_size(svg_data)
+    return render_array(svg_data, width, height)
+
+
+def place_array(canvas: np.ndarray, offset=(0, 0), target_size: int = 64) -> np.ndarray:
+    """Shift a rendered canvas by the preview offset onto a target_size tile"""
+    tile = np.zeros((target_size, target_size, 4), dtype=np.uint8)
+    offset_x, offset_y = int(offset[0]), int(offset[1])
+    height, width = canvas.shape[:2]
+
+    src_x0, src_y0 = max(0, -offset_x), max(0, -offset_y)
+    dst_x0, dst_y0 = max(0, offset_x), max(0, offset_y)
+    copy_w = min(width - src_x0, target_size - dst_x0)
+    copy_h = min(height - src_y0, target_size - dst_y0)
+    if copy_w > 0 and copy_h > 0:
+        tile[dst_y0:dst_y0 + copy_h, dst_x0:dst_x0 + copy_w] = \
+            canvas[src_y0:src_y0 + copy_h, src_x0:src_x0 + copy_w]
+    return tile
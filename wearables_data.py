@@ -0,0 +1,218 @@
+"""
+Indexed, lazy access to the wearables JSON files.
+
+Both wearables-1-420.json ({"wearables": {"<id>": {...}}}) and
+aavegotchi_db_wearables.json ({"wearables": [{"id": <id>, ...}]}) are large
+mostly because of embedded SVG strings, while the tools usually need one
+record at a time. open_wearables() returns a read-only mapping backed by a
+small on-disk index:
+
+    .build-cache/index/wearables-1-420.<path hash>.index.json
+    {"version": 1, "size": ..., "mtime_ns": ..., "sha256": "...",
+     "records": {"8": [offset, length, slot, is_body, "Marine Jacket"], ...}}
+
+Offsets and lengths are byte positions of each record in the source file, so
+a lookup seeks and decodes just that record. The index is rebuilt only when
+the source file's size/mtime changes and its SHA-256 no longer matches.
+
+    wearables = open_wearables('wearables-1-420.json')
+    item = wearables['8']                  # decodes only item 8
+    wearables.entry(8).is_body             # no decoding at all
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Dict, Iterator, NamedTuple, Optional, Union
+
+from build_cache import hash_file
+
+DEFAULT_INDEX_DIR = Path('.build-cache/index')
+INDEX_VERSION = 1
+
+# JSON strings (with escapes) and structural characters; everything else
+# (numbers, literals, whitespace) is skipped by the scanner
+TOKEN = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"|[{}\[\]:,]')
+
+ItemId = Union[int, str]
+
+
+class IndexEntry(NamedTuple):
+    offset: int
+    length: int
+    slot: Optional[int]
+    is_body: bool
+    name: str
+
+
+def _key(item_id: ItemId) -> str:
+    """Records are keyed by their id as a string, whatever type the caller uses"""
+    try:
+        return str(int(item_id))
+    except (TypeError, ValueError):
+        return str(item_id)
+
+
+def _entry_for(record: dict, offset: int, length: int) -> IndexEntry:
+    slot_positions = record.get('slotPositions') or []
+    slot = record.get('slot')
+    if slot is None and True in slot_positions:
+        slot = slot_positions.index(True)
+    is_body = bool(slot_positions[0]) if len(slot_positions) > 0 else False
+    return IndexEntry(offset, length, slot, is_body, record.get('name', ''))
+
+
+def scan_records(data: bytes) -> Dict[str, IndexEntry]:
+    """
+    Locate every record of the top-level "wearables" object or list without
+    decoding the whole document. Each record is decoded once on its own to
+    read its slot, body flag and name, then dropped.
+    """
+    records = {}
+    depth = 0
+    in_wearables = False
+    keyed = False
+    pending_key = None      # last string seen at the current depth
+    record_key = None
+    record_start = None
+    for match in TOKEN.finditer(data):
+        token = match.group()
+        if token in (b'{', b'['):
+            depth += 1
+            if in_wearables and depth == 2:
+                # Records of a list are keyed by their "id" field instead
+                keyed = token == b'{'
+                pending_key = None
+            elif in_wearables and depth == 3:
+                record_key = pending_key if keyed else None
+                record_start = match.start()
+        elif token in (b'}', b']'):
+            if in_wearables and depth == 3 and record_start is not None:
+                end = match.end()
+                record = json.loads(data[record_start:end])
+                key = record_key if record_key is not None else _key(record.get('id'))
+                records[key] = _entry_for(record, record_start, end - record_start)
+                record_start = None
+            depth -= 1
+            if in_wearables and depth == 1:
+                break
+        elif token == b':':
+            if depth == 1 and pending_key == 'wearables':
+                in_wearables = True
+        elif token == b',':
+            pending_key = None
+        else:
+            # A string: object key (or a value, which is reset at the next ',')
+            if depth in (1, 2):
+                pending_key = json.loads(token) if depth == 1 or in_wearables else None
+    return records
+
+
+class WearableIndex:
+    """id -> IndexEntry for one source file, cached next to the build manifest"""
+
+    def __init__(self, source: Path, index_dir: Path = DEFAULT_INDEX_DIR):
+        self.source = Path(source)
+        path_hash = hashlib.sha1(str(self.source.resolve()).encode()).hexdigest()[:8]
+        self.path = Path(index_dir) / f"{self.source.stem}.{path_hash}.index.json"
+        self.entries: Dict[str, IndexEntry] = {}
+        self.load()
+
+    def load(self) -> None:
+        stat = self.source.stat()
+        data = None
+        if self.path.exists():
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Warning: Ignoring unreadable index {self.path}: {e}")
+        if data is not None and data.get('version') == INDEX_VERSION:
+            if data.get('size') == stat.st_size and data.get('mtime_ns') == stat.st_mtime_ns:
+                self.entries = {k: IndexEntry(*v) for k, v in data['records'].items()}
+                return
+            # Touched but possibly unchanged: compare content before rebuilding
+            source_hash = hash_file(self.source)
+            if data.get('sha256') == source_hash:
+                self.entries = {k: IndexEntry(*v) for k, v in data['records'].items()}
+                self.save(stat, source_hash)
+                return
+        self.rebuild(stat)
+
+    def rebuild(self, stat=None) -> None:
+        stat = stat or self.source.stat()
+        with open(self.source, 'rb') as f:
+            content = f.read()
+        self.entries = scan_records(content)
+        self.save(stat, hashlib.sha256(content).hexdigest())
+
+    def save(self, stat, source_hash: str) -> None:
+        data = {
+            'version': INDEX_VERSION,
+            'source': str(self.source),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': source_hash,
+            'records': {k: list(v) for k, v in self.entries.items()},
+        }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix('.json.tmp')
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            # The in-memory index still works; it is just rebuilt next run
+            print(f"Warning: Could not write index {self.path}: {e}")
+
+
+class WearableStore(Mapping):
+    """
+    Read-only id -> record mapping over a wearables JSON file. Records are
+    decoded on access (a few recently used ones are kept); keys are the ids
+    as strings, and int ids are accepted too. Safe to share between threads.
+    """
+
+    def __init__(self, source: Path, index_dir: Path = DEFAULT_INDEX_DIR, cache_size: int = 32):
+        self.source = Path(source)
+        self.index = WearableIndex(self.source, index_dir)
+        self.cache_size = cache_size
+        self._cache: 'OrderedDict[str, dict]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def entry(self, item_id: ItemId) -> IndexEntry:
+        return self.index.entries[_key(item_id)]
+
+    def __getitem__(self, item_id: ItemId) -> dict:
+        key = _key(item_id)
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+        entry = self.index.entries[key]
+        with open(self.source, 'rb') as f:
+            f.seek(entry.offset)
+            record = json.loads(f.read(entry.length))
+        with self._lock:
+            self._cache[key] = record
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return record
+
+    def __contains__(self, item_id) -> bool:
+        return _key(item_id) in self.index.entries
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.index.entries)
+
+    def __len__(self) -> int:
+        return len(self.index.entries)
+
+
+def open_wearables(source, index_dir: Path = DEFAULT_INDEX_DIR) -> WearableStore:
+    """Indexed mapping over wearables-1-420.json or aavegotchi_db_wearables.json"""
+    return WearableStore(Path(source), index_dir)